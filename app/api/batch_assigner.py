@@ -0,0 +1,173 @@
+from datetime import datetime
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, select
+
+from app.api.load_selector import LoadSelector, get_load_selector
+from app.api.matching_executor import matching_executor
+from app.api.models import Courier
+from app.api.open_orders import open_orders_index
+from app.api.order_assigner import not_assigned_orders_query
+from app.api.order_batch import OrderBatch
+from app.api.order_selector import OrderSelector
+from app.db import database
+from app.db.managers import CouriersManager
+from app.db.schema import couriers_orders_table
+from app.utils.constants import COURIER_COEFFICIENT, COURIER_POWER
+from app.utils.buckets import RegionHourBuckets
+from app.utils.intervals import IntervalIndex
+from app.utils.periods import MinutesPeriod
+
+CourierOrders = Tuple[List[int], Optional[datetime]]  # Orders ids and assign time
+CourierValues = Tuple[AbstractSet[int], List[MinutesPeriod], LoadSelector, float]  # Regions, working, selector, power
+
+
+class CandidateOrdersIndex:
+    """Positions of not assigned orders in batch grouped by region and hour of delivery."""
+
+    def __init__(self, batch: OrderBatch):
+        self.batch = batch
+        self._buckets: RegionHourBuckets[int] = RegionHourBuckets()  # Positions
+        self._taken: Set[int] = set()
+        for position, (region, delivery_minutes) in enumerate(zip(batch.regions, batch.delivery_minutes)):
+            self._buckets.add(region, delivery_minutes, position)  # Positions are ascending, it's append
+
+    def find(self, regions: AbstractSet[int], working_minutes: List[MinutesPeriod]) -> List[int]:
+        """Returns positions of not taken orders from regions which intersect working hours."""
+        working_index = IntervalIndex(working_minutes)
+        result, seen = [], set()
+        delivery_minutes = self.batch.delivery_minutes
+        for bucket in self._buckets.find(regions, working_minutes):
+            for position in bucket:
+                if position in seen or position in self._taken:
+                    continue
+                seen.add(position)
+                if working_index.intersects_any(delivery_minutes[position]):
+                    result.append(position)
+        return result
+
+    def take(self, positions: Iterable[int]) -> None:
+        self._taken.update(positions)
+
+
+def distribute_positions(
+    regions_column: List[int],
+    weights: List[float],
+    delivery_minutes: List[List[MinutesPeriod]],
+    couriers: List[CourierValues],
+) -> List[List[int]]:
+    """
+    Positions of orders taken by every courier, couriers take orders in turn
+    from not taken ones. It gets columns and values of couriers only, so it's
+    run by matching executor.
+    """
+    index = CandidateOrdersIndex(OrderBatch(list(range(len(weights))), regions_column, weights, delivery_minutes))
+    result = []
+    for regions, working_minutes, load_selector, power in couriers:
+        positions = index.find(regions, working_minutes)
+        selected = load_selector.select_positions([weights[position] for position in positions], power)
+        positions = [positions[i] for i in selected]
+        index.take(positions)
+        result.append(positions)
+    return result
+
+
+class BatchOrderAssigner:
+    """
+    Assigns orders to many couriers at once.
+
+    Candidates are selected once for all couriers and indexed by region and
+    hour, then they are distributed among couriers in a single pass and all
+    assignments are written by one insert. Distribution of big batches is
+    run by matching executor, like filter of single courier.
+    """
+
+    def __init__(self, couriers: List[Courier]):
+        self.couriers = couriers
+
+    async def assign(self) -> Dict[int, CourierOrders]:
+        """Same logic as in OrderAssignMediator.assign for every courier."""
+        async with database.transaction():
+            await CouriersManager.lock([courier.id for courier in self.couriers])
+            return await self._assign()
+
+    async def _assign(self) -> Dict[int, CourierOrders]:
+        result = await self._select_not_completed()
+        free_couriers = [courier for courier in self.couriers if courier.id not in result]
+        if not free_couriers:
+            return result
+
+        candidates = await self._select_candidates(free_couriers)
+        couriers_values = [
+            (
+                courier.regions_set,
+                courier.working_minutes,
+                get_load_selector(courier.type),
+                COURIER_POWER.get(courier.type),
+            )
+            for courier in free_couriers
+        ]
+        couriers_positions = await matching_executor.run(
+            len(candidates),
+            distribute_positions,
+            candidates.regions,
+            candidates.weights,
+            candidates.delivery_minutes,
+            couriers_values,
+        )
+        assign_time = datetime.now()
+        values = []
+        for courier, positions in zip(free_couriers, couriers_positions):
+            orders_ids = [candidates.ids[position] for position in positions]
+            result[courier.id] = orders_ids, assign_time if orders_ids else None
+            coefficient = COURIER_COEFFICIENT.get(courier.type)
+            values.extend(
+                {
+                    'order_id': order_id, 'courier_id': courier.id,
+                    'assign_time': assign_time, 'coefficient': coefficient,
+                }
+                for order_id in orders_ids
+            )
+
+        if values:
+            orders_ids = [value['order_id'] for value in values]
+            query = not_assigned_orders_query(orders_ids)  # Orders are locked till commit
+            assigned_ids = {record['id'] for record in await database.fetch_all(query)}
+            open_orders_index.remove(orders_ids)
+            if assigned_ids:
+                await database.execute(couriers_orders_table.insert().values([
+                    value for value in values if value['order_id'] in assigned_ids
+                ]))
+            if len(assigned_ids) != len(values):  # Some orders were assigned by concurrent requests
+                for courier in free_couriers:
+                    orders_ids = [order_id for order_id in result[courier.id][0] if order_id in assigned_ids]
+                    result[courier.id] = orders_ids, assign_time if orders_ids else None
+        return result
+
+    async def _select_not_completed(self) -> Dict[int, CourierOrders]:
+        query = select([
+            couriers_orders_table.c.courier_id,
+            couriers_orders_table.c.order_id,
+            couriers_orders_table.c.assign_time,
+        ]).where(and_(
+            couriers_orders_table.c.courier_id.in_([courier.id for courier in self.couriers]),
+            couriers_orders_table.c.complete_time.is_(None),
+        )).order_by(couriers_orders_table.c.assign_time)
+
+        result = {}
+        for record in await database.fetch_all(query):
+            orders_ids, _ = result.setdefault(record['courier_id'], ([], record['assign_time']))
+            orders_ids.append(record['order_id'])
+        return result
+
+    @staticmethod
+    async def _select_candidates(couriers: List[Courier]) -> OrderBatch:
+        regions, working_minutes = set(), []
+        for courier in couriers:
+            regions.update(courier.regions_set)
+            working_minutes.extend(courier.working_minutes)
+        return await OrderSelector.select_not_assigned_orders(
+            regions,
+            max(COURIER_POWER.get(courier.type) for courier in couriers),
+            IntervalIndex(working_minutes).intervals,  # Merged, so query is not too big
+        )
@@ -0,0 +1,36 @@
+from typing import FrozenSet, List, Optional
+
+from app.api.load_selector import LoadSelector, get_load_selector
+from app.api.models import Courier
+from app.db.managers import CouriersManager
+from app.db.schema import CourierTypeEnum
+from app.utils.constants import COURIER_COEFFICIENT, COURIER_POWER
+from app.utils.intervals import IntervalIndex
+from app.utils.periods import MinutesPeriod
+
+
+class CourierContext:
+    """
+    Courier of request with values which assign logic needs, they are computed
+    once and shared by selector, filter and assigner.
+    """
+    __slots__ = (
+        'courier', 'id', 'type', 'regions', 'working_minutes', 'working_index', 'capacity', 'coefficient',
+        'load_selector',
+    )
+
+    def __init__(self, courier: Courier):
+        self.courier = courier
+        self.id: int = courier.id
+        self.type: CourierTypeEnum = courier.type
+        self.regions: FrozenSet[int] = courier.regions_set
+        self.working_minutes: List[MinutesPeriod] = courier.working_minutes
+        self.working_index = IntervalIndex(self.working_minutes)
+        self.capacity: float = COURIER_POWER.get(courier.type)  # Kilograms
+        self.coefficient: int = COURIER_COEFFICIENT.get(courier.type)
+        self.load_selector: LoadSelector = get_load_selector(courier.type)
+
+    @classmethod
+    async def load(cls, courier_id: int) -> Optional['CourierContext']:
+        courier = await CouriersManager.get([courier_id], many=False)
+        return cls(courier) if courier else None
@@ -1,50 +1,46 @@
-from typing import List, Optional
+from decimal import Decimal
+from typing import Optional
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import cast, func, Numeric, select
 
+from app.api.metrics import instrument_stage
 from app.api.models import Courier
 from app.db import database
-from app.db.schema import couriers_orders_table, orders_table
+from app.db.schema import courier_stats_table
 
 
 class CourierStatistic:
+    """Statistic is computed by courier_stats, so it's O(regions) for any amount of orders."""
+
     def __init__(self, courier: Courier):
         self.courier = courier
 
+    @instrument_stage('statistic_rating')
     async def get_rating(self) -> Optional[float]:
         min_avg_duration = await self._find_min_avg_duration()
         return self._compute_rating(min_avg_duration) if min_avg_duration else None
 
+    @instrument_stage('statistic_earnings')
     async def get_earnings(self) -> int:
-        columns = (couriers_orders_table.c.coefficient,)
-        query = self._get_query(columns)
-        select_result = await database.fetch_all(query)
-        coeffs = [row.get('coefficient') for row in select_result]
-        return self._compute_earnings(coeffs)
+        query = select([
+            func.coalesce(func.sum(courier_stats_table.c.coefficient_sum), 0),
+        ]).where(courier_stats_table.c.courier_id == self.courier.id)
+        return self._compute_earnings(await database.fetch_val(query))
 
-    async def _find_min_avg_duration(self) -> Optional[float]:
+    async def _find_min_avg_duration(self) -> Optional[Decimal]:
         """Find min average time group by regions."""
-        column_name = 'average_time'
-        columns = (func.avg(couriers_orders_table.c.duration).label(column_name),)
-        query = self._get_query(columns).group_by(
-            orders_table.c.region,
-        ).order_by(column_name).limit(1)
-        select_result = await database.fetch_one(query)
-        return select_result.get(column_name) if select_result else None
+        query = select([
+            func.min(
+                cast(courier_stats_table.c.duration_sum, Numeric) / courier_stats_table.c.completed_count,
+            ),
+        ]).where(courier_stats_table.c.courier_id == self.courier.id)
+        return await database.fetch_val(query)
 
     @staticmethod
     def _compute_rating(t: float) -> float:
         rating = (1 - min(t, 60*60)/(60*60)) * 5
-        return round(rating, 2)
+        return float(round(rating, 2))  # Rounding of Decimal and then the same float as in response
 
     @staticmethod
-    def _compute_earnings(coeffs: List[int]) -> int:
-        return 500 * sum(coeffs)
-
-    def _get_query(self, columns):
-        return select(columns).select_from(
-            orders_table.join(couriers_orders_table),
-        ).where(and_(
-            couriers_orders_table.c.courier_id == self.courier.id,
-            couriers_orders_table.c.complete_time.isnot(None),
-        ))
+    def _compute_earnings(coefficients_sum: int) -> int:
+        return 500 * coefficients_sum
@@ -1,3 +1,6 @@
+from app.utils.constants import NOT_EXISTS_MSG
+
+
 class InvalidDataError(ValueError):
     pass
 
@@ -15,3 +18,13 @@ class OrderAlreadyCompleted(InvalidDataError):
 class InvalidCompleteTime(InvalidDataError):
     def __str__(self):
         return 'Invalid complete time.'
+
+
+class CourierNotExist(InvalidDataError):
+    def __str__(self):
+        return NOT_EXISTS_MSG.format(entity='Courier')
+
+
+class OrderNotExist(InvalidDataError):
+    def __str__(self):
+        return NOT_EXISTS_MSG.format(entity='Order')
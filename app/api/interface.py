@@ -1,36 +1,36 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import AbstractSet, AsyncIterator, List, Mapping, Optional, Tuple, Union
 
-from app.api.models import Courier, Order, OrderAssignTime
-from app.db.managers import CouriersManager
+from app.api.courier_context import CourierContext
+from app.api.models import Order, OrderAssignTime
+from app.api.order_batch import OrderBatch, OrderRow
 
 
 class Interface(ABC):
-    def __init__(self, courier_id: int, courier: Optional[Courier] = None):
-        self.courier_id = courier_id
-        self._db_courier = courier
+    def __init__(self, context: CourierContext):
+        self.context = context
 
-    async def get_courier(self):
-        if not self._db_courier:
-            self._db_courier = await CouriersManager.get([self.courier_id], many=False)
-        return self._db_courier
+    @property
+    def courier_id(self) -> int:
+        return self.context.id
 
 
 class IOrderAssigner(Interface):
 
     @abstractmethod
-    def assign(self, orders: List[Order]) -> datetime:
+    def assign(
+        self, orders: OrderBatch, assign_time: Optional[datetime] = None,
+    ) -> Tuple[OrderBatch, datetime]:
         pass
 
     @abstractmethod
     def unassign(self, orders: List[Order]) -> None:
         pass
 
+    @classmethod
     @abstractmethod
-    def complete(
-        self, order: Union[int, Order], complete_time: datetime, duration: float,
-    ) -> None:
+    def complete(cls, courier_id: int, order: Union[int, Order], complete_time: datetime) -> Mapping:
         pass
 
 
@@ -46,24 +46,42 @@ class IOrderSelector(Interface):
         pass
 
     @abstractmethod
-    def select_suited_orders(self) -> List[Order]:
+    def select_suited_orders(self) -> OrderBatch:
+        pass
+
+    @abstractmethod
+    def iterate_suited_orders(self, load: float = 0) -> AsyncIterator[OrderRow]:
         pass
 
 
 class IOrderFilter(Interface):
+    """
+    Filters of batches are pure functions of courier context and orders, so
+    they are not coroutines. Streamed rows are filtered by async generators.
+    """
+
+    @abstractmethod
+    def filter_by_courier_features(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
+        pass
+
+    @abstractmethod
+    def filter_by_region(self, orders: OrderBatch) -> OrderBatch:
+        pass
 
     @abstractmethod
-    def filter_by_courier_features(self, orders: List[Order]) -> List[Order]:
+    def filter_by_time(self, orders: OrderBatch) -> OrderBatch:
         pass
 
     @abstractmethod
-    def filter_by_region(self, orders: List[Order]) -> List[Order]:
+    def filter_by_weight(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
         pass
 
     @abstractmethod
-    def filter_by_time(self, orders: List[Order]) -> List[Order]:
+    def filter_in_pool(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
         pass
 
     @abstractmethod
-    def filter_by_weight(self, orders: List[Order]) -> List[Order]:
+    def stream_by_courier_features(
+        self, rows: AsyncIterator[OrderRow], load: float = 0, skipped_ids: AbstractSet[int] = frozenset(),
+    ) -> OrderBatch:
         pass
@@ -0,0 +1,154 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from os import environ
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, Type
+
+from app.db.schema import CourierTypeEnum
+from app.utils.constants import (
+    COURIER_LOAD_STRATEGY, LOAD_SELECTION_TIME_LIMIT, WEIGHT_PRECISION,
+)
+
+Item = Tuple[int, int]  # Weight units and position of order
+
+
+def to_weight_units(weight: float) -> int:
+    """Weight in hundredths of kilogram, it's precision of order weight."""
+    return round(weight * WEIGHT_PRECISION)
+
+
+class LoadSelector(ABC):
+    """
+    Strategy of choosing orders which courier takes.
+
+    Courier must have max amount of orders, so all strategies return the same
+    amount of orders, but they may load courier better (more total weight).
+    """
+
+    def __init__(self, time_limit: Optional[float] = None):
+        if time_limit is None:
+            time_limit = float(environ.get('LOAD_SELECTION_TIME_LIMIT', LOAD_SELECTION_TIME_LIMIT))
+        self.time_limit = time_limit  # Seconds, after it the best found selection is returned
+
+    def select_positions(self, weights: List[float], courier_power: float) -> List[int]:
+        """Positions of selected orders by column of their weights."""
+        capacity = to_weight_units(courier_power)
+        items = sorted(
+            ((to_weight_units(weight), position) for position, weight in enumerate(weights)),
+            key=lambda item: item[0],
+        )
+        items = [item for item in items if item[0] <= capacity]
+        return [position for _, position in self._select(items, capacity)]
+
+    @abstractmethod
+    def _select(self, items: List[Item], capacity: int) -> List[Item]:
+        """Select from (weight units, position) items sorted by weight."""
+        pass
+
+    @staticmethod
+    def _greedy(items: List[Item], capacity: int) -> List[Item]:
+        """The lightest orders give max amount of orders."""
+        result = []
+        for weight, position in items:
+            capacity -= weight
+            if capacity < 0:
+                break
+            result.append((weight, position))
+        return result
+
+
+class GreedyLoadSelector(LoadSelector):
+    """Takes the lightest orders. It's O(n log n), so time limit is not needed."""
+
+    def _select(self, items: List[Item], capacity: int) -> List[Item]:
+        return self._greedy(items, capacity)
+
+
+class ExactLoadSelector(LoadSelector):
+    """
+    Knapsack dynamic programming over weight units.
+
+    Value of an order is (1 order, its weight), so max amount of orders is
+    preferred and then max total weight. Complexity is O(n * capacity), if time
+    limit is exceeded, the better of greedy and partial solution is returned.
+    """
+
+    def _select(self, items: List[Item], capacity: int) -> List[Item]:
+        greedy = self._greedy(items, capacity)
+        if len(greedy) in (0, len(items)):
+            return greedy
+        # Optimal selection has the same amount of orders as greedy one,
+        # so too heavy orders for it can be skipped.
+        amount = len(greedy)
+        max_weight = capacity - sum(weight for weight, _ in greedy[:amount - 1])
+        items = items[:bisect_right([weight for weight, _ in items], max_weight)]
+
+        deadline = perf_counter() + self.time_limit
+        order_value = capacity + 1  # Any amount of orders costs more than any weight
+        best = [0] * (capacity + 1)  # best[c] - max value with total weight <= c
+        taken = []  # taken[i] - bitmask of capacities where i-th item is taken
+        for weight, _ in items:
+            if perf_counter() > deadline:
+                break
+            value = order_value + weight
+            mask = 0
+            for c in range(capacity, weight - 1, -1):
+                candidate = best[c - weight] + value
+                if candidate > best[c]:
+                    best[c] = candidate
+                    mask |= 1 << c
+            taken.append(mask)
+
+        result, c = [], capacity
+        for i in range(len(taken) - 1, -1, -1):
+            if taken[i] >> c & 1:
+                result.append(items[i])
+                c -= items[i][0]
+        result.reverse()
+        return max(greedy, result, key=lambda selection: (len(selection), sum(w for w, _ in selection)))
+
+
+class ApproximateLoadSelector(LoadSelector):
+    """
+    Greedy selection improved by swaps while time limit is not exceeded.
+
+    The lightest taken orders are replaced by the heaviest not taken orders
+    which still fit, it's O(n log n).
+    """
+
+    def _select(self, items: List[Item], capacity: int) -> List[Item]:
+        result = self._greedy(items, capacity)
+        rest = items[len(result):]  # Sorted by weight
+        rest_weights = [weight for weight, _ in rest]
+        free = capacity - sum(weight for weight, _ in result)
+
+        deadline = perf_counter() + self.time_limit
+        for i, (weight, _) in enumerate(result):
+            if not rest or perf_counter() > deadline:
+                break
+            j = bisect_right(rest_weights, weight + free) - 1  # The heaviest order which fits instead
+            if j < 0 or rest_weights[j] <= weight:
+                continue
+            free -= rest_weights[j] - weight
+            result[i] = rest[j]
+            del rest[j], rest_weights[j]
+        return result
+
+
+LOAD_SELECTORS: Dict[str, Type[LoadSelector]] = {
+    'greedy': GreedyLoadSelector,
+    'exact': ExactLoadSelector,
+    'approximate': ApproximateLoadSelector,
+}
+
+
+def get_load_selector(courier_type: CourierTypeEnum) -> LoadSelector:
+    """Strategy for courier type, it may be set by LOAD_STRATEGY_<TYPE> variable."""
+    strategy = environ.get(
+        f'LOAD_STRATEGY_{courier_type.name.upper()}',
+        COURIER_LOAD_STRATEGY.get(courier_type),
+    )
+    try:
+        return LOAD_SELECTORS[strategy]()
+    except KeyError:
+        raise ValueError(f'Unknown load strategy {strategy}')
@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from os import environ
+from typing import Any, Callable, Optional
+
+from app.api.metrics import MATCHING_POOL_JOBS
+from app.utils.constants import MATCHING_EXECUTOR, MATCHING_INLINE_MAX_ORDERS, MATCHING_WORKERS
+
+
+class MatchingExecutor:
+    """
+    Pool for CPU-heavy matching of orders (filters and load selection).
+
+    Matching of a big batch in event loop would delay all requests of worker,
+    so such jobs are run by pool and requests are served meanwhile. Jobs get
+    columns of orders and values of courier, not models, so they are
+    serialized fast. Small jobs are run inline, transfer to pool costs more.
+    Threads share GIL with event loop, so processes are used by default.
+    Every uvicorn worker starts own pool, with default amount of workers it's
+    a process per CPU in each of them, so MATCHING_WORKERS should be set to
+    amount of CPUs / uvicorn workers when there are several of them.
+    """
+
+    def __init__(
+        self,
+        kind: Optional[str] = None,
+        workers: Optional[int] = None,
+        inline_max_orders: Optional[int] = None,
+    ):
+        if kind is None:
+            kind = environ.get('MATCHING_EXECUTOR', MATCHING_EXECUTOR)
+        if workers is None:
+            workers = int(environ.get('MATCHING_WORKERS', MATCHING_WORKERS))
+        if inline_max_orders is None:
+            inline_max_orders = int(environ.get('MATCHING_INLINE_MAX_ORDERS', MATCHING_INLINE_MAX_ORDERS))
+        self.kind = kind
+        self.workers = workers or None  # Executors use amount of CPUs by default
+        self.inline_max_orders = inline_max_orders
+        self._executor: Optional[Executor] = None
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Workers are started by the first big job."""
+        if self.kind == 'process':
+            # Workers are spawned, so they don't inherit connections and event loop of application
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        elif self.kind == 'thread':
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='matching')
+        elif self.kind != 'inline':
+            raise ValueError(f'Unknown matching executor {self.kind}')
+
+    async def stop(self) -> None:
+        """Running jobs are finished, event loop isn't blocked meanwhile."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    def offloads(self, orders_amount: int) -> bool:
+        return self._executor is not None and orders_amount > self.inline_max_orders
+
+    async def run(self, orders_amount: int, function: Callable, *args) -> Any:
+        """Result of function(*args), function and arguments must be picklable for process pool."""
+        if not self.offloads(orders_amount):
+            return function(*args)
+        MATCHING_POOL_JOBS.inc()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+
+matching_executor = MatchingExecutor()
@@ -1,109 +1,119 @@
 from datetime import datetime
-from typing import List, Optional, Tuple
-
-from sqlalchemy import and_
+from typing import List, Optional, Set, Tuple
 
 from app.api.exceptions import (
-    InvalidCompleteTime, OrderAlreadyCompleted, OrderForCourierNotExist,
+    CourierNotExist, InvalidCompleteTime, OrderAlreadyCompleted,
+    OrderForCourierNotExist, OrderNotExist,
 )
 from app.api.interface import Interface
-from app.api.models import Courier, Order
+from app.api.load_selector import GreedyLoadSelector
 from app.api.order_assigner import OrderAssigner
+from app.api.order_batch import OrderBatch
 from app.api.order_filter import OrderFilter
 from app.api.order_selector import OrderSelector
 from app.db import database
-from app.db.managers import get_objects_ids
-from app.db.schema import couriers_orders_table
-from app.utils.constants import RFC_TIME_FORMAT
+from app.db.managers import CouriersManager, get_objects_ids
+from app.utils.constants import ASSIGN_ATTEMPTS, RFC_TIME_FORMAT
 
 
 class OrderAssignMediator(Interface):
-    """Class which unions work of order assigner, selector and filter."""
+    """Class which unions work of order assigner, selector and filter for courier context of request."""
 
-    async def assign(self) -> Tuple[List[Order], Optional[str]]:
+    async def assign(self) -> Tuple[List[int], Optional[str]]:
         """
         Assign logic:
         1. Get not completed orders.
         2. If (1) exist then return they.
         3. If (1) not exist then try find suited orders.
         4. If (3) not exist return empty (orders=[], assign_time=null).
+        Ids of orders are returned, so models are built for response only.
         """
-        db_courier = await self.get_courier()
-        order_selector = OrderSelector(courier_id=self.courier_id, courier=db_courier)
-
-        orders = await order_selector.select(completed=False, with_assign_time=True)  # Get not completed orders
-        assign_time = None
-        if orders:
-            assign_time = orders[0].assign_time  # Last assign time
+        order_selector = OrderSelector(self.context)
 
-        else:  # If not completed orders does not exist then we must found suited orders
-            orders = await order_selector.select_suited_orders()  # Orders which is not belong to other couriers
+        async with database.transaction():
+            await CouriersManager.lock([self.courier_id])
+            orders = await order_selector.select(completed=False, with_assign_time=True)  # Get not completed orders
+            assign_time = None
             if orders:
-                order_filter = OrderFilter(courier_id=self.courier_id, courier=db_courier)
-                orders = await order_filter.filter_by_courier_features(orders)
-                if orders:  # If we don't find suited return orders=[], assign_time=null
-                    order_assigner = OrderAssigner(courier_id=self.courier_id, courier=db_courier)
-                    assign_time = await order_assigner.assign(orders)
+                orders_ids = get_objects_ids(orders)
+                assign_time = orders[0].assign_time  # Last assign time
+
+            else:  # If not completed orders does not exist then we must found suited orders
+                orders_ids, assign_time = await self._assign_suited_orders(order_selector)
 
         assign_time = assign_time.strftime(RFC_TIME_FORMAT) if assign_time else None
-        return orders, assign_time
+        return orders_ids, assign_time
+
+    async def _assign_suited_orders(self, order_selector: OrderSelector) -> Tuple[List[int], Optional[datetime]]:
+        """
+        Suited orders may be assigned by concurrent requests. Then assigned
+        orders are kept and the rest of courier power is filled at next attempts.
+        """
+        order_filter = OrderFilter(self.context)
+        order_assigner = OrderAssigner(self.context)
+        assigned_ids, assign_time, load = [], None, 0
+        busy_ids = set()  # Orders which are being assigned by concurrent requests
+        for _ in range(ASSIGN_ATTEMPTS):
+            orders = await self._select_orders(order_selector, order_filter, load, busy_ids)
+            if not orders:  # If we don't find suited return orders=[], assign_time=null
+                break
+            new_orders, assign_time = await order_assigner.assign(orders, assign_time)
+            assigned_ids.extend(new_orders.ids)
+            load += sum(new_orders.weights)
+            if len(new_orders) == len(orders):
+                break
+            busy_ids.update(set(orders.ids) - set(new_orders.ids))
+        return assigned_ids, assign_time if assigned_ids else None
+
+    async def _select_orders(
+        self, order_selector: OrderSelector, order_filter: OrderFilter, load: float, busy_ids: Set[int],
+    ) -> OrderBatch:
+        """
+        Orders which courier with load takes. Greedy selection streams orders
+        the lightest first (from index of open orders or by database cursor),
+        so it stops at the first order which doesn't fit and suited orders are
+        not collected. Other strategies need all suited orders.
+        """
+        if isinstance(self.context.load_selector, GreedyLoadSelector):
+            return await order_filter.stream_by_courier_features(
+                order_selector.iterate_suited_orders(load), load, busy_ids,
+            )
+
+        orders = await order_selector.select_suited_orders()  # Orders which is not belong to other couriers
+        if busy_ids:
+            orders = orders.without_ids(busy_ids)
+        if orders:
+            orders = await order_filter.filter_in_pool(orders, load)
+        return orders
 
     async def unassign(self) -> None:
         """Unassign orders if they exist."""
-        db_courier = await self.get_courier()
-
-        order_assigner = OrderAssigner(courier_id=self.courier_id, courier=db_courier)
-        order_selector = OrderSelector(courier_id=self.courier_id, courier=db_courier)
-        order_filter = OrderFilter(courier_id=self.courier_id, courier=db_courier)
+        order_assigner = OrderAssigner(self.context)
+        order_selector = OrderSelector(self.context)
+        order_filter = OrderFilter(self.context)
 
         current_orders = await order_selector.select(completed=False)
-        suited_orders = await order_filter.filter_by_courier_features(current_orders)
+        suited_orders = order_filter.filter_by_courier_features(OrderBatch.from_orders(current_orders))
 
         if len(current_orders) != len(suited_orders):
-            orders_ids_to_unassign = set(get_objects_ids(current_orders)) - set(get_objects_ids(suited_orders))
+            orders_ids_to_unassign = set(get_objects_ids(current_orders)) - set(suited_orders.ids)
             orders_to_unassign = [order for order in current_orders if order.id in orders_ids_to_unassign]
             await order_assigner.unassign(orders_to_unassign)
 
-    async def complete(self, order_id: int, complete_time: str):
-        """Mark order completed with computing duration."""
-        entry = await database.fetch_one(
-            couriers_orders_table.select().where(and_(
-                couriers_orders_table.c.order_id == order_id,
-                couriers_orders_table.c.courier_id == self.courier_id,
-            )),
-        )
-        if not entry:
+    @staticmethod
+    async def complete(courier_id: int, order_id: int, complete_time: str):
+        """Mark order completed with computing duration, it's done by one round trip without courier context."""
+        complete_time = datetime.strptime(complete_time, RFC_TIME_FORMAT)
+        result = await OrderAssigner.complete(courier_id, order_id, complete_time)
+        if not result['courier_exists']:
+            raise CourierNotExist
+        elif not result['order_exists']:
+            raise OrderNotExist
+        elif result['archived']:  # Order of courier is moved to archive
+            raise OrderAlreadyCompleted
+        elif not result['assigned']:
             raise OrderForCourierNotExist
-        elif entry.get('complete_time') is not None:
+        elif result['already_completed']:
             raise OrderAlreadyCompleted
-
-        db_courier = await self.get_courier()
-        order_assigner = OrderAssigner(courier_id=self.courier_id, courier=db_courier)
-        complete_time = datetime.strptime(complete_time, RFC_TIME_FORMAT)
-        assign_time = entry.get('assign_time')  # Assign time of this order
-        # Get date of last completed order from current delivery
-        last_order_complete_time = await self._get_last_order_date(assign_time)
-        # assign time will be None if courier doesn't have completed orders.
-        if not last_order_complete_time:
-            last_order_complete_time = assign_time
-        duration = self._find_duration(last_order_complete_time, complete_time)
-
-        await order_assigner.complete(order_id, complete_time, duration)
-
-    @staticmethod
-    def _find_duration(start_date, end_date) -> float:
-        diff = (end_date - start_date).total_seconds()
-        if diff < 0:
+        elif not result['completed']:  # Complete time is before assign time or previous completion
             raise InvalidCompleteTime
-        return diff
-
-    async def _get_last_order_date(self, assign_time: datetime) -> Optional[datetime]:
-        """Returns date of last completed order from current delivery."""
-        db_courier = await self.get_courier()
-        order_selector = OrderSelector(courier_id=self.courier_id, courier=db_courier)
-        orders = await order_selector.select(
-            completed=True,
-            assign_time=assign_time,
-            with_assign_time=True,
-        )  # Get sorted completed orders from current delivery
-        return orders[-1].complete_time if orders else None
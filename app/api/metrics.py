@@ -0,0 +1,138 @@
+import asyncio
+from functools import wraps
+from os import environ
+from time import perf_counter
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.api.open_orders import open_orders_index
+from app.api.order_batch import OrderBatch
+from app.db.managers import CouriersManager
+from app.db.pool import count_queries, pool_metrics
+from app.utils.constants import METRICS_ENABLED
+from app.utils.metrics import AMOUNT_BUCKETS, Counter, Gauge, Histogram, Registry
+
+metrics_enabled = bool(int(environ.get('METRICS_ENABLED', METRICS_ENABLED)))
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    'http_request_duration_seconds', 'Latency of requests.', ['endpoint', 'method', 'status'],
+))
+REQUEST_QUERIES = registry.register(Histogram(
+    'http_request_db_queries', 'Round trips to database by request.', ['endpoint'], AMOUNT_BUCKETS,
+))
+STAGE_DURATION = registry.register(Histogram(
+    'stage_duration_seconds', 'Latency of assign pipeline and statistic stages.', ['stage'],
+))
+STAGE_ORDERS = registry.register(Histogram(
+    'stage_orders', 'Amounts of orders which stage gets (in) and returns (out).', ['stage', 'direction'],
+    AMOUNT_BUCKETS,
+))
+STAGE_ERRORS = registry.register(Counter(
+    'stage_errors_total', 'Stages finished by exception.', ['stage'],
+))
+MATCHING_POOL_JOBS = registry.register(Counter(
+    'matching_pool_jobs_total', 'Matching jobs which are run by pool, not in event loop.',
+))
+
+for name, documentation, collect, type_ in (
+    ('db_pool_max_size', 'Max size of connections pool.', lambda: pool_metrics.max_size, 'gauge'),
+    ('db_pool_in_use', 'Acquired connections of pool.', lambda: pool_metrics.in_use, 'gauge'),
+    ('db_pool_utilization', 'Part of pool connections in use.', lambda: pool_metrics.stats()['utilization'], 'gauge'),
+    ('db_pool_waiting', 'Coroutines waiting for connection.', lambda: pool_metrics.waiting, 'gauge'),
+    ('db_pool_acquired_total', 'Acquired connections.', lambda: pool_metrics.acquired, 'counter'),
+    ('db_pool_wait_seconds_total', 'Time of waiting for connections.', lambda: pool_metrics.wait_time_sum, 'counter'),
+    ('db_pool_wait_seconds_max', 'The longest wait for connection.', lambda: pool_metrics.wait_time_max, 'gauge'),
+    ('couriers_cache_hits_total', 'Couriers found in cache.', lambda: CouriersManager.cache.hits, 'counter'),
+    ('couriers_cache_misses_total', 'Couriers read from database.', lambda: CouriersManager.cache.misses, 'counter'),
+    ('open_orders_indexed', 'Orders in index of open orders.', lambda: len(open_orders_index), 'gauge'),
+):
+    registry.register(Gauge(name, documentation, collect, type_))
+
+
+def orders_amount(value: Any) -> Optional[int]:
+    """Amount of orders in list or batch of them or in tuple, which starts with it (result of assign)."""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (list, OrderBatch)) else None
+
+
+def observe_stage(stage: str, start: float, args: tuple, result: Any) -> None:
+    STAGE_DURATION.observe(perf_counter() - start, stage=stage)
+    for direction, value in (('in', args[1] if len(args) > 1 else None), ('out', result)):
+        amount = orders_amount(value)
+        if amount is not None:
+            STAGE_ORDERS.observe(amount, stage=stage, direction=direction)
+
+
+def instrument_stage(stage: str):
+    """
+    Latency of method and amounts of orders which it gets by the first argument
+    and returns. Method is not changed, if metrics are disabled.
+    """
+    def decorator(method):
+        if not metrics_enabled:
+            return method
+
+        if asyncio.iscoroutinefunction(method):
+            @wraps(method)
+            async def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    result = await method(*args, **kwargs)
+                except Exception:
+                    STAGE_ERRORS.inc(stage=stage)
+                    raise
+                observe_stage(stage, start, args, result)
+                return result
+        else:
+            @wraps(method)
+            def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    result = method(*args, **kwargs)
+                except Exception:
+                    STAGE_ERRORS.inc(stage=stage)
+                    raise
+                observe_stage(stage, start, args, result)
+                return result
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """Latency and round trips to database of requests by endpoints."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start = perf_counter()
+        with count_queries() as queries:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                endpoint = getattr(scope.get('endpoint'), '__name__', 'unknown')  # Set by router
+                REQUEST_DURATION.observe(
+                    perf_counter() - start, endpoint=endpoint, method=scope['method'], status=status_code,
+                )
+                REQUEST_QUERIES.observe(queries[0], endpoint=endpoint)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
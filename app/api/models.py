@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 
-from pydantic import BaseModel, Extra, Field, validator
+from pydantic import BaseModel, Extra, Field, PrivateAttr, validator
 
 from app.db.schema import CourierTypeEnum
 from app.utils.constants import MAX_WEIGHT, MIN_WEIGHT, RFC_TIME_FORMAT
+from app.utils.batch_validators import validate_couriers_batch, validate_orders_batch
+from app.utils.periods import MinutesPeriod, periods_to_minutes
 from app.utils.validators import validate_hours_periods, validate_regions
 
 
@@ -20,6 +22,9 @@ class Courier(Base):
     regions: List[int]
     working_hours: List[str]
 
+    _working_minutes: Optional[List[MinutesPeriod]] = PrivateAttr(None)
+    _regions_set: Optional[FrozenSet[int]] = PrivateAttr(None)
+
     @validator('working_hours')
     def check_working_hours(cls, periods: List[str]):
         validate_hours_periods(periods)
@@ -30,10 +35,38 @@ class Courier(Base):
         validate_regions(regions)
         return regions
 
+    @property
+    def working_minutes(self) -> List[MinutesPeriod]:
+        """Working hours as (start, end) minutes, they are parsed once."""
+        if self._working_minutes is None:
+            self._working_minutes = periods_to_minutes(self.working_hours)
+        return self._working_minutes
+
+    @property
+    def regions_set(self) -> FrozenSet[int]:
+        """Regions for membership checks, the set is built once."""
+        if self._regions_set is None:
+            self._regions_set = frozenset(self.regions)
+        return self._regions_set
+
 
 class CouriersPostRequest(Base):
     data: List[Courier]
 
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate_fast
+
+    @classmethod
+    def validate_fast(cls, value):
+        """Surely valid batch is not validated by models, they are only constructed."""
+        couriers = None
+        if type(value) is dict and value.keys() == {'data'}:
+            couriers = validate_couriers_batch(value['data'])
+        if couriers is None:
+            return cls.validate(value)
+        return cls.construct(data=[Courier.construct(**values) for values in couriers])
+
 
 class CourierId(Base):
     id: int
@@ -65,6 +98,8 @@ class Order(Base):
     region: int
     delivery_hours: List[str]
 
+    _delivery_minutes: Optional[List[MinutesPeriod]] = PrivateAttr(None)
+
     @validator('weight')
     def check_positive_weight(cls, weight):
         if not MIN_WEIGHT <= weight <= MAX_WEIGHT:
@@ -82,10 +117,31 @@ class Order(Base):
         validate_hours_periods(periods)
         return periods
 
+    @property
+    def delivery_minutes(self) -> List[MinutesPeriod]:
+        """Delivery hours as (start, end) minutes, they are parsed once."""
+        if self._delivery_minutes is None:
+            self._delivery_minutes = periods_to_minutes(self.delivery_hours)
+        return self._delivery_minutes
+
 
 class OrdersPostRequest(Base):
     data: List[Order]
 
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate_fast
+
+    @classmethod
+    def validate_fast(cls, value):
+        """Surely valid batch is not validated by models, they are only constructed."""
+        orders = None
+        if type(value) is dict and value.keys() == {'data'}:
+            orders = validate_orders_batch(value['data'])
+        if orders is None:
+            return cls.validate(value)
+        return cls.construct(data=[Order.construct(**values) for values in orders])
+
 
 class OrderId(Base):
     id: int
@@ -95,6 +151,23 @@ class OrdersPostResponse(Base):
     orders: List[OrderId]
 
 
+class LineValidationError(Base):
+    line: int
+    errors: List[dict]
+
+
+class OrdersStreamChunk(Base):
+    first_line: int
+    last_line: int
+    orders: List[OrderId] = []  # Created orders
+    existing_orders: List[OrderId] = []  # Chunk is not created if some orders exist
+
+
+class OrdersStreamPostResponse(Base):
+    chunks: List[OrdersStreamChunk] = []
+    validation_error: List[LineValidationError] = []
+
+
 class OrdersAssignPostRequest(Base):
     courier_id: int
 
@@ -107,6 +180,18 @@ class OrdersAssignPostResponse(Base):
     assign_time: Optional[str] = None
 
 
+class OrdersAssignBatchPostRequest(Base):
+    couriers_ids: List[int]
+
+
+class CourierOrdersAssign(OrdersAssignPostResponse):
+    courier_id: int
+
+
+class OrdersAssignBatchPostResponse(Base):
+    couriers: List[CourierOrdersAssign]
+
+
 class OrderAssignTime(Base):
     id: int = Field(..., alias='order_id')
     assign_time: datetime
@@ -0,0 +1,208 @@
+import asyncio
+from bisect import bisect_right
+from heapq import merge
+from itertools import islice
+from math import inf
+from os import environ
+from time import monotonic
+from typing import AbstractSet, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import asyncpg
+
+from app.api.models import Order
+from app.api.order_batch import OrderBatch, OrderRow
+from app.db import database
+from app.utils.constants import (
+    OPEN_ORDERS_CHANNEL, OPEN_ORDERS_CHECK_DELAY, OPEN_ORDERS_INDEX, OPEN_ORDERS_RELOAD_INTERVAL,
+)
+from app.utils.buckets import RegionHourBuckets
+from app.utils.intervals import IntervalIndex
+from app.utils.periods import MinutesPeriod
+
+NOT_ASSIGNED_ORDERS_QUERY = (
+    'SELECT id, region, weight, delivery_starts, delivery_ends FROM orders WHERE NOT orders.assigned'
+)
+
+
+class OpenOrdersIndex:
+    """
+    In-process index of not assigned orders.
+
+    Orders are grouped by region and hour of delivery, every group is sorted
+    by weight, so candidates for courier are found without scan of orders.
+
+    Changes of other workers come by open_orders notifications of database
+    triggers, notified orders are marked dirty and their state is read before
+    the next search. Orders created, assigned or unassigned by this worker are
+    changed at once and their state is checked after delay, when transaction of
+    change is finished, so rolled back changes are fixed too. State is read by
+    the listener connection, so changes which are not committed are not seen.
+    All orders are reloaded after reload interval in case of lost notifications.
+
+    Index keeps all open orders in memory of every worker. If it's disabled,
+    candidates are read from database (by cursor for greedy couriers).
+    """
+
+    def __init__(
+        self,
+        reload_interval: Optional[float] = None,
+        check_delay: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        if enabled is None:
+            enabled = bool(int(environ.get('OPEN_ORDERS_INDEX', OPEN_ORDERS_INDEX)))
+        if reload_interval is None:
+            reload_interval = float(environ.get('OPEN_ORDERS_RELOAD_INTERVAL', OPEN_ORDERS_RELOAD_INTERVAL))
+        if check_delay is None:
+            check_delay = float(environ.get('OPEN_ORDERS_CHECK_DELAY', OPEN_ORDERS_CHECK_DELAY))
+        self.enabled = enabled
+        self.reload_interval = reload_interval  # Seconds
+        self.check_delay = check_delay  # Seconds
+        self._orders: Dict[int, OrderRow] = {}  # Models are not kept, rows have values for matching only
+        self._buckets: RegionHourBuckets[Tuple[float, int]] = RegionHourBuckets()  # Weight and id
+        self._dirty_ids: Set[int] = set()
+        self._changed_ids: Dict[int, float] = {}  # Orders changed by this worker and time of check
+        self._loaded_at: Optional[float] = None
+        self._listener: Optional[asyncpg.Connection] = None
+        self._lock: Optional[asyncio.Lock] = None  # The listener connection runs one query at once
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    @property
+    def ready(self) -> bool:
+        """Index is loaded and receives changes of other workers."""
+        return self._listener is not None and not self._listener.is_closed()
+
+    async def start(self) -> None:
+        """Notifications are listened before loading, so changes are not lost."""
+        if not self.enabled:
+            return
+        self._lock = asyncio.Lock()
+        self._listener = await asyncpg.connect(str(database.url))
+        await self._listener.add_listener(OPEN_ORDERS_CHANNEL, self._on_notification)
+        await self.load()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+        self._listener = None
+        self._clear()
+
+    async def load(self) -> None:
+        async with self._lock:
+            records = await self._listener.fetch(NOT_ASSIGNED_ORDERS_QUERY)
+        self._clear()
+        self._add(map(OrderRow.from_record, records))
+        self._loaded_at = monotonic()
+
+    async def find(
+        self, regions: AbstractSet[int], max_weight: float, working_minutes: List[MinutesPeriod],
+    ) -> OrderBatch:
+        """The same orders as OrderSelector.select_not_assigned_orders returns."""
+        await self._sync()
+        return OrderBatch.from_rows(sorted(self._rows(regions, max_weight, working_minutes)))  # Sorted by id
+
+    async def iterate(
+        self, regions: AbstractSet[int], max_weight: float, working_minutes: List[MinutesPeriod],
+    ) -> AsyncIterator[OrderRow]:
+        """
+        The same orders as find returns, but the lightest first (the same order
+        as OrderSelector.iterate_not_assigned_orders). Rows are merged from
+        buckets lazily, so orders after the last read one are not touched.
+        """
+        await self._sync()
+        for row in self._rows(regions, max_weight, working_minutes):
+            yield row
+
+    def _rows(
+        self, regions: AbstractSet[int], max_weight: float, working_minutes: List[MinutesPeriod],
+    ) -> Iterator[OrderRow]:
+        """
+        Rows sorted by weight and id. Buckets are not copied, so they must not
+        be changed till the end of iteration (changes are made by other
+        coroutines, iteration doesn't give control to event loop).
+        """
+        if not regions or not working_minutes:
+            return
+        working_index = IntervalIndex(working_minutes)
+        buckets = [
+            islice(bucket, bisect_right(bucket, (max_weight, inf)))
+            for bucket in self._buckets.find(regions, working_minutes)
+        ]
+
+        last_id = None
+        for _, order_id in merge(*buckets):
+            if order_id == last_id:  # Order of a few hours, its items are merged one after another
+                continue
+            last_id = order_id
+            row = self._orders[order_id]
+            if working_index.intersects_any(row.delivery_minutes):
+                yield row
+
+    def add(self, orders: Iterable[Order]) -> None:
+        """Orders are created or unassigned by this worker."""
+        if self.ready:
+            rows = [OrderRow.from_order(order) for order in orders]
+            self._add(rows)
+            self._check_later(row.id for row in rows)
+
+    def remove(self, orders_ids: Iterable[int]) -> None:
+        """Orders are assigned by this worker."""
+        if self.ready:
+            orders_ids = list(orders_ids)
+            self._remove(orders_ids)
+            self._check_later(orders_ids)
+
+    def _check_later(self, orders_ids: Iterable[int]) -> None:
+        check_time = monotonic() + self.check_delay
+        for order_id in orders_ids:
+            self._changed_ids[order_id] = check_time
+
+    async def _sync(self) -> None:
+        now = monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.reload_interval:
+            self._loaded_at = now  # Concurrent requests don't reload it again
+            await self.load()
+            return
+        checked_ids = [order_id for order_id, check_time in self._changed_ids.items() if check_time <= now]
+        for order_id in checked_ids:
+            del self._changed_ids[order_id]
+        self._dirty_ids.update(checked_ids)
+        if self._dirty_ids:
+            await self._refresh()
+
+    async def _refresh(self) -> None:
+        """Read state of dirty orders."""
+        orders_ids, self._dirty_ids = self._dirty_ids, set()
+        async with self._lock:
+            records = await self._listener.fetch(
+                f'{NOT_ASSIGNED_ORDERS_QUERY} AND orders.id = ANY($1::integer[])', list(orders_ids),
+            )
+        self._remove(orders_ids)
+        self._add(map(OrderRow.from_record, records))
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        self._dirty_ids.update(map(int, payload.split(',')))
+
+    def _add(self, rows: Iterable[OrderRow]) -> None:
+        for row in rows:
+            if row.id in self._orders:
+                self._remove([row.id])
+            self._orders[row.id] = row
+            self._buckets.add(row.region, row.delivery_minutes, (row.weight, row.id))
+
+    def _remove(self, orders_ids: Iterable[int]) -> None:
+        for order_id in orders_ids:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                continue
+            self._buckets.remove(order.region, order.delivery_minutes, (order.weight, order.id))
+
+    def _clear(self) -> None:
+        self._orders.clear()
+        self._buckets.clear()
+        self._loaded_at = None
+
+
+open_orders_index = OpenOrdersIndex()
@@ -1,31 +1,118 @@
 from datetime import datetime
-from typing import List, Union
+from typing import List, Mapping, Optional, Tuple, Union
 
-from sqlalchemy import and_
+from sqlalchemy import and_, literal, select, text
 
 from app.api.interface import IOrderAssigner
+from app.api.metrics import instrument_stage
 from app.api.models import Order
+from app.api.open_orders import open_orders_index
+from app.api.order_batch import OrderBatch
 from app.db import database
 from app.db.managers import get_objects_ids
-from app.db.schema import couriers_orders_table
-from app.utils.constants import COURIER_COEFFICIENT
+from app.db.schema import couriers_orders_table, orders_table
+
+
+def not_assigned_orders_query(orders_ids: List[int], *columns):
+    """
+    SELECT ... FOR UPDATE SKIP LOCKED of orders which are not assigned.
+
+    Orders locked by concurrent requests are skipped without waiting. Lock
+    rechecks orders assigned by committed requests (their assignments mark
+    them by trigger), so order is assigned once.
+    """
+    return select([orders_table.c.id, *columns]).where(and_(
+        orders_table.c.id.in_(orders_ids),
+        ~orders_table.c.assigned,
+    )).with_for_update(skip_locked=True)
+
+
+def claim_orders_query(orders_ids: List[int], courier_id: int, assign_time: datetime, coefficient: int):
+    """INSERT ... SELECT ... FOR UPDATE SKIP LOCKED RETURNING order_id."""
+    return couriers_orders_table.insert().from_select(
+        ['order_id', 'courier_id', 'assign_time', 'coefficient'],
+        not_assigned_orders_query(orders_ids, literal(courier_id), literal(assign_time), literal(coefficient)),
+    ).returning(couriers_orders_table.c.order_id)
+
+
+def complete_order_query(order_id: int, courier_id: int, complete_time: datetime):
+    """
+    Completes order and updates statistic of courier by one statement.
+
+    Duration is counted from completion of the previous order of the same
+    delivery or from assign time. Order is not updated if it's already
+    completed or complete time is before start of duration, the result row
+    says what check has failed.
+
+    Assign time of order isn't known before entry is found, so entry is
+    looked up in every partition by index on order_id, the rest of statement
+    is pruned by assign time. Entry which isn't found in any partition is
+    looked up in couriers_orders_archive, only completed orders are archived
+    (rows of partitions which are detached only are not looked up).
+    """
+    return text(
+        'WITH courier AS (SELECT id FROM couriers WHERE id = :courier_id), '
+        '"order" AS (SELECT id, region, assigned FROM orders WHERE id = :order_id), '
+        'entry AS ('
+        'SELECT courier_id, order_id, assign_time, complete_time, coefficient FROM couriers_orders '
+        'WHERE order_id = :order_id AND courier_id = :courier_id FOR UPDATE'
+        '), '
+        'duration AS ('
+        'SELECT EXTRACT(EPOCH FROM CAST(:complete_time AS timestamp) - coalesce(('
+        'SELECT max(delivery.complete_time) FROM couriers_orders AS delivery '
+        'WHERE delivery.courier_id = entry.courier_id AND delivery.assign_time = entry.assign_time '
+        'AND delivery.complete_time IS NOT NULL'
+        '), entry.assign_time)) AS seconds FROM entry'
+        '), '
+        'completed AS ('
+        'UPDATE couriers_orders SET complete_time = CAST(:complete_time AS timestamp), duration = duration.seconds '
+        'FROM entry, duration '
+        'WHERE couriers_orders.order_id = entry.order_id AND couriers_orders.courier_id = entry.courier_id '
+        'AND couriers_orders.assign_time = entry.assign_time AND entry.complete_time IS NULL AND duration.seconds >= 0 '
+        'RETURNING couriers_orders.courier_id, couriers_orders.duration, couriers_orders.coefficient'
+        '), '
+        'stats AS ('
+        'INSERT INTO courier_stats (courier_id, region, duration_sum, completed_count, coefficient_sum) '
+        'SELECT completed.courier_id, "order".region, completed.duration, 1, completed.coefficient '
+        'FROM completed, "order" '
+        'ON CONFLICT (courier_id, region) DO UPDATE SET '
+        'duration_sum = courier_stats.duration_sum + EXCLUDED.duration_sum, '
+        'completed_count = courier_stats.completed_count + EXCLUDED.completed_count, '
+        'coefficient_sum = courier_stats.coefficient_sum + EXCLUDED.coefficient_sum'
+        ') '
+        'SELECT EXISTS (SELECT 1 FROM courier) AS courier_exists, '
+        'EXISTS (SELECT 1 FROM "order") AS order_exists, '
+        'EXISTS (SELECT 1 FROM entry) AS assigned, '
+        'EXISTS (SELECT 1 FROM entry WHERE complete_time IS NOT NULL) AS already_completed, '
+        'EXISTS (SELECT 1 FROM completed) AS completed, '
+        'CASE WHEN EXISTS (SELECT 1 FROM entry) THEN false ELSE EXISTS ('
+        'SELECT 1 FROM couriers_orders_archive WHERE courier_id = :courier_id AND order_id = :order_id'
+        ') END AS archived',
+    ).bindparams(order_id=order_id, courier_id=courier_id, complete_time=complete_time)
 
 
 class OrderAssigner(IOrderAssigner):
 
-    async def assign(self, orders: List[Order]) -> datetime:
-        assign_time = datetime.now()
-        courier = await self.get_courier()
-        coefficient = COURIER_COEFFICIENT.get(courier.type)
-        query = couriers_orders_table.insert().values([
-            {
-                'order_id': order.id, 'courier_id': self.courier_id,
-                'assign_time': assign_time, 'coefficient': coefficient,
-            }
-            for order in orders
-        ])
-        await database.execute(query)
-        return assign_time
+    @instrument_stage('assign')
+    async def assign(
+        self, orders: OrderBatch, assign_time: Optional[datetime] = None,
+    ) -> Tuple[OrderBatch, datetime]:
+        """
+        Assign orders which are not assigned yet, returns assigned ones.
+
+        Orders which are being assigned by concurrent transactions are skipped
+        without waiting and already assigned ones are skipped by mark of order.
+        """
+        assign_time = assign_time or datetime.now()
+        query = claim_orders_query(
+            orders.ids,
+            self.courier_id,
+            assign_time,
+            self.context.coefficient,
+        )
+        assigned_ids = {record['order_id'] for record in await database.fetch_all(query)}
+        open_orders_index.remove(orders.ids)  # Not assigned ones are busy by concurrent requests
+        return orders.with_ids(assigned_ids), assign_time
 
     async def unassign(self, orders: List[Order]) -> None:
         orders_ids = get_objects_ids(orders)
@@ -34,19 +121,14 @@ class OrderAssigner(IOrderAssigner):
             couriers_orders_table.c.courier_id == self.courier_id,
         ))
         await database.execute(query)
+        open_orders_index.add(orders)
 
-    async def complete(
-        self, order: Union[int, Order], complete_time: datetime, duration: float,
-    ) -> None:
+    @classmethod
+    async def complete(cls, courier_id: int, order: Union[int, Order], complete_time: datetime) -> Mapping:
+        """
+        Statistic of courier is updated by the same statement, returns results
+        of checks. Courier is checked by the statement too, so it isn't loaded.
+        """
         if not isinstance(order, int):
             order = order.id
-
-        query = couriers_orders_table.update().where(and_(
-            couriers_orders_table.c.order_id == order,
-            couriers_orders_table.c.courier_id == self.courier_id,
-        )).values(
-            complete_time=complete_time,
-            duration=duration,
-        )
-
-        await database.execute(query)
+        return await database.fetch_one(complete_order_query(order, courier_id, complete_time))
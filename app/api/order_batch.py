@@ -0,0 +1,105 @@
+from itertools import compress
+from operator import not_
+from typing import AbstractSet, Iterable, List, Mapping, NamedTuple
+
+from app.api.models import Order
+from app.utils.intervals import IntervalIndex
+from app.utils.periods import MinutesPeriod, join_periods
+
+
+class OrderRow(NamedTuple):
+    """Values of one order which are needed for matching."""
+    id: int
+    region: int
+    weight: float
+    delivery_minutes: List[MinutesPeriod]
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> 'OrderRow':
+        delivery_minutes = join_periods(record['delivery_starts'], record['delivery_ends'])
+        return cls(record['id'], record['region'], float(record['weight']), delivery_minutes)
+
+    @classmethod
+    def from_order(cls, order: Order) -> 'OrderRow':
+        return cls(order.id, order.region, order.weight, order.delivery_minutes)
+
+
+class OrderBatch:
+    """
+    Candidate orders as columns: ids, regions, weights and delivery periods.
+
+    Assign pipeline selects orders by masks over columns, so models are not
+    built for candidates and every stage copies a few lists of numbers only.
+    """
+    __slots__ = ('ids', 'regions', 'weights', 'delivery_minutes')
+
+    def __init__(
+        self,
+        ids: List[int],
+        regions: List[int],
+        weights: List[float],
+        delivery_minutes: List[List[MinutesPeriod]],
+    ):
+        self.ids = ids
+        self.regions = regions
+        self.weights = weights
+        self.delivery_minutes = delivery_minutes
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'OrderBatch':
+        """Rows of orders table, hours are not needed (only their minutes columns)."""
+        batch = cls([], [], [], [])
+        for record in records:
+            batch.ids.append(record['id'])
+            batch.regions.append(record['region'])
+            batch.weights.append(float(record['weight']))
+            batch.delivery_minutes.append(join_periods(record['delivery_starts'], record['delivery_ends']))
+        return batch
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[Order]) -> 'OrderBatch':
+        batch = cls([], [], [], [])
+        for order in orders:
+            batch.ids.append(order.id)
+            batch.regions.append(order.region)
+            batch.weights.append(order.weight)
+            batch.delivery_minutes.append(order.delivery_minutes)
+        return batch
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[OrderRow]) -> 'OrderBatch':
+        batch = cls([], [], [], [])
+        for order_id, region, weight, delivery_minutes in rows:
+            batch.ids.append(order_id)
+            batch.regions.append(region)
+            batch.weights.append(weight)
+            batch.delivery_minutes.append(delivery_minutes)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, positions: List[int]) -> 'OrderBatch':
+        """Rows by positions in given order."""
+        return OrderBatch(*(
+            list(map(column.__getitem__, positions))
+            for column in (self.ids, self.regions, self.weights, self.delivery_minutes)
+        ))
+
+    def select(self, mask: Iterable[bool]) -> 'OrderBatch':
+        return self.take(list(compress(range(len(self.ids)), mask)))
+
+    def in_regions(self, regions: AbstractSet[int]) -> 'OrderBatch':
+        return self.select(map(regions.__contains__, self.regions))
+
+    def intersecting(self, working_index: IntervalIndex) -> 'OrderBatch':
+        """Orders which delivery periods intersect indexed working periods."""
+        if not working_index:
+            return self.take([])
+        return self.select(map(working_index.intersects_any, self.delivery_minutes))
+
+    def with_ids(self, ids: AbstractSet[int]) -> 'OrderBatch':
+        return self.select(map(ids.__contains__, self.ids))
+
+    def without_ids(self, ids: AbstractSet[int]) -> 'OrderBatch':
+        return self.select(map(not_, map(ids.__contains__, self.ids)))
@@ -1,58 +1,116 @@
-from datetime import datetime, time
-from typing import List, Tuple
+from typing import AbstractSet, AsyncIterator, List
 
 from app.api.interface import IOrderFilter
-from app.api.models import Order
-from app.utils.constants import COURIER_POWER, TIME_TEMPLATE
+from app.api.load_selector import LoadSelector, to_weight_units
+from app.api.matching_executor import matching_executor
+from app.api.metrics import instrument_stage
+from app.api.order_batch import OrderBatch, OrderRow
+from app.utils.intervals import IntervalIndex
+from app.utils.periods import MinutesPeriod
+
+
+def match_positions(
+    regions_column: List[int],
+    weights: List[float],
+    delivery_minutes: List[List[MinutesPeriod]],
+    regions: AbstractSet[int],
+    working_minutes: List[MinutesPeriod],
+    capacity: float,
+    load_selector: LoadSelector,
+) -> List[int]:
+    """
+    OrderFilter.filter_by_courier_features for matching executor. It gets
+    columns and values of courier only and returns positions of taken orders.
+    """
+    orders = OrderBatch(list(range(len(weights))), regions_column, weights, delivery_minutes)  # Ids are positions
+    orders = orders.in_regions(regions).intersecting(IntervalIndex(working_minutes))
+    return orders.take(load_selector.select_positions(orders.weights, capacity)).ids
 
 
 class OrderFilter(IOrderFilter):
 
-    async def filter_by_courier_features(self, orders: List[Order]) -> List[Order]:
-        orders = await self.filter_by_region(orders)
-        orders = await self.filter_by_time(orders)
-        return await self.filter_by_weight(orders)
+    @instrument_stage('filter')
+    def filter_by_courier_features(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
+        orders = self.filter_by_region(orders)
+        orders = self.filter_by_time(orders)
+        return self.filter_by_weight(orders, load)
 
-    async def filter_by_region(self, orders: List[Order]) -> List[Order]:
-        db_courier = await self.get_courier()
-        return [
-            order for order in orders
-            if order.region in db_courier.regions
-        ]
+    @instrument_stage('filter_by_region')
+    def filter_by_region(self, orders: OrderBatch) -> OrderBatch:
+        return orders.in_regions(self.context.regions)
 
-    async def filter_by_time(self, orders: List[Order]) -> List[Order]:
+    @instrument_stage('filter_by_time')
+    def filter_by_time(self, orders: OrderBatch) -> OrderBatch:
         """Returns orders which delivery hours intersect working hours."""
-        result = []
-        db_courier = await self.get_courier()
-        for work_period in db_courier.working_hours:
-            work_start, work_end = self._convert_time_period(work_period)
-            for order in orders:
-                for delivery_period in order.delivery_hours:
-                    delivery_start, delivery_end = self._convert_time_period(delivery_period)
-                    if delivery_end >= work_start and delivery_start <= work_end:  # Check segment intersecting
-                        order in result or result.append(order)  # It's funny :)
-                        break
-        return result
-
-    async def filter_by_weight(self, orders: List[Order]) -> List[Order]:
-        """Returns list with max amount of orders."""
-        result = []
-        current_weight = 0
-        db_courier = await self.get_courier()
-        courier_power = COURIER_POWER.get(db_courier.type)
-        for order in sorted(orders, key=lambda obj: obj.weight):  # Because courier must have max amount of orders
-            current_weight += order.weight
-            if current_weight > courier_power:
-                break
-            result.append(order)
-        return result
+        return orders.intersecting(self.context.working_index)
+
+    @instrument_stage('filter_by_weight')
+    def filter_by_weight(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
+        """Returns max amount of orders, which courier with load is able to take."""
+        return orders.take(self.context.load_selector.select_positions(orders.weights, self.context.capacity - load))
 
-    @staticmethod
-    def _convert_time_period(time_period: str) -> Tuple[time, time]:
-        """Convert string time period to tuple of time objects(start, end)."""
-        return tuple(map(
-            lambda time_str: datetime.strptime(time_str, TIME_TEMPLATE).time(),
-            time_period.split('-'),
-        ))
+    @instrument_stage('pool_filter')
+    async def filter_in_pool(self, orders: OrderBatch, load: float = 0) -> OrderBatch:
+        """filter_by_courier_features, which is run by matching executor for big batches."""
+        if not matching_executor.offloads(len(orders)):
+            return self.filter_by_courier_features(orders, load)
+        positions = await matching_executor.run(
+            len(orders),
+            match_positions,
+            orders.regions,
+            orders.weights,
+            orders.delivery_minutes,
+            self.context.regions,
+            self.context.working_minutes,
+            self.context.capacity - load,
+            self.context.load_selector,
+        )
+        return orders.take(positions)
 
+    @instrument_stage('stream_filter')
+    async def stream_by_courier_features(
+        self, rows: AsyncIterator[OrderRow], load: float = 0, skipped_ids: AbstractSet[int] = frozenset(),
+    ) -> OrderBatch:
+        """
+        The same orders as greedy filter_by_weight takes, but rows are streamed
+        the lightest first, so reading is stopped by the first order which
+        doesn't fit. Only taken rows are kept, stages close their sources.
+        """
+        rows = self.stream_by_time(self.stream_by_region(rows))
+        try:
+            return await self.stream_by_weight(rows, load, skipped_ids)
+        finally:
+            await rows.aclose()
 
+    async def stream_by_region(self, rows: AsyncIterator[OrderRow]) -> AsyncIterator[OrderRow]:
+        try:
+            async for row in rows:
+                if row.region in self.context.regions:
+                    yield row
+        finally:
+            await rows.aclose()
+
+    async def stream_by_time(self, rows: AsyncIterator[OrderRow]) -> AsyncIterator[OrderRow]:
+        working_index = self.context.working_index
+        try:
+            async for row in rows:
+                if working_index and working_index.intersects_any(row.delivery_minutes):
+                    yield row
+        finally:
+            await rows.aclose()
+
+    async def stream_by_weight(
+        self, rows: AsyncIterator[OrderRow], load: float = 0, skipped_ids: AbstractSet[int] = frozenset(),
+    ) -> OrderBatch:
+        """Greedy selection of rows sorted by weight, the rest of rows is not read."""
+        capacity = to_weight_units(self.context.capacity - load)
+        taken = []
+        async for row in rows:
+            if row.id in skipped_ids:
+                continue
+            weight = to_weight_units(row.weight)
+            if weight > capacity:  # The next orders are not lighter
+                break
+            capacity -= weight
+            taken.append(row)
+        return OrderBatch.from_rows(taken)
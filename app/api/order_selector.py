@@ -1,12 +1,17 @@
 from datetime import datetime
-from typing import List, Union, Optional
+from typing import AbstractSet, AsyncIterator, List, Union, Optional
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, select, text
 
 from app.api.interface import IOrderSelector
+from app.api.metrics import instrument_stage
 from app.api.models import Order, OrderAssignTime
+from app.api.open_orders import open_orders_index
+from app.api.order_batch import OrderBatch, OrderRow
 from app.db import database
+from app.db.managers import OrdersManager
 from app.db.schema import couriers_orders_table, orders_table
+from app.utils.periods import MinutesPeriod, split_periods
 
 
 class OrderSelector(IOrderSelector):
@@ -17,7 +22,14 @@ class OrderSelector(IOrderSelector):
         assign_time: Optional[datetime] = None,
         with_assign_time: bool = False,
     ) -> Union[List[OrderAssignTime], List[Order]]:
-        """Returns sorted (not) completed orders for courier."""
+        """
+        Returns sorted (not) completed orders for courier.
+
+        Not completed orders are not bounded by assign time, courier may keep
+        them for any time. They are found by partial index of not completed
+        rows in every partition, indexes of old partitions are almost empty
+        and old partitions are archived, so it's a few pages per partition.
+        """
         where_conditions = [couriers_orders_table.c.courier_id == self.courier_id]
         order_columns = [couriers_orders_table.c.assign_time]
         if assign_time:
@@ -28,15 +40,8 @@ class OrderSelector(IOrderSelector):
             where_conditions.append(couriers_orders_table.c.complete_time.isnot(None))
             order_columns.append(couriers_orders_table.c.complete_time)
 
-        model = Order
-        columns = [
-            orders_table.c.id,
-            orders_table.c.region,
-            orders_table.c.weight,
-            orders_table.c.delivery_hours,
-        ]
+        columns = self._order_columns()
         if with_assign_time:
-            model = OrderAssignTime
             columns = [
                 couriers_orders_table.c.order_id,
                 couriers_orders_table.c.assign_time,
@@ -51,18 +56,112 @@ class OrderSelector(IOrderSelector):
             couriers_orders_table.c.complete_time,
             couriers_orders_table.c.assign_time,
         )
-        return [model(**record) for record in await database.fetch_all(query)]
+        records = await database.fetch_all(query)
+        if with_assign_time:
+            return [  # Rows are trusted, so they are not validated
+                OrderAssignTime.construct(
+                    id=record['order_id'], assign_time=record['assign_time'], complete_time=record['complete_time'],
+                )
+                for record in records
+            ]
+        return [OrdersManager.from_record(record) for record in records]
+
+    @instrument_stage('select_suited_orders')
+    async def select_suited_orders(self) -> OrderBatch:
+        """Returns not assigned orders which courier is able to deliver."""
+        select = open_orders_index.find if open_orders_index.ready else self.select_not_assigned_orders
+        return await select(
+            self.context.regions,
+            self.context.capacity,
+            self.context.working_minutes,
+        )
+
+    def iterate_suited_orders(self, load: float = 0) -> AsyncIterator[OrderRow]:
+        """Not assigned orders which courier with load is able to deliver, the lightest first."""
+        iterate = open_orders_index.iterate if open_orders_index.ready else self.iterate_not_assigned_orders
+        return iterate(
+            self.context.regions,
+            self.context.capacity - load,
+            self.context.working_minutes,
+        )
+
+    @classmethod
+    async def select_not_assigned_orders(
+        cls,
+        regions: AbstractSet[int],
+        max_weight: float,
+        working_minutes: List[MinutesPeriod],
+    ) -> OrderBatch:
+        """Returns not assigned orders from regions which intersect working hours, they are sorted by id."""
+        if not regions or not working_minutes:
+            return OrderBatch([], [], [], [])
+        query = cls._not_assigned_orders_query(regions, max_weight, working_minutes).order_by(orders_table.c.id)
+        return OrderBatch.from_records(await database.fetch_all(query))
+
+    @classmethod
+    async def iterate_not_assigned_orders(
+        cls,
+        regions: AbstractSet[int],
+        max_weight: float,
+        working_minutes: List[MinutesPeriod],
+    ) -> AsyncIterator[OrderRow]:
+        """
+        The same orders as select_not_assigned_orders returns, but they are
+        sorted by weight and fetched by server-side cursor (by prefetch size),
+        so rows are not buffered. It must be iterated in transaction, cursor is
+        closed when iteration is finished or iterator is closed.
+        """
+        if not regions or not working_minutes:
+            return
+        query = cls._not_assigned_orders_query(regions, max_weight, working_minutes).order_by(
+            orders_table.c.weight,
+            orders_table.c.id,
+        )
+        records = database.connection().iterate(query)
+        try:
+            async for record in records:
+                yield OrderRow.from_record(record)
+        finally:
+            await records.aclose()  # Connection is locked by iteration
 
-    async def select_suited_orders(self) -> List[Order]:
-        query = select([
+    @classmethod
+    def _not_assigned_orders_query(
+        cls,
+        regions: AbstractSet[int],
+        max_weight: float,
+        working_minutes: List[MinutesPeriod],
+    ):
+        return select([
             orders_table.c.id,
             orders_table.c.region,
             orders_table.c.weight,
-            orders_table.c.delivery_hours,
-        ]).select_from(
-            orders_table.join(couriers_orders_table, isouter=True),
-        ).where(and_(
-            couriers_orders_table.c.courier_id.is_(None),  # Orders of one courier not must be available for other
+            orders_table.c.delivery_starts,
+            orders_table.c.delivery_ends,
+        ]).where(and_(
+            orders_table.c.region.in_(sorted(regions)),
+            orders_table.c.weight <= max_weight,
+            cls._delivery_time_condition(working_minutes),
+            ~orders_table.c.assigned,  # Orders of one courier not must be available for other
         ))
-        orders = [Order(**order) for order in await database.fetch_all(query)]
-        return orders
+
+    @staticmethod
+    def _order_columns() -> list:
+        return [
+            orders_table.c.id,
+            orders_table.c.region,
+            orders_table.c.weight,
+            orders_table.c.delivery_hours,
+            orders_table.c.delivery_starts,
+            orders_table.c.delivery_ends,
+        ]
+
+    @staticmethod
+    def _delivery_time_condition(working_minutes: List[MinutesPeriod]):
+        """Condition that one of delivery periods intersects one of working periods."""
+        work_starts, work_ends = split_periods(working_minutes)
+        return text(
+            'EXISTS (SELECT 1 '
+            'FROM unnest(orders.delivery_starts, orders.delivery_ends) AS delivery(start_minute, end_minute), '
+            'unnest(CAST(:work_starts AS integer[]), CAST(:work_ends AS integer[])) AS work(start_minute, end_minute) '
+            'WHERE delivery.end_minute >= work.start_minute AND delivery.start_minute <= work.end_minute)',
+        ).bindparams(work_starts=work_starts, work_ends=work_ends)
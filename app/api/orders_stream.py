@@ -0,0 +1,113 @@
+from os import environ
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.api.models import (
+    LineValidationError, Order, OrderId, OrdersStreamChunk, OrdersStreamPostResponse,
+)
+from app.api.open_orders import open_orders_index
+from app.db.managers import OrdersManager
+from app.utils.constants import ORDERS_STREAM_CHUNK_SIZE, ORDERS_STREAM_MAX_LINE_LENGTH
+
+
+async def iterate_lines(
+    stream: AsyncIterator[bytes], max_length: int,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Not empty lines of stream with their numbers, only the current line is kept
+    in memory. Pieces of line from chunks are joined once at its end. Lines
+    longer than max_length are not kept, None is yielded for them.
+    """
+    number, pieces, length = 0, [], 0
+    async for data in stream:
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            piece = data[start:] if end == -1 else data[start:end]
+            if length <= max_length:
+                length += len(piece)
+                pieces.append(piece)
+                if length > max_length:
+                    pieces = []  # The rest of line is skipped
+            if end == -1:
+                break
+            number += 1
+            if length > max_length:
+                yield number, None
+            else:
+                line = b''.join(pieces)
+                if line.strip():
+                    yield number, line
+            pieces, length, start = [], 0, end + 1
+    if length > max_length:
+        yield number + 1, None
+    elif pieces:
+        line = b''.join(pieces)
+        if line.strip():
+            yield number + 1, line
+
+
+class OrdersStreamLoader:
+    """
+    Creates orders from NDJSON stream (every line is an order).
+
+    Lines are validated one by one like items of POST /orders and valid orders
+    are created by chunks, so memory doesn't depend on size of stream. Length
+    of line is limited too, longer lines are validation errors.
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None, max_line_length: Optional[int] = None):
+        if chunk_size is None:
+            chunk_size = int(environ.get('ORDERS_STREAM_CHUNK_SIZE', ORDERS_STREAM_CHUNK_SIZE))
+        if max_line_length is None:
+            max_line_length = int(environ.get('ORDERS_STREAM_MAX_LINE_LENGTH', ORDERS_STREAM_MAX_LINE_LENGTH))
+        self.chunk_size = chunk_size
+        self.max_line_length = max_line_length
+        self.result = OrdersStreamPostResponse()
+        self._chunk: List[Tuple[int, Order]] = []
+        self._chunk_ids = set()
+
+    async def load(self, stream: AsyncIterator[bytes]) -> OrdersStreamPostResponse:
+        async for number, line in iterate_lines(stream, self.max_line_length):
+            order = self._parse(number, line)
+            if order is None:
+                continue
+            self._chunk.append((number, order))
+            self._chunk_ids.add(order.id)
+            if len(self._chunk) >= self.chunk_size:
+                await self._write_chunk()
+        if self._chunk:
+            await self._write_chunk()
+        return self.result
+
+    def _parse(self, number: int, line: Optional[bytes]) -> Optional[Order]:
+        if line is None:
+            msg = f'Line is longer than {self.max_line_length} bytes!'
+            self.result.validation_error.append(LineValidationError(line=number, errors=[
+                {'loc': ['__root__'], 'msg': msg, 'type': 'value_error'},
+            ]))
+            return None
+        try:
+            order = Order.parse_raw(line)
+        except ValidationError as exc:  # Invalid JSON is validation error too
+            self.result.validation_error.append(LineValidationError(line=number, errors=exc.errors()))
+            return None
+        if order.id in self._chunk_ids:
+            self.result.validation_error.append(LineValidationError(line=number, errors=[
+                {'loc': ['order_id'], 'msg': 'Duplicated order id!', 'type': 'value_error'},
+            ]))
+            return None
+        return order
+
+    async def _write_chunk(self) -> None:
+        orders = [order for _, order in self._chunk]
+        existing_ids = set(await OrdersManager.create_if_not_exist(orders))
+        chunk = OrdersStreamChunk(first_line=self._chunk[0][0], last_line=self._chunk[-1][0])
+        if existing_ids:
+            chunk.existing_orders = [OrderId(id=order.id) for order in orders if order.id in existing_ids]
+        else:
+            chunk.orders = [OrderId(id=order.id) for order in orders]
+            open_orders_index.add(orders)
+        self.result.chunks.append(chunk)
+        self._chunk, self._chunk_ids = [], set()
@@ -0,0 +1,32 @@
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, standard json is used then
+    orjson = None
+
+
+def encode_default(obj: Any) -> Any:
+    """Models are serialized by aliases like FastAPI does with response_model."""
+    if isinstance(obj, BaseModel):
+        return obj.dict(by_alias=True)
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response which is rendered by orjson if it's installed.
+
+    Content may be a model, then it's serialized without validation by
+    response_model, so routes return models which they have built. Output is
+    the same as output of starlette JSONResponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=encode_default)
+        return super().render(jsonable_encoder(content))
@@ -1,19 +1,27 @@
-from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request, status
 
+from app.api.batch_assigner import BatchOrderAssigner
+from app.api.courier_context import CourierContext
 from app.api.courier_statistic import CourierStatistic
 from app.api.exceptions import InvalidDataError
 from app.api.mediator import OrderAssignMediator
+from app.api.open_orders import open_orders_index
+from app.api.orders_stream import OrdersStreamLoader
 from app.api.models import (
     CourierGetResponse, CourierId, CourierPatchRequest,
-    CouriersPostRequest, CouriersPostResponse, OrderId,
+    CouriersPostRequest, CouriersPostResponse, CourierOrdersAssign, OrderId,
+    OrdersAssignBatchPostRequest, OrdersAssignBatchPostResponse,
     OrdersAssignPostRequest, OrdersAssignPostResponse,
     OrdersCompletePostRequest, OrdersPostRequest,
-    OrdersPostResponse, Courier,
+    OrdersPostResponse, OrdersStreamPostResponse, Courier,
 )
+from app.api.responses import FastJSONResponse
 from app.db.managers import CouriersManager, OrdersManager, get_objects_ids
-from app.utils.constants import NOT_EXISTS_MSG
-from app.utils.response_processor import already_exists_response_content
+from app.db.transactions import in_transaction
+from app.utils.constants import NOT_EXISTS_MSG, RFC_TIME_FORMAT
+from app.utils.response_processor import (
+    already_exists_response_content, not_exists_response_content,
+)
 
 api_router = APIRouter()
 
@@ -23,17 +31,20 @@ api_router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=CouriersPostResponse,
 )
+@in_transaction
 async def create_couriers(courier_request: CouriersPostRequest):
     couriers = courier_request.data
-    db_couriers = await CouriersManager.get(get_objects_ids(couriers))
-    if db_couriers:
-        return JSONResponse(
+    existing_ids = set(await CouriersManager.create_if_not_exist(couriers))
+    if existing_ids:
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=already_exists_response_content(db_couriers, 'couriers'),
+            content=already_exists_response_content(
+                [courier for courier in couriers if courier.id in existing_ids], 'couriers',
+            ),
         )
-    couriers = await CouriersManager.create(couriers)
-    return CouriersPostResponse(
-        couriers=[CourierId(id=courier.id) for courier in couriers]
+    return FastJSONResponse(
+        CouriersPostResponse.construct(couriers=[CourierId.construct(id=courier.id) for courier in couriers]),
+        status_code=status.HTTP_201_CREATED,
     )
 
 
@@ -42,19 +53,21 @@ async def create_couriers(courier_request: CouriersPostRequest):
     status_code=status.HTTP_200_OK,
     response_model=Courier,
 )
+@in_transaction
 async def update_courier(
     courier_id: int,
     patch_request: CourierPatchRequest,
 ):
+    await CouriersManager.lock([courier_id])  # Orders are not assigned by old values while they are unassigned
     db_courier = await CouriersManager.get([courier_id], many=False)
     if not db_courier:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={'msg': NOT_EXISTS_MSG.format(entity='Courier')},
         )
     updated_courier = await CouriersManager.update(courier_id, patch_request.dict())
-    await OrderAssignMediator(courier_id, updated_courier).unassign()
-    return updated_courier
+    await OrderAssignMediator(CourierContext(updated_courier)).unassign()
+    return FastJSONResponse(updated_courier)
 
 
 @api_router.post(
@@ -62,37 +75,85 @@ async def update_courier(
     status_code=status.HTTP_201_CREATED,
     response_model=OrdersPostResponse,
 )
+@in_transaction
 async def create_orders(orders_request: OrdersPostRequest):
     orders = orders_request.data
-    db_orders = await OrdersManager.get(get_objects_ids(orders))
-    if db_orders:
-        return JSONResponse(
+    existing_ids = set(await OrdersManager.create_if_not_exist(orders))
+    if existing_ids:
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=already_exists_response_content(db_orders, 'orders'),
+            content=already_exists_response_content(
+                [order for order in orders if order.id in existing_ids], 'orders',
+            ),
         )
-    orders = await OrdersManager.create(orders)
-    return OrdersPostResponse(
-        orders=[OrderId(id=order.id) for order in orders],
+    open_orders_index.add(orders)
+    return FastJSONResponse(
+        OrdersPostResponse.construct(orders=[OrderId.construct(id=order.id) for order in orders]),
+        status_code=status.HTTP_201_CREATED,
     )
 
 
+@api_router.post(
+    '/orders/stream',
+    status_code=status.HTTP_201_CREATED,
+    response_model=OrdersStreamPostResponse,
+)
+async def create_orders_from_stream(request: Request):
+    """
+    Body is NDJSON, every line is an order like an item of POST /orders data.
+    Chunks are committed by their own transactions, so it isn't in transaction.
+    """
+    result = await OrdersStreamLoader().load(request.stream())
+    return FastJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
 @api_router.post(
     '/orders/assign',
     status_code=status.HTTP_200_OK,
     response_model=OrdersAssignPostResponse,
 )
+@in_transaction
 async def assign_orders_to_courier(request: OrdersAssignPostRequest):
-    db_courier = await CouriersManager.get([request.courier_id], many=False)
-    if not db_courier:
-        return JSONResponse(
+    context = await CourierContext.load(request.courier_id)
+    if not context:
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={'msg': NOT_EXISTS_MSG.format(entity='Courier')},
         )
-    orders, assign_time = await OrderAssignMediator(request.courier_id, db_courier).assign()
-    return OrdersAssignPostResponse(
-        orders=[OrderId(id=order.id) for order in orders],
+    orders_ids, assign_time = await OrderAssignMediator(context).assign()
+    return FastJSONResponse(OrdersAssignPostResponse(
+        orders=[OrderId(id=order_id) for order_id in orders_ids],
         assign_time=assign_time,
-    )
+    ))
+
+
+@api_router.post(
+    '/orders/assign/batch',
+    status_code=status.HTTP_200_OK,
+    response_model=OrdersAssignBatchPostResponse,
+)
+@in_transaction
+async def assign_orders_to_couriers(request: OrdersAssignBatchPostRequest):
+    couriers_ids = list(dict.fromkeys(request.couriers_ids))  # Without duplicates
+    db_couriers = await CouriersManager.get(couriers_ids)
+    not_existing_ids = set(couriers_ids) - set(get_objects_ids(db_couriers))
+    if not_existing_ids:
+        return FastJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=not_exists_response_content(sorted(not_existing_ids), 'couriers', 'Courier'),
+        )
+    positions = {courier_id: i for i, courier_id in enumerate(couriers_ids)}
+    db_couriers.sort(key=lambda courier: positions[courier.id])  # Couriers are served in request order
+    assigned = await BatchOrderAssigner(db_couriers).assign()
+    couriers = []
+    for courier_id in couriers_ids:
+        orders_ids, assign_time = assigned[courier_id]
+        couriers.append(CourierOrdersAssign(
+            courier_id=courier_id,
+            orders=[OrderId(id=order_id) for order_id in orders_ids],
+            assign_time=assign_time.strftime(RFC_TIME_FORMAT) if assign_time else None,
+        ))
+    return FastJSONResponse(OrdersAssignBatchPostResponse(couriers=couriers))
 
 
 @api_router.post(
@@ -100,30 +161,20 @@ async def assign_orders_to_courier(request: OrdersAssignPostRequest):
     status_code=status.HTTP_200_OK,
     response_model=CourierId,
 )
+@in_transaction
 async def complete_order(request: OrdersCompletePostRequest):
-    db_courier = await CouriersManager.get([request.courier_id], many=False)
-    if not db_courier:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={'msg': NOT_EXISTS_MSG.format(entity='Courier')},
-        )
-    db_order = await OrdersManager.get([request.order_id], many=False)
-    if not db_order:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={'msg': NOT_EXISTS_MSG.format(entity='Order')},
-        )
     try:
-        await OrderAssignMediator(request.courier_id, db_courier).complete(
+        await OrderAssignMediator.complete(
+            request.courier_id,
             request.order_id,
             request.complete_time,
         )
     except InvalidDataError as exc:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={'msg': str(exc)},
         )
-    return CourierId(id=request.courier_id)
+    return FastJSONResponse(CourierId(id=request.courier_id))
 
 
 @api_router.get(
@@ -131,18 +182,19 @@ async def complete_order(request: OrdersCompletePostRequest):
     status_code=status.HTTP_200_OK,
     response_model=CourierGetResponse,
 )
+@in_transaction
 async def get_courier_info(courier_id: int):
     db_courier = await CouriersManager.get([courier_id], many=False)
     if not db_courier:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={'msg': NOT_EXISTS_MSG.format(entity='Courier')},
         )
     courier_statistic = CourierStatistic(db_courier)
     rating = await courier_statistic.get_rating()
     earnings = await courier_statistic.get_earnings()
-    return CourierGetResponse(
+    return FastJSONResponse(CourierGetResponse.construct(
         **db_courier.dict(),
         rating=rating,
         earnings=earnings,
-    )
+    ))
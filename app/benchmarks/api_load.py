@@ -0,0 +1,160 @@
+"""
+Load test of the API, the application runs in process with the test database.
+
+Couriers and orders are created by batches, then every courier gets orders,
+completes them and its info is requested. Latency percentiles and
+throughput of every operation are printed and saved as JSON, results of
+previous run may be compared with them.
+
+Usage: python -m app.benchmarks.api_load [--couriers 200 --orders 5000]
+       [--output results.json] [--compare previous.json]
+"""
+import argparse
+import json
+import platform
+import subprocess
+from datetime import datetime, timedelta
+from math import ceil
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from app.benchmarks.database import temporary_database
+from app.benchmarks.data_generator import DataGenerator
+from app.utils.constants import RFC_TIME_FORMAT
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    return sorted_values[max(ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+class Operation:
+    """Latencies of requests of one operation and amount of processed items (couriers, orders)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.items = 0
+
+    def measure(self, request: Callable, items: int = 1):
+        start = perf_counter()
+        response = request()
+        self.latencies.append(perf_counter() - start)
+        self.items += items
+        assert response.status_code in (200, 201), f'{self.name}: {response.status_code} {response.text}'
+        return response
+
+    def result(self) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        total = sum(latencies)
+        return {
+            'requests': len(latencies),
+            'items': self.items,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'requests_per_second': len(latencies) / total,
+            'items_per_second': self.items / total,
+        }
+
+
+def run(args) -> Dict[str, Dict[str, float]]:
+    from fastapi.testclient import TestClient  # Application is imported with test database settings
+    from app.main import app
+
+    generator = DataGenerator(seed=args.seed, regions=args.regions)
+    couriers = generator.couriers(args.couriers)
+    orders = generator.orders(args.orders)
+    operations = {name: Operation(name) for name in (
+        'create_couriers', 'create_orders', 'assign', 'complete', 'get_courier',
+    )}
+    with TestClient(app) as client:
+        for start in range(0, len(couriers), args.batch_size):
+            batch = couriers[start:start + args.batch_size]
+            operations['create_couriers'].measure(lambda: client.post('/couriers', json={'data': batch}), len(batch))
+        for start in range(0, len(orders), args.batch_size):
+            batch = orders[start:start + args.batch_size]
+            operations['create_orders'].measure(lambda: client.post('/orders', json={'data': batch}), len(batch))
+
+        assigned = {}
+        for courier in couriers:
+            courier_id = courier['courier_id']
+            response = operations['assign'].measure(
+                lambda: client.post('/orders/assign', json={'courier_id': courier_id}),
+            ).json()
+            assigned[courier_id] = response
+
+        for courier_id, response in assigned.items():
+            if not response['orders']:
+                continue
+            assign_time = datetime.strptime(response['assign_time'], RFC_TIME_FORMAT)
+            for i, order in enumerate(response['orders'], start=1):
+                complete_time = (assign_time + timedelta(minutes=10 * i)).strftime(RFC_TIME_FORMAT)
+                payload = {'courier_id': courier_id, 'order_id': order['id'], 'complete_time': complete_time}
+                operations['complete'].measure(lambda: client.post('/orders/complete', json=payload))
+
+        for courier in couriers:
+            operations['get_courier'].measure(lambda: client.get(f'/couriers/{courier["courier_id"]}'))
+    return {name: operation.result() for name, operation in operations.items() if operation.latencies}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results: Dict[str, Dict[str, float]], previous: Dict[str, Dict[str, float]]):
+    print(f'{"operation":>16} {"requests":>9} {"p50, ms":>9} {"p95, ms":>9} {"p99, ms":>9} {"req/s":>9} {"items/s":>9}')
+    for name, result in results.items():
+        print(
+            f'{name:>16} {result["requests"]:>9} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+            f'{result["p99_ms"]:>9.2f} {result["requests_per_second"]:>9.1f} {result["items_per_second"]:>9.1f}',
+        )
+        if name in previous:  # Positive change of latency is regression
+            changes = [
+                f'{key} {(result[key] / previous[name][key] - 1) * 100:+.1f}%'
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'items_per_second')
+                if previous[name].get(key)
+            ]
+            print(f'{"":>16} vs previous: {", ".join(changes)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--couriers', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--regions', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=1000, help='Items in POST /couriers and /orders')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file for results')
+    parser.add_argument('--compare', help='JSON file with results of previous run')
+    args = parser.parse_args()
+
+    with temporary_database():
+        results = run(args)
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)['results']
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'commit': git_commit(),
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'parameters': {
+                    key: getattr(args, key) for key in ('couriers', 'orders', 'regions', 'batch_size', 'seed')
+                },
+                'results': results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
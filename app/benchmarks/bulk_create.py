@@ -0,0 +1,68 @@
+"""
+Benchmark of orders ingest (POST /orders without request parsing).
+
+Legacy path checks existing orders by IN (...) query and inserts them by one
+multi-row INSERT, the bulk path is OrdersManager.create_if_not_exist (COPY to
+staging table). Legacy INSERT is limited by 32767 query arguments, so bigger
+batches fail.
+
+Usage: python -m app.benchmarks.bulk_create [--sizes 1000 5000 50000]
+"""
+import argparse
+import asyncio
+import random
+from time import perf_counter
+from typing import List
+
+from app.benchmarks.database import temporary_database
+from app.benchmarks.filter_by_time import generate_orders
+from app.api.models import Order
+from app.db import database
+from app.db.managers import OrdersManager, get_objects_ids
+
+
+async def legacy_create(orders: List[Order]) -> List[int]:
+    db_orders = await OrdersManager.get(get_objects_ids(orders))
+    if not db_orders:
+        await database.execute(OrdersManager.table.insert().values([
+            OrdersManager.to_values(order.dict())
+            for order in orders
+        ]))
+    return get_objects_ids(db_orders)
+
+
+async def measure(create, orders: List[Order]) -> float:
+    await database.execute('TRUNCATE orders CASCADE')
+    start = perf_counter()
+    await create(orders)
+    return perf_counter() - start
+
+
+async def main(args):
+    rnd = random.Random(args.seed)
+    await database.connect()
+    try:
+        print(f'{"orders":>10} {"legacy, rows/s":>15} {"bulk, rows/s":>15} {"speedup":>8}')
+        for size in args.sizes:
+            orders = generate_orders(size, rnd)
+            bulk_time = await asyncio.create_task(measure(OrdersManager.create_if_not_exist, orders))
+            try:
+                legacy_time = await asyncio.create_task(measure(legacy_create, orders))
+            except Exception as exc:  # Too many arguments of query
+                print(f'{size:>10} {"failed":>15} {size / bulk_time:>15.0f} {"-":>8}  ({exc.__class__.__name__})')
+                continue
+            print(
+                f'{size:>10} {size / legacy_time:>15.0f} {size / bulk_time:>15.0f} '
+                f'{legacy_time / bulk_time:>7.1f}x',
+            )
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 50000])
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+    with temporary_database():
+        asyncio.run(main(arguments))
@@ -0,0 +1,132 @@
+"""
+Load test of concurrent POST /orders/assign (OrderAssignMediator.assign).
+
+Requests are run by several processes against the same database, like
+uvicorn workers, each of them runs concurrent requests in own event loop.
+It checks that every order is assigned once and shows throughput for
+different amount of workers. Throughput of one process is bound by its
+event loop, so it must grow with workers till CPUs or database are busy.
+
+Usage: python -m app.benchmarks.concurrent_assign [--workers 1 2 4 8] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+from typing import List, Tuple
+
+from app.benchmarks.database import temporary_database
+from app.api.courier_context import CourierContext
+from app.api.mediator import OrderAssignMediator
+from app.api.models import Courier, Order
+from app.db import database
+from app.db.managers import CouriersManager, OrdersManager
+from app.db.schema import CourierTypeEnum
+
+
+async def prepare(couriers_amount: int, orders_amount: int, regions: int, rnd: random.Random):
+    await database.execute('TRUNCATE couriers, orders, couriers_orders, courier_stats')
+    await CouriersManager.create_if_not_exist([
+        Courier(
+            id=i,
+            type=rnd.choice(list(CourierTypeEnum)),
+            regions=rnd.sample(range(1, regions + 1), 2),
+            working_hours=['09:00-18:00'],
+        )
+        for i in range(1, couriers_amount + 1)
+    ])
+    await OrdersManager.create_if_not_exist([
+        Order(
+            id=i,
+            weight=round(rnd.uniform(0.5, 10), 2),
+            region=rnd.randrange(1, regions + 1),
+            delivery_hours=['10:00-12:00'],
+        )
+        for i in range(1, orders_amount + 1)
+    ])
+
+
+async def assign_couriers(couriers_ids: List[int], concurrency: int) -> Tuple[float, float]:
+    """Assigns couriers by concurrent requests in one event loop, returns start and end time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def assign(courier_id: int):
+        async with semaphore:
+            await OrderAssignMediator(await CourierContext.load(courier_id)).assign()
+
+    start = time()
+    await asyncio.gather(*[assign(courier_id) for courier_id in couriers_ids])
+    return start, time()
+
+
+def worker(couriers_ids: List[int], concurrency: int, barrier) -> Tuple[float, float]:
+    """Process like a uvicorn worker: own event loop and pool of connections."""
+    async def main():
+        await database.connect()
+        try:
+            barrier.wait()  # Workers start together, after connecting
+            # Connection is bound to task, so requests must not be run by task which has connected
+            return await asyncio.create_task(assign_couriers(couriers_ids, concurrency))
+        finally:
+            await database.disconnect()
+    return asyncio.run(main())
+
+
+def run(workers: int, concurrency: int, couriers_amount: int) -> float:
+    """Couriers are split between workers, returns seconds from the first start till the last end."""
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager, ProcessPoolExecutor(workers, mp_context=context) as executor:
+        barrier = manager.Barrier(workers)
+        futures = [
+            executor.submit(worker, list(range(i, couriers_amount + 1, workers)), concurrency, barrier)
+            for i in range(1, workers + 1)
+        ]
+        times = [future.result() for future in futures]
+    return max(end for _, end in times) - min(start for start, _ in times)
+
+
+async def count_assigned():
+    assigned = await database.fetch_val('SELECT count(*) FROM couriers_orders')
+    duplicates = await database.fetch_val('SELECT count(*) - count(DISTINCT order_id) FROM couriers_orders')
+    return assigned, duplicates
+
+
+async def prepare_database(args, rnd: random.Random):
+    await database.connect()
+    try:
+        # Connection is bound to task, so it's used by one task
+        await asyncio.create_task(prepare(args.couriers, args.orders, args.regions, rnd))
+    finally:
+        await database.disconnect()
+
+
+async def check_database():
+    await database.connect()
+    try:
+        return await asyncio.create_task(count_assigned())
+    finally:
+        await database.disconnect()
+
+
+def main(args):
+    print(f'{"workers":>8} {"concurrency":>12} {"assigns/s":>10} {"assigned":>9} {"duplicates":>11}')
+    for workers in args.workers:
+        asyncio.run(prepare_database(args, random.Random(args.seed)))  # The same data for every run
+        seconds = run(workers, args.concurrency, args.couriers)
+        assigned, duplicates = asyncio.run(check_database())
+        print(f'{workers:>8} {args.concurrency:>12} {args.couriers / seconds:>10.1f} {assigned:>9} {duplicates:>11}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Processes like uvicorn workers')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent requests of every worker')
+    parser.add_argument('--couriers', type=int, default=500)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--regions', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+    with temporary_database():
+        main(arguments)
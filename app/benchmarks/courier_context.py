@@ -0,0 +1,145 @@
+"""
+Micro-benchmark of per-request overhead of assign logic objects.
+
+Legacy objects (selector, filter and assigner) were built with courier each,
+every async filter stage awaited get_courier() and built values of courier
+again. Now values are computed once by CourierContext and filters are
+synchronous. Candidate lists are small, so overhead is measured, not filtering.
+Candidates of the new path are columns of OrderBatch, as selector returns them.
+Building of objects for request and a call of filter by built objects
+(e.g. the next assign attempt) are measured.
+
+Usage: python -m app.benchmarks.courier_context [--calls 100000 --orders 10]
+"""
+import os
+
+os.environ.setdefault('METRICS_ENABLED', '0')  # Legacy stages were not instrumented
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import random  # noqa: E402
+from time import perf_counter  # noqa: E402
+from typing import List, Optional  # noqa: E402
+
+from app.api.courier_context import CourierContext  # noqa: E402
+from app.api.load_selector import get_load_selector  # noqa: E402
+from app.api.models import Courier, Order  # noqa: E402
+from app.api.order_assigner import OrderAssigner  # noqa: E402
+from app.api.order_batch import OrderBatch  # noqa: E402
+from app.api.order_filter import OrderFilter  # noqa: E402
+from app.api.order_selector import OrderSelector  # noqa: E402
+from app.benchmarks.filter_by_time import generate_orders  # noqa: E402
+from app.db.schema import CourierTypeEnum  # noqa: E402
+from app.utils.constants import COURIER_POWER  # noqa: E402
+from app.utils.intervals import IntervalIndex  # noqa: E402
+
+
+class LegacyInterface:
+    """Implementation before courier context."""
+
+    def __init__(self, courier_id: int, courier: Optional[Courier] = None):
+        self.courier_id = courier_id
+        self._db_courier = courier
+
+    async def get_courier(self):
+        return self._db_courier  # Courier is given, so it isn't loaded
+
+
+class LegacyOrderFilter(LegacyInterface):
+
+    async def filter_by_courier_features(self, orders: List[Order], load: float = 0) -> List[Order]:
+        orders = await self.filter_by_region(orders)
+        orders = await self.filter_by_time(orders)
+        return await self.filter_by_weight(orders, load)
+
+    async def filter_by_region(self, orders: List[Order]) -> List[Order]:
+        db_courier = await self.get_courier()
+        return [order for order in orders if order.region in db_courier.regions]
+
+    async def filter_by_time(self, orders: List[Order]) -> List[Order]:
+        db_courier = await self.get_courier()
+        working_index = IntervalIndex(db_courier.working_minutes)
+        result, seen_ids = [], set()
+        if not working_index:
+            return result
+        for order in orders:
+            if order.id not in seen_ids and working_index.intersects_any(order.delivery_minutes):
+                seen_ids.add(order.id)
+                result.append(order)
+        return result
+
+    async def filter_by_weight(self, orders: List[Order], load: float = 0) -> List[Order]:
+        db_courier = await self.get_courier()
+        courier_power = COURIER_POWER.get(db_courier.type) - load
+        weights = [order.weight for order in orders]
+        return [orders[i] for i in get_load_selector(db_courier.type).select_positions(weights, courier_power)]
+
+
+async def legacy_calls(courier: Courier, orders: List[Order], calls: int) -> float:
+    start = perf_counter()
+    for _ in range(calls):
+        LegacyInterface(courier.id, courier)  # Selector
+        LegacyInterface(courier.id, courier)  # Assigner
+        await LegacyOrderFilter(courier.id, courier).filter_by_courier_features(orders)
+    return perf_counter() - start
+
+
+async def context_calls(courier: Courier, orders: OrderBatch, calls: int) -> float:
+    start = perf_counter()
+    for _ in range(calls):
+        context = CourierContext(courier)
+        OrderSelector(context)
+        OrderAssigner(context)
+        OrderFilter(context).filter_by_courier_features(orders)
+    return perf_counter() - start
+
+
+async def legacy_filter_calls(courier: Courier, orders: List[Order], calls: int) -> float:
+    order_filter = LegacyOrderFilter(courier.id, courier)
+    start = perf_counter()
+    for _ in range(calls):
+        await order_filter.filter_by_courier_features(orders)
+    return perf_counter() - start
+
+
+async def context_filter_calls(courier: Courier, orders: OrderBatch, calls: int) -> float:
+    order_filter = OrderFilter(CourierContext(courier))
+    start = perf_counter()
+    for _ in range(calls):
+        order_filter.filter_by_courier_features(orders)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--orders', type=int, nargs='+', default=[0, 10, 50])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    courier = Courier(
+        id=1,
+        type=CourierTypeEnum.bike,
+        regions=list(range(1, 100, 3)),
+        working_hours=['08:00-12:00', '13:00-18:00'],
+    )
+    courier.working_minutes  # Periods of couriers from DB are already parsed
+
+    print(f'{"measured":>10} {"orders":>8} {"legacy, us/call":>16} {"context, us/call":>17} {"speedup":>8}')
+    for measured, legacy, new in (
+        ('request', legacy_calls, context_calls),
+        ('filter', legacy_filter_calls, context_filter_calls),
+    ):
+        for size in args.orders:
+            orders = generate_orders(size, rnd)
+            legacy_time = asyncio.run(legacy(courier, orders, args.calls))
+            context_time = asyncio.run(new(courier, OrderBatch.from_orders(orders), args.calls))
+            print(
+                f'{measured:>10} {size:>8} {legacy_time / args.calls * 1e6:>16.2f} '
+                f'{context_time / args.calls * 1e6:>17.2f} {legacy_time / context_time:>7.2f}x',
+            )
+
+
+if __name__ == '__main__':
+    main()
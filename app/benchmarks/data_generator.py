@@ -0,0 +1,99 @@
+"""
+Synthetic couriers and orders which are similar to real ones.
+
+Popularity of regions follows Zipf law (a few central regions have most of
+orders), couriers work by shifts, most of orders are light and delivery
+hours are one or two slots at daytime. Items are payloads of API requests.
+"""
+import random
+from itertools import accumulate
+from typing import Dict, List
+
+COURIER_TYPES_SHARES = {'foot': 0.5, 'bike': 0.3, 'car': 0.2}
+
+SHIFTS = [  # (start hour, end hour, share of couriers)
+    (8, 16, 0.35),
+    (12, 20, 0.35),
+    (16, 23, 0.2),
+    (9, 13, 0.1),
+]
+
+
+def format_minutes(minutes: int) -> str:
+    return f'{minutes // 60:02}:{minutes % 60:02}'
+
+
+def random_period(rnd: random.Random, overnight_share: float = 0) -> str:
+    """Period of random minutes, share of periods ends the next day (like '22:00-02:00')."""
+    start, end = sorted((rnd.randrange(24 * 60), rnd.randrange(24 * 60)))
+    if rnd.random() < overnight_share:
+        start, end = end, start
+    return format_minutes(start) + '-' + format_minutes(end)
+
+
+class DataGenerator:
+
+    def __init__(
+        self,
+        seed: int = 0,
+        regions: int = 50,
+        region_skew: float = 1.1,
+        weight_median: float = 2.5,
+        weight_sigma: float = 1.0,
+    ):
+        self.rnd = random.Random(seed)
+        self.regions = list(range(1, regions + 1))
+        # Cumulative Zipf weights, so choices of regions don't compute them every time
+        self._regions_weights = list(accumulate(1 / rank ** region_skew for rank in self.regions))
+        self.weight_median = weight_median  # Kilograms
+        self.weight_sigma = weight_sigma  # Sigma of log-normal distribution
+
+    def region(self) -> int:
+        return self.rnd.choices(self.regions, cum_weights=self._regions_weights)[0]
+
+    def courier_regions(self) -> List[int]:
+        regions = {self.region() for _ in range(self.rnd.randrange(1, 6))}
+        return sorted(regions)
+
+    def working_hours(self) -> List[str]:
+        start, end, _ = self.rnd.choices(SHIFTS, weights=[shift[2] for shift in SHIFTS])[0]
+        if self.rnd.random() < 0.2:  # Break in the middle of shift
+            middle = (start + end) // 2 * 60
+            return [format_minutes(start * 60) + '-' + format_minutes(middle),
+                    format_minutes(middle + 30) + '-' + format_minutes(end * 60)]
+        return [format_minutes(start * 60) + '-' + format_minutes(end * 60)]
+
+    def weight(self) -> float:
+        weight = self.rnd.lognormvariate(0, self.weight_sigma) * self.weight_median
+        return min(max(round(weight, 2), 0.01), 50)
+
+    def delivery_hours(self) -> List[str]:
+        periods = []
+        for _ in range(self.rnd.choices([1, 2, 3], weights=[0.6, 0.3, 0.1])[0]):
+            start = self.rnd.randrange(8 * 60, 22 * 60, 30)
+            length = self.rnd.choice([60, 60, 120, 180])
+            periods.append(format_minutes(start) + '-' + format_minutes(min(start + length, 23 * 60 + 59)))
+        return periods
+
+    def couriers(self, amount: int, first_id: int = 1) -> List[Dict]:
+        types, shares = zip(*COURIER_TYPES_SHARES.items())
+        return [
+            {
+                'courier_id': courier_id,
+                'courier_type': self.rnd.choices(types, weights=shares)[0],
+                'regions': self.courier_regions(),
+                'working_hours': self.working_hours(),
+            }
+            for courier_id in range(first_id, first_id + amount)
+        ]
+
+    def orders(self, amount: int, first_id: int = 1) -> List[Dict]:
+        return [
+            {
+                'order_id': order_id,
+                'weight': self.weight(),
+                'region': self.region(),
+                'delivery_hours': self.delivery_hours(),
+            }
+            for order_id in range(first_id, first_id + amount)
+        ]
@@ -0,0 +1,26 @@
+import os
+from contextlib import contextmanager
+
+os.environ.setdefault('TESTING', 'True')  # Benchmarks use the same database as tests
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy_utils import create_database, drop_database  # noqa: E402
+
+from app.db import TEST_SQLALCHEMY_DATABASE_URL  # noqa: E402
+
+
+@contextmanager
+def temporary_database():
+    """Migrated test database, it's dropped at exit (temp_db fixture of tests uses it too)."""
+    create_database(TEST_SQLALCHEMY_DATABASE_URL)
+    base_dir = os.path.dirname(os.path.dirname(__file__))
+    db_dir = os.path.join(base_dir, "db")
+    alembic_cfg = Config(os.path.join(db_dir, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(db_dir, "migrations"))
+    command.upgrade(alembic_cfg, "head")
+
+    try:
+        yield TEST_SQLALCHEMY_DATABASE_URL
+    finally:
+        drop_database(TEST_SQLALCHEMY_DATABASE_URL)
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of OrderFilter.filter_by_time.
+
+Usage: python -m app.benchmarks.filter_by_time [--sizes 500 1000 100000]
+"""
+import argparse
+import random
+from time import perf_counter
+from typing import List
+
+from app.api.courier_context import CourierContext
+from app.api.models import Courier, Order
+from app.api.order_batch import OrderBatch
+from app.api.order_filter import OrderFilter
+from app.benchmarks.data_generator import random_period
+from app.db.schema import CourierTypeEnum
+
+
+def generate_orders(size: int, rnd: random.Random) -> List[Order]:
+    orders = [
+        Order(
+            id=i,
+            weight=round(rnd.uniform(0.01, 50), 2),
+            region=rnd.randrange(1, 100),
+            delivery_hours=[random_period(rnd) for _ in range(rnd.randrange(1, 4))],
+        )
+        for i in range(1, size + 1)
+    ]
+    for order in orders:  # Periods of orders from DB are already parsed
+        order.delivery_minutes
+    return orders
+
+
+def legacy_filter_by_time(courier: Courier, orders: List[Order]) -> List[Order]:
+    """Nested loop with list based deduplication (implementation before interval index)."""
+    result = []
+    for work_start, work_end in courier.working_minutes:
+        for order in orders:
+            for delivery_start, delivery_end in order.delivery_minutes:
+                if delivery_end >= work_start and delivery_start <= work_end:
+                    order in result or result.append(order)
+                    break
+    return result
+
+
+def measure(function, *args) -> float:
+    start = perf_counter()
+    function(*args)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 100000])
+    parser.add_argument(
+        '--legacy-max-size', type=int, default=1000,
+        help='legacy implementation is quadratic, bigger sizes are extrapolated',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    courier = Courier(
+        id=1,
+        type=CourierTypeEnum.car,
+        regions=[1],
+        working_hours=['08:00-12:00', '11:30-14:00', '18:00-21:00'],
+    )
+    order_filter = OrderFilter(CourierContext(courier))
+
+    legacy_point = None  # (size, seconds) of the biggest measured legacy run
+    print(f'{"orders":>10} {"legacy, s":>12} {"indexed, s":>12} {"speedup":>10}')
+    for size in sorted(args.sizes):
+        orders = generate_orders(size, rnd)
+        indexed_time = measure(order_filter.filter_by_time, OrderBatch.from_orders(orders))
+        if size <= args.legacy_max_size:
+            legacy_time = measure(legacy_filter_by_time, courier, orders)
+            legacy_point = (size, legacy_time)
+            legacy_repr = f'{legacy_time:12.4f}'
+        elif legacy_point:
+            legacy_time = legacy_point[1] * (size / legacy_point[0]) ** 2
+            legacy_repr = f'~{legacy_time:11.1f}'
+        else:
+            legacy_time, legacy_repr = None, f'{"-":>12}'
+        speedup = f'{legacy_time / indexed_time:9.0f}x' if legacy_time else f'{"-":>10}'
+        print(f'{size:>10} {legacy_repr} {indexed_time:12.4f} {speedup}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Latency of GET /couriers/<id> while POST /orders/assign matches a big batch.
+
+The application is served by uvicorn in a thread, GET requests are sent one
+by one while assign of courier with a lot of suited orders runs. Matching
+is done in event loop (inline) and by matching pool, the pool must keep
+latency of other requests flat.
+
+Usage: python -m app.benchmarks.matching_latency [--orders 6000 --time-limit 0.5]
+"""
+import argparse
+import os
+import random
+import socket
+import threading
+from time import perf_counter, sleep
+from typing import Dict, List
+
+import requests
+
+from app.benchmarks.api_load import percentile
+from app.benchmarks.database import temporary_database
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_latencies_while_assign(url: str, courier_id: int, get_courier_id: int) -> List[float]:
+    """Latencies of GET requests which are sent one by one while assign runs."""
+    assign = threading.Thread(
+        target=lambda: requests.post(f'{url}/orders/assign', json={'courier_id': courier_id}).raise_for_status(),
+    )
+    assign.start()
+    latencies = []
+    while assign.is_alive():
+        start = perf_counter()
+        requests.get(f'{url}/couriers/{get_courier_id}').raise_for_status()
+        latencies.append(perf_counter() - start)
+    assign.join()
+    return sorted(latencies)
+
+
+def run(args) -> Dict[str, Dict[str, float]]:
+    import uvicorn  # Application is imported with test database settings
+    from app.api.matching_executor import matching_executor
+    from app.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level='warning'))
+    server.install_signal_handlers = lambda: None  # It's served in a thread
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    while not server.started:
+        sleep(0.05)
+
+    url = f'http://127.0.0.1:{port}'
+    rnd = random.Random(args.seed)
+    results = {}
+    try:
+        couriers = [
+            {'courier_id': i, 'courier_type': 'car', 'regions': [i], 'working_hours': ['00:00-23:59']}
+            for i in range(1, 4)
+        ]
+        orders = [
+            {
+                'order_id': i,
+                'weight': round(rnd.uniform(0.5, 5), 2),
+                'region': 1 + i % 2,
+                'delivery_hours': ['10:00-12:00'],
+            }
+            for i in range(1, args.orders + 1)
+        ]
+        requests.post(f'{url}/couriers', json={'data': couriers}).raise_for_status()
+        requests.post(f'{url}/orders', json={'data': orders}).raise_for_status()
+
+        inline_max_orders = matching_executor.inline_max_orders
+        for courier_id, (mode, max_orders) in enumerate([('inline', args.orders), ('pool', inline_max_orders)], 1):
+            matching_executor.inline_max_orders = max_orders
+            latencies = get_latencies_while_assign(url, courier_id, 3)
+            results[mode] = {
+                'requests': len(latencies),
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'max_ms': latencies[-1] * 1000,
+            }
+        matching_executor.inline_max_orders = inline_max_orders
+    finally:
+        server.should_exit = True
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--orders', type=int, default=6000, help='Orders of two couriers')
+    parser.add_argument('--time-limit', type=float, default=0.5, help='Seconds of exact load selection')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ['LOAD_STRATEGY_CAR'] = 'exact'  # Knapsack is CPU-heavy till time limit
+    os.environ['LOAD_SELECTION_TIME_LIMIT'] = str(args.time_limit)
+    with temporary_database():
+        results = run(args)
+
+    print(f'{"matching":>10} {"requests":>9} {"p50, ms":>9} {"max, ms":>9}')
+    for mode, result in results.items():
+        print(f'{mode:>10} {result["requests"]:>9} {result["p50_ms"]:>9.2f} {result["max_ms"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
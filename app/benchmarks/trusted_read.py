@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of models building from database rows.
+
+Rows were validated by models at write time, so validation of them (regions,
+strptime of hours periods, etc.) is repeated work. Validated models are
+compared with construct() (trusted read path of managers). Managers join
+minutes columns too, so speedup is underestimated.
+
+Usage: python -m app.benchmarks.trusted_read [--rows 100000]
+"""
+import argparse
+from time import perf_counter
+from typing import Callable, List
+
+from app.api.models import Courier, Order
+from app.benchmarks.data_generator import DataGenerator
+from app.db.managers import CouriersManager, OrdersManager
+from app.db.schema import CourierTypeEnum
+from app.utils.periods import periods_to_minutes, split_periods
+
+
+def courier_records(generator: DataGenerator, amount: int) -> List[dict]:
+    records = []
+    for courier in generator.couriers(amount):
+        starts, ends = split_periods(periods_to_minutes(courier['working_hours']))
+        records.append({
+            'id': courier['courier_id'], 'type': CourierTypeEnum(courier['courier_type']),
+            'regions': courier['regions'], 'working_hours': courier['working_hours'],
+            'working_starts': starts, 'working_ends': ends,
+        })
+    return records
+
+
+def order_records(generator: DataGenerator, amount: int) -> List[dict]:
+    records = []
+    for order in generator.orders(amount):
+        starts, ends = split_periods(periods_to_minutes(order['delivery_hours']))
+        records.append({
+            'id': order['order_id'], 'weight': order['weight'], 'region': order['region'],
+            'delivery_hours': order['delivery_hours'], 'delivery_starts': starts, 'delivery_ends': ends,
+        })
+    return records
+
+
+def validated(model) -> Callable[[dict], object]:
+    """Implementation before trusted read path."""
+    def from_record(record: dict):
+        return model(**{field: record[field] for field in model.__fields__})
+    return from_record
+
+
+def measure(from_record: Callable[[dict], object], records: List[dict]) -> float:
+    start = perf_counter()
+    for record in records:
+        from_record(record)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generator = DataGenerator(seed=args.seed)
+    print(f'{"model":>8} {"validated, us/row":>18} {"trusted, us/row":>16} {"speedup":>8}')
+    for name, records, model, manager in (
+        ('courier', courier_records(generator, args.rows), Courier, CouriersManager),
+        ('order', order_records(generator, args.rows), Order, OrdersManager),
+    ):
+        validated_time = measure(validated(model), records)
+        trusted_time = measure(manager.from_record, records)
+        print(
+            f'{name:>8} {validated_time / len(records) * 1e6:>18.2f} '
+            f'{trusted_time / len(records) * 1e6:>16.2f} {validated_time / trusted_time:>7.1f}x',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,18 @@ DB_HOST = environ.get('DB_HOST', 'localhost')
 DB_NAME = environ.get('DB_NAME', 'sweet_delivery')
 DB_PORT = environ.get('DB_PORT', '5442')
 
+DB_POOL_MIN_SIZE = int(environ.get('DB_POOL_MIN_SIZE', 10))
+DB_POOL_MAX_SIZE = int(environ.get('DB_POOL_MAX_SIZE', 10))
+DB_STATEMENT_TIMEOUT = int(environ.get('DB_STATEMENT_TIMEOUT', 0))  # Milliseconds, 0 disables timeout
+DB_STATEMENT_CACHE_SIZE = int(environ.get('DB_STATEMENT_CACHE_SIZE', 100))  # Prepared statements, 0 for pgbouncer
+
+DATABASE_OPTIONS = {  # Options of asyncpg pool
+    'min_size': DB_POOL_MIN_SIZE,
+    'max_size': DB_POOL_MAX_SIZE,
+    'statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+    'server_settings': {'statement_timeout': str(DB_STATEMENT_TIMEOUT)},
+}
+
 TESTING = environ.get("TESTING", False)
 
 if TESTING:
@@ -15,9 +27,9 @@ if TESTING:
     TEST_SQLALCHEMY_DATABASE_URL = (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
-    database = Database(TEST_SQLALCHEMY_DATABASE_URL)
+    database = Database(TEST_SQLALCHEMY_DATABASE_URL, **DATABASE_OPTIONS)
 else:
     DATABASE_URL = (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
-    database = Database(DATABASE_URL)
+    database = Database(DATABASE_URL, **DATABASE_OPTIONS)
@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """Storage of cached records, it may be shared by workers (e.g. redis)."""
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, dict]:
+        """Returns found not expired records by keys."""
+        pass
+
+    @abstractmethod
+    async def set_many(self, records: Dict[Hashable, dict]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[Hashable]) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process cache, the least recently used records are evicted and records expire after ttl."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl  # Seconds
+        self._records: 'OrderedDict[Hashable, Tuple[float, dict]]' = OrderedDict()
+
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, dict]:
+        result, now = {}, monotonic()
+        for key in keys:
+            entry = self._records.get(key)
+            if entry is None:
+                continue
+            expires_at, record = entry
+            if expires_at < now:
+                del self._records[key]
+                continue
+            self._records.move_to_end(key)
+            result[key] = record
+        return result
+
+    async def set_many(self, records: Dict[Hashable, dict]) -> None:
+        expires_at = monotonic() + self.ttl
+        for key, record in records.items():
+            self._records[key] = expires_at, record
+            self._records.move_to_end(key)
+        while len(self._records) > self.maxsize:
+            self._records.popitem(last=False)
+
+    async def delete_many(self, keys: Iterable[Hashable]) -> None:
+        for key in keys:
+            self._records.pop(key, None)
+
+    async def clear(self) -> None:
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class RecordsCache:
+    """
+    Read-through cache of table rows by ids with hit and miss counters.
+
+    Rows are cached as dicts, so models are not shared between requests and
+    the backend may be replaced by a shared one for multi-worker deployments.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get_many(self, objects_ids: Iterable[int]) -> Dict[int, dict]:
+        objects_ids = list(objects_ids)
+        records = await self.backend.get_many(objects_ids)
+        self.hits += len(records)
+        self.misses += len(objects_ids) - len(records)
+        return records
+
+    async def set_many(self, records: Dict[int, dict]) -> None:
+        if records:
+            await self.backend.set_many(records)
+
+    async def invalidate(self, objects_ids: Iterable[int]) -> None:
+        await self.backend.delete_many(objects_ids)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / requests if requests else None,
+        }
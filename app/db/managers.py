@@ -1,25 +1,54 @@
-from typing import List, Union
+from enum import Enum
+from functools import partial
+from os import environ
+from typing import List, Mapping, Optional, Union
 
 from pydantic import BaseModel
-from sqlalchemy import Table
+from sqlalchemy import Column, Table, text
 
 from app.api.models import Courier, Order
 from app.db import database
-from app.db.schema import couriers_table, orders_table
+from app.db.cache import LRUCacheBackend, RecordsCache
+from app.db.schema import CourierTypeEnum, couriers_table, orders_table
+from app.db.transactions import on_commit
+from app.utils.constants import COURIER_LOCK_CLASS, COURIERS_CACHE_SIZE, COURIERS_CACHE_TTL
+from app.utils.periods import join_periods, periods_to_minutes, split_periods
 
 
 class Manager:
     table: Table = Table
     model: BaseModel = BaseModel
+    cache: Optional[RecordsCache] = None  # Read-through cache of get by ids
 
     @classmethod
-    async def create(cls, objects: List[BaseModel]) -> List[BaseModel]:
-        query = cls.table.insert().values([
-            obj.dict()
-            for obj in objects
-        ])
-        await database.execute(query)
-        return objects
+    async def create_if_not_exist(cls, objects: List[BaseModel]) -> List[int]:
+        """
+        Creates objects if none of them exists, returns ids of existing ones.
+
+        Rows are copied to the staging table by COPY, so it's fast for big
+        batches, and existing ids are found by join with the table. Staging
+        table is dropped at once, method may be called many times in one
+        transaction of request.
+        """
+        staging = f'staging_{cls.table.name}'
+        columns = [column.name for column in cls.written_columns()]
+        async with database.transaction():
+            connection = database.connection()
+            await connection.execute(
+                f'CREATE TEMP TABLE {staging} (LIKE {cls.table.name} INCLUDING DEFAULTS)',
+            )
+            await connection.raw_connection.copy_records_to_table(
+                staging, records=[cls.to_row(obj) for obj in objects], columns=columns,
+            )
+            existing = await connection.fetch_all(
+                f'SELECT {staging}.id FROM {staging} JOIN {cls.table.name} USING (id) ORDER BY {staging}.id',
+            )
+            if not existing:
+                await connection.execute(
+                    f'INSERT INTO {cls.table.name} ({", ".join(columns)}) SELECT {", ".join(columns)} FROM {staging}',
+                )
+            await connection.execute(f'DROP TABLE {staging}')
+        return [record['id'] for record in existing]
 
     @classmethod
     async def get(
@@ -27,11 +56,10 @@ class Manager:
         objects_ids: List[int],
         many: bool = True,
     ) -> Union[List[BaseModel], BaseModel, None]:
-        query = cls.table.select().where(cls.table.c.id.in_(objects_ids))
+        records = await cls._get_records(objects_ids)
         if many:
-            return [cls.model(**obj) for obj in await database.fetch_all(query)]
-        db_object = await database.fetch_one(query)
-        return cls.model(**db_object) if db_object else None
+            return [cls.from_record(record) for record in records]
+        return cls.from_record(records[0]) if records else None
 
     @classmethod
     async def update(cls, object_id: int, to_update: dict):
@@ -39,25 +67,133 @@ class Manager:
         if to_update:
             query = cls.table.update().where(
                 cls.table.c.id == object_id,
-            ).values(to_update)
+            ).values(cls.to_values(to_update))
             await database.execute(query)
-        updated_object = await cls.get([object_id], many=False)
-        return updated_object
+            if cls.cache is not None:
+                await cls.cache.invalidate([object_id])
+                # Concurrent requests may cache the old row till commit
+                await on_commit(partial(cls.cache.invalidate, [object_id]))
+        # Not cached, because update may be rolled back
+        records = await cls._fetch_records([object_id])
+        return cls.from_record(records[0]) if records else None
 
     @classmethod
-    async def delete(cls, objects_ids: List[int]):
-        pass
+    async def delete(cls, objects_ids: List[int]) -> List[int]:
+        """Deletes objects, returns ids of deleted ones. Referenced rows are not deleted by foreign keys."""
+        query = cls.table.delete().where(cls.table.c.id.in_(objects_ids)).returning(cls.table.c.id)
+        deleted_ids = [record['id'] for record in await database.fetch_all(query)]
+        if cls.cache is not None and deleted_ids:
+            await cls.cache.invalidate(deleted_ids)
+            # Concurrent requests may cache the deleted row till commit
+            await on_commit(partial(cls.cache.invalidate, deleted_ids))
+        return deleted_ids
+
+    @classmethod
+    async def _get_records(cls, objects_ids: List[int]) -> List[Mapping]:
+        if cls.cache is None:
+            return await cls._fetch_records(objects_ids)
+        objects_ids = list(dict.fromkeys(objects_ids))
+        cached = await cls.cache.get_many(objects_ids)
+        missed_ids = [object_id for object_id in objects_ids if object_id not in cached]
+        records = await cls._fetch_records(missed_ids) if missed_ids else []
+        await cls.cache.set_many({record['id']: dict(record) for record in records})
+        return [*cached.values(), *records]
+
+    @classmethod
+    async def _fetch_records(cls, objects_ids: List[int]) -> List[Mapping]:
+        query = cls.table.select().where(cls.table.c.id.in_(objects_ids))
+        return await database.fetch_all(query)
+
+    @classmethod
+    def to_values(cls, values: dict) -> dict:
+        """Returns values of table row (model fields with derived columns)."""
+        return values
+
+    @classmethod
+    def written_columns(cls) -> List[Column]:
+        """Columns which are written from models, the rest have server defaults."""
+        return [column for column in cls.table.columns if column.server_default is None]
+
+    @classmethod
+    def to_row(cls, obj: BaseModel) -> tuple:
+        """Values of table row in order of written columns."""
+        values = cls.to_values(obj.dict())
+        return tuple(
+            value.value if isinstance(value, Enum) else value
+            for value in (values[column.name] for column in cls.written_columns())
+        )
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> BaseModel:
+        """
+        Rows were validated at write time, so models are constructed without
+        validation. Values must have types of model fields then.
+        """
+        return cls.model.construct(**{field: record[field] for field in cls.model.__fields__})
 
 
 class CouriersManager(Manager):
     table = couriers_table
     model = Courier
+    cache = RecordsCache(LRUCacheBackend(
+        maxsize=int(environ.get('COURIERS_CACHE_SIZE', COURIERS_CACHE_SIZE)),
+        ttl=float(environ.get('COURIERS_CACHE_TTL', COURIERS_CACHE_TTL)),
+    ))
+
+    @classmethod
+    async def lock(cls, couriers_ids: List[int]) -> None:
+        """Lock couriers till the end of transaction, so orders are not assigned to them concurrently."""
+        query = text(
+            'SELECT pg_advisory_xact_lock(:lock_class, courier_id) '
+            'FROM (SELECT DISTINCT unnest(CAST(:couriers_ids AS integer[])) AS courier_id ORDER BY 1) AS couriers',
+        ).bindparams(lock_class=COURIER_LOCK_CLASS, couriers_ids=couriers_ids)  # Sorted to avoid deadlocks
+        await database.fetch_all(query)  # Execute fetches only the first row, so only one lock would be taken
+
+    @classmethod
+    def to_values(cls, values: dict) -> dict:
+        if values.get('working_hours') is not None:
+            values['working_starts'], values['working_ends'] = split_periods(
+                periods_to_minutes(values['working_hours']),
+            )
+        return values
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> Courier:
+        # Lists are copied, because records may be shared by cache
+        courier = Courier.construct(
+            id=record['id'],
+            type=CourierTypeEnum(record['type']),
+            regions=list(record['regions']),
+            working_hours=list(record['working_hours']),
+        )
+        courier._working_minutes = join_periods(record['working_starts'], record['working_ends'])
+        courier._regions_set = frozenset(record['regions'])
+        return courier
 
 
 class OrdersManager(Manager):
     table = orders_table
     model = Order
 
+    @classmethod
+    def to_values(cls, values: dict) -> dict:
+        if values.get('delivery_hours') is not None:
+            values['delivery_starts'], values['delivery_ends'] = split_periods(
+                periods_to_minutes(values['delivery_hours']),
+            )
+        return values
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> Order:
+        order = Order.construct(
+            id=record['id'],
+            weight=float(record['weight']),
+            region=record['region'],
+            delivery_hours=list(record['delivery_hours']),
+        )
+        order._delivery_minutes = join_periods(record['delivery_starts'], record['delivery_ends'])
+        return order
+
 
 def get_objects_ids(objects: Union[List[Courier], List[Order]]) -> List[int]:
     result = []
@@ -0,0 +1,26 @@
+"""Added candidate orders indexes
+
+Revision ID: 3c1e0a6d9b52
+Revises: 7af399799dd9
+Create Date: 2021-04-10 12:14:31.508211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1e0a6d9b52'
+down_revision = '7af399799dd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_region_weight', 'orders', ['region', 'weight'])
+    op.create_index('ix_couriers_orders_order_id', 'couriers_orders', ['order_id'])
+
+
+def downgrade():
+    op.drop_index('ix_couriers_orders_order_id', table_name='couriers_orders')
+    op.drop_index('ix_orders_region_weight', table_name='orders')
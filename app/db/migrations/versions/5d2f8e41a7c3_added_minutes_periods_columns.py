@@ -0,0 +1,49 @@
+"""Added minutes periods columns
+
+Revision ID: 5d2f8e41a7c3
+Revises: 3c1e0a6d9b52
+Create Date: 2021-04-11 16:02:47.931054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8e41a7c3'
+down_revision = '3c1e0a6d9b52'
+branch_labels = None
+depends_on = None
+
+PERIOD_POINT_TO_MINUTES = """
+ARRAY(
+    SELECT date_part('hour', split_part(period, '-', {point})::time) * 60
+        + date_part('minute', split_part(period, '-', {point})::time)
+    FROM unnest({column}) WITH ORDINALITY AS periods(period, number)
+    ORDER BY number
+)::integer[]
+"""
+
+NEW_COLUMNS = {
+    'couriers': ('working_hours', 'working_starts', 'working_ends'),
+    'orders': ('delivery_hours', 'delivery_starts', 'delivery_ends'),
+}
+
+
+def upgrade():
+    for table, (column, starts_column, ends_column) in NEW_COLUMNS.items():
+        op.add_column(table, sa.Column(starts_column, sa.ARRAY(sa.Integer()), nullable=True))
+        op.add_column(table, sa.Column(ends_column, sa.ARRAY(sa.Integer()), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET '
+            f'{starts_column} = {PERIOD_POINT_TO_MINUTES.format(point=1, column=column)}, '
+            f'{ends_column} = {PERIOD_POINT_TO_MINUTES.format(point=2, column=column)}'
+        )
+        op.alter_column(table, starts_column, nullable=False)
+        op.alter_column(table, ends_column, nullable=False)
+
+
+def downgrade():
+    for table, (_, starts_column, ends_column) in NEW_COLUMNS.items():
+        op.drop_column(table, ends_column)
+        op.drop_column(table, starts_column)
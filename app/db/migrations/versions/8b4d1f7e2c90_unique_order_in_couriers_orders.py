@@ -0,0 +1,33 @@
+"""Unique order in couriers orders
+
+Revision ID: 8b4d1f7e2c90
+Revises: 5d2f8e41a7c3
+Create Date: 2021-04-17 11:25:09.117640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4d1f7e2c90'
+down_revision = '5d2f8e41a7c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Order could be assigned to several couriers by concurrent requests, the first assignment is kept.
+    op.execute(
+        'DELETE FROM couriers_orders AS duplicate USING couriers_orders AS first '
+        'WHERE duplicate.order_id = first.order_id AND ('
+        'duplicate.assign_time > first.assign_time OR '
+        '(duplicate.assign_time = first.assign_time AND duplicate.ctid > first.ctid))'
+    )
+    op.drop_index('ix_couriers_orders_order_id', table_name='couriers_orders')
+    op.create_index('ix_couriers_orders_order_id', 'couriers_orders', ['order_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_couriers_orders_order_id', table_name='couriers_orders')
+    op.create_index('ix_couriers_orders_order_id', 'couriers_orders', ['order_id'])
@@ -0,0 +1,37 @@
+"""Added couriers orders indexes
+
+Revision ID: a1c7e5f3d804
+Revises: 8b4d1f7e2c90
+Create Date: 2021-04-18 14:40:52.660413
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c7e5f3d804'
+down_revision = '8b4d1f7e2c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unique index on order_id is created by 8b4d1f7e2c90
+    op.create_primary_key('couriers_orders_pkey', 'couriers_orders', ['courier_id', 'order_id'])
+    op.create_index(
+        'ix_couriers_orders_not_completed', 'couriers_orders', ['courier_id', 'assign_time'],
+        postgresql_where=sa.text('complete_time IS NULL'),
+    )
+    op.create_index(
+        'ix_couriers_orders_completed', 'couriers_orders', ['courier_id'],
+        postgresql_where=sa.text('complete_time IS NOT NULL'),
+    )
+    op.create_index('ix_couriers_regions', 'couriers', ['regions'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_couriers_regions', table_name='couriers')
+    op.drop_index('ix_couriers_orders_completed', table_name='couriers_orders')
+    op.drop_index('ix_couriers_orders_not_completed', table_name='couriers_orders')
+    op.drop_constraint('couriers_orders_pkey', 'couriers_orders', type_='primary')
@@ -0,0 +1,180 @@
+"""Partitioned couriers orders
+
+Revision ID: b9d4e7a1c352
+Revises: e5b3f9a2c461
+Create Date: 2021-04-22 16:05:41.802317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4e7a1c352'
+down_revision = 'e5b3f9a2c461'
+branch_labels = None
+depends_on = None
+
+# Partition of month is created if it doesn't exist, rows of the month are moved
+# from default partition, otherwise partition couldn't be attached.
+CREATE_PARTITION_FUNCTION = '''
+CREATE FUNCTION create_couriers_orders_partition(month date) RETURNS text LANGUAGE plpgsql AS $$
+DECLARE
+    start_time timestamp := date_trunc('month', month);
+    end_time timestamp := date_trunc('month', month) + interval '1 month';
+    partition text := 'couriers_orders_' || to_char(month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition) IS NOT NULL THEN
+        RETURN partition;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE couriers_orders INCLUDING DEFAULTS)', partition);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM couriers_orders_default WHERE assign_time >= %L AND assign_time < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_time, end_time, partition
+    );
+    EXECUTE format(
+        'ALTER TABLE couriers_orders ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition, start_time, end_time
+    );
+    RETURN partition;
+END
+$$
+'''
+
+# Rows moved between partitions and archive directly don't fire triggers of
+# couriers_orders, so archived orders are left assigned.
+MARK_ASSIGNED_FUNCTION = '''
+CREATE FUNCTION mark_assigned_orders() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE orders SET assigned = (TG_OP = 'INSERT') FROM changed_orders WHERE orders.id = changed_orders.order_id;
+    RETURN NULL;
+END
+$$
+'''
+
+TRIGGERS = [
+    # (trigger, event, transition table), notify function is created by e5b3f9a2c461
+    ('couriers_orders_assigned', 'INSERT', 'NEW'),
+    ('couriers_orders_unassigned', 'DELETE', 'OLD'),
+]
+
+
+def create_triggers(prefix: str, function: str):
+    for trigger, event, transition in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {prefix}_{trigger} AFTER {event} ON couriers_orders '
+            f'REFERENCING {transition} TABLE AS changed_orders '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION {function}()'
+        )
+
+
+def create_indexes(unique_order: bool):
+    op.create_index('ix_couriers_orders_order_id', 'couriers_orders', ['order_id'], unique=unique_order)
+    op.create_index(
+        'ix_couriers_orders_not_completed', 'couriers_orders', ['courier_id', 'assign_time'],
+        postgresql_where=sa.text('complete_time IS NULL'),
+    )
+    op.create_index(
+        'ix_couriers_orders_completed', 'couriers_orders', ['courier_id'],
+        postgresql_where=sa.text('complete_time IS NOT NULL'),
+    )
+
+
+def drop_indexes(table: str):
+    op.drop_index('ix_couriers_orders_completed', table_name=table)
+    op.drop_index('ix_couriers_orders_not_completed', table_name=table)
+    op.drop_index('ix_couriers_orders_order_id', table_name=table)
+
+
+def couriers_orders_columns():
+    return [
+        sa.Column('courier_id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('assign_time', sa.DateTime(), nullable=False),
+        sa.Column('complete_time', sa.DateTime(), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('coefficient', sa.Integer(), nullable=False),
+    ]
+
+
+def upgrade():
+    # Unique index of partitioned table must have partition key, so assignment of
+    # order is marked in orders by trigger and orders are locked by assign, mark
+    # is checked by candidates queries instead of anti join with all history.
+    op.add_column('orders', sa.Column('assigned', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute(
+        'UPDATE orders SET assigned = true '
+        'WHERE EXISTS (SELECT 1 FROM couriers_orders WHERE couriers_orders.order_id = orders.id)'
+    )
+    op.drop_index('ix_orders_region_weight', table_name='orders')
+    op.create_index(
+        'ix_orders_not_assigned', 'orders', ['region', 'weight'], postgresql_where=sa.text('NOT assigned'),
+    )
+
+    for trigger, _, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER notify_{trigger} ON couriers_orders')
+    drop_indexes('couriers_orders')
+    op.drop_constraint('couriers_orders_pkey', 'couriers_orders', type_='primary')
+    op.rename_table('couriers_orders', 'couriers_orders_unpartitioned')
+
+    op.create_table('couriers_orders',
+    *couriers_orders_columns(),
+    sa.ForeignKeyConstraint(['courier_id'], ['couriers.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('courier_id', 'order_id', 'assign_time'),
+    postgresql_partition_by='RANGE (assign_time)',
+    )
+    create_indexes(unique_order=False)  # Indexes of partitions are created by partitioned ones
+    op.execute('CREATE TABLE couriers_orders_default PARTITION OF couriers_orders DEFAULT')
+    op.execute(CREATE_PARTITION_FUNCTION)
+    # Partitions of existing rows and of the next months, the next ones are created by app.db.partitions
+    op.execute(
+        "SELECT create_couriers_orders_partition(CAST(month AS date)) FROM generate_series("
+        "date_trunc('month', least(now(), (SELECT min(assign_time) FROM couriers_orders_unpartitioned))), "
+        "date_trunc('month', greatest(now() + interval '3 months', "
+        "(SELECT max(assign_time) FROM couriers_orders_unpartitioned))), "
+        "interval '1 month') AS month"
+    )
+    op.execute(
+        'INSERT INTO couriers_orders (courier_id, order_id, assign_time, complete_time, duration, coefficient) '
+        'SELECT courier_id, order_id, assign_time, complete_time, duration, coefficient '
+        'FROM couriers_orders_unpartitioned'
+    )
+    op.drop_table('couriers_orders_unpartitioned')
+    create_triggers('notify', 'notify_open_orders_assigned')
+    op.execute(MARK_ASSIGNED_FUNCTION)
+    create_triggers('mark', 'mark_assigned_orders')
+
+    op.create_table('couriers_orders_archive',  # Rows of old partitions, they are moved by app.db.partitions
+    *couriers_orders_columns(),
+    sa.PrimaryKeyConstraint('courier_id', 'order_id', 'assign_time'),
+    )
+
+
+def downgrade():
+    op.rename_table('couriers_orders', 'couriers_orders_partitioned')
+    op.create_table('couriers_orders',
+    *couriers_orders_columns(),
+    sa.ForeignKeyConstraint(['courier_id'], ['couriers.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    )
+    op.execute(
+        'INSERT INTO couriers_orders (courier_id, order_id, assign_time, complete_time, duration, coefficient) '
+        'SELECT courier_id, order_id, assign_time, complete_time, duration, coefficient '
+        'FROM couriers_orders_partitioned UNION ALL '
+        'SELECT courier_id, order_id, assign_time, complete_time, duration, coefficient '
+        'FROM couriers_orders_archive'
+    )
+    op.drop_table('couriers_orders_archive')
+    op.drop_table('couriers_orders_partitioned')  # With partitions and triggers
+    op.execute('DROP FUNCTION create_couriers_orders_partition(date)')
+    op.execute('DROP FUNCTION mark_assigned_orders()')
+
+    op.create_primary_key('couriers_orders_pkey', 'couriers_orders', ['courier_id', 'order_id'])
+    create_indexes(unique_order=True)
+    create_triggers('notify', 'notify_open_orders_assigned')
+
+    op.drop_index('ix_orders_not_assigned', table_name='orders')
+    op.create_index('ix_orders_region_weight', 'orders', ['region', 'weight'])
+    op.drop_column('orders', 'assigned')
@@ -0,0 +1,40 @@
+"""Added courier stats table
+
+Revision ID: c2e9a4b6f017
+Revises: a1c7e5f3d804
+Create Date: 2021-04-20 19:08:15.274881
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e9a4b6f017'
+down_revision = 'a1c7e5f3d804'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('courier_stats',
+    sa.Column('courier_id', sa.Integer(), nullable=False),
+    sa.Column('region', sa.Integer(), nullable=False),
+    sa.Column('duration_sum', sa.BigInteger(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('coefficient_sum', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['courier_id'], ['couriers.id'], ),
+    sa.PrimaryKeyConstraint('courier_id', 'region')
+    )
+    op.execute(
+        'INSERT INTO courier_stats (courier_id, region, duration_sum, completed_count, coefficient_sum) '
+        'SELECT couriers_orders.courier_id, orders.region, sum(couriers_orders.duration), '
+        'count(couriers_orders.duration), sum(couriers_orders.coefficient) '
+        'FROM couriers_orders JOIN orders ON orders.id = couriers_orders.order_id '
+        'WHERE couriers_orders.complete_time IS NOT NULL '
+        'GROUP BY couriers_orders.courier_id, orders.region'
+    )
+
+
+def downgrade():
+    op.drop_table('courier_stats')
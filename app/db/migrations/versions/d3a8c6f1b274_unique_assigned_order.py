@@ -0,0 +1,56 @@
+"""Unique assigned order
+
+Revision ID: d3a8c6f1b274
+Revises: b9d4e7a1c352
+Create Date: 2021-04-24 12:17:36.240915
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8c6f1b274'
+down_revision = 'b9d4e7a1c352'
+branch_labels = None
+depends_on = None
+
+# Unique index of order can't be created for partitioned couriers_orders, so order
+# is marked assigned only if it isn't assigned yet and inserted rows are checked
+# against marked ones. Concurrent assign waits for lock of order row and sees its
+# mark, so order is assigned once by any writer, not only by the application.
+MARK_ASSIGNED_FUNCTION = '''
+CREATE OR REPLACE FUNCTION mark_assigned_orders() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    marked integer;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE orders SET assigned = false FROM changed_orders WHERE orders.id = changed_orders.order_id;
+        RETURN NULL;
+    END IF;
+    UPDATE orders SET assigned = true FROM changed_orders
+    WHERE orders.id = changed_orders.order_id AND NOT orders.assigned;
+    GET DIAGNOSTICS marked = ROW_COUNT;
+    IF marked <> (SELECT count(*) FROM changed_orders) THEN
+        RAISE unique_violation USING MESSAGE = 'Order is already assigned';
+    END IF;
+    RETURN NULL;
+END
+$$
+'''
+
+PREVIOUS_MARK_ASSIGNED_FUNCTION = '''
+CREATE OR REPLACE FUNCTION mark_assigned_orders() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE orders SET assigned = (TG_OP = 'INSERT') FROM changed_orders WHERE orders.id = changed_orders.order_id;
+    RETURN NULL;
+END
+$$
+'''
+
+
+def upgrade():
+    op.execute(MARK_ASSIGNED_FUNCTION)
+
+
+def downgrade():
+    op.execute(PREVIOUS_MARK_ASSIGNED_FUNCTION)
@@ -0,0 +1,59 @@
+"""Added open orders notifications
+
+Revision ID: e5b3f9a2c461
+Revises: c2e9a4b6f017
+Create Date: 2021-04-21 11:42:03.518274
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b3f9a2c461'
+down_revision = 'c2e9a4b6f017'
+branch_labels = None
+depends_on = None
+
+# Ids of orders which are created, assigned or unassigned by statement are sent to
+# open_orders channel by chunks, so payload is less than limit of 8000 bytes.
+NOTIFY_FUNCTION = '''
+CREATE FUNCTION notify_open_orders_{name}() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    orders_ids text;
+BEGIN
+    FOR orders_ids IN
+        SELECT string_agg({column}::text, ',')
+        FROM (SELECT {column}, (row_number() OVER () - 1) / 500 AS chunk FROM changed_orders) AS changes
+        GROUP BY chunk
+    LOOP
+        PERFORM pg_notify('open_orders', orders_ids);
+    END LOOP;
+    RETURN NULL;
+END
+$$
+'''
+
+TRIGGERS = [
+    # (trigger, table, event, transition table, function)
+    ('orders_created', 'orders', 'INSERT', 'NEW', 'created'),
+    ('couriers_orders_assigned', 'couriers_orders', 'INSERT', 'NEW', 'assigned'),
+    ('couriers_orders_unassigned', 'couriers_orders', 'DELETE', 'OLD', 'assigned'),
+]
+
+
+def upgrade():
+    op.execute(NOTIFY_FUNCTION.format(name='created', column='id'))
+    op.execute(NOTIFY_FUNCTION.format(name='assigned', column='order_id'))
+    for trigger, table, event, transition, function in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER notify_{trigger} AFTER {event} ON {table} '
+            f'REFERENCING {transition} TABLE AS changed_orders '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION notify_open_orders_{function}()'
+        )
+
+
+def downgrade():
+    for trigger, table, _, _, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER notify_{trigger} ON {table}')
+    op.execute('DROP FUNCTION notify_open_orders_created()')
+    op.execute('DROP FUNCTION notify_open_orders_assigned()')
@@ -0,0 +1,123 @@
+"""
+Maintenance of monthly partitions of couriers_orders (by assign time).
+
+Partitions of the next months are created ahead, otherwise assignments get
+to the default partition. Old partitions are archived: they are detached
+(left as tables couriers_orders_detached_YYYY_MM) or detached and then moved
+to couriers_orders_archive. Partitions with not completed orders are kept.
+Statistic of couriers is kept by courier_stats, so it isn't changed.
+
+Usage: python -m app.db.partitions create [--months 3]
+       python -m app.db.partitions archive --before 2021-01-01 [--mode detach|move]
+"""
+import argparse
+import asyncio
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.db import database
+
+PARTITION_NAME = re.compile(r'^couriers_orders_(\d{4})_(\d{2})$')
+ARCHIVE_MODES = ('detach', 'move')
+
+
+def add_months(month: date, months: int) -> date:
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def create_partitions(months: int = 3, now: Optional[datetime] = None) -> List[str]:
+    """Partitions of the current month and of the next ones, existing partitions are skipped."""
+    current = (now or datetime.now()).date().replace(day=1)
+    partitions = []
+    for i in range(months + 1):
+        partitions.append(await database.fetch_val(
+            'SELECT create_couriers_orders_partition(:month)', {'month': add_months(current, i)},
+        ))
+    return partitions
+
+
+async def get_partitions() -> List[str]:
+    query = (
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        "WHERE parent.relname = 'couriers_orders' ORDER BY child.relname"
+    )
+    return [record[0] for record in await database.fetch_all(query)]
+
+
+async def archive_partitions(before: date, mode: str = 'detach') -> List[str]:
+    """
+    Archives partitions of months which end before date, returns archived ones.
+
+    Orders are assigned at current time, so not completed orders don't appear
+    in old partitions, they are only completed there. Partitions are checked
+    for not completed orders after detach, so completion can't run meanwhile.
+
+    Detach takes ACCESS EXCLUSIVE lock of couriers_orders, so it is committed
+    right away and rows are moved to archive by separate transaction, it only
+    locks detached table. DETACH CONCURRENTLY isn't used, it isn't allowed
+    with default partition. If move fails, table stays detached.
+    """
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f'Unknown archive mode {mode}')
+    archived = []
+    for partition in await get_partitions():
+        match = PARTITION_NAME.match(partition)
+        if match is None or add_months(date(int(match[1]), int(match[2]), 1), 1) > before:
+            continue
+        detached = f'couriers_orders_detached_{match[1]}_{match[2]}'
+        if not await detach_partition(partition, detached):
+            continue  # Orders couldn't be completed
+        if mode == 'move':
+            async with database.transaction():
+                await database.execute(
+                    'INSERT INTO couriers_orders_archive '
+                    '(courier_id, order_id, assign_time, complete_time, duration, coefficient) '
+                    'SELECT courier_id, order_id, assign_time, complete_time, duration, coefficient '
+                    f'FROM {detached}'
+                )
+                await database.execute(f'DROP TABLE {detached}')
+        archived.append(partition)
+    return archived
+
+
+async def detach_partition(partition: str, detached: str) -> bool:
+    """Detaches partition as table detached, if all its orders are completed."""
+    transaction = await database.transaction().start()
+    try:
+        await database.execute(f'ALTER TABLE couriers_orders DETACH PARTITION {partition}')
+        if await database.fetch_val(f'SELECT EXISTS (SELECT 1 FROM {partition} WHERE complete_time IS NULL)'):
+            await transaction.rollback()
+            return False
+        await database.execute(f'ALTER TABLE {partition} RENAME TO {detached}')
+    except BaseException:
+        await transaction.rollback()
+        raise
+    await transaction.commit()
+    return True
+
+
+async def main(args):
+    await database.connect()
+    try:
+        if args.command == 'create':
+            partitions = await create_partitions(args.months)
+        else:
+            partitions = await archive_partitions(args.before, args.mode)
+    finally:
+        await database.disconnect()
+    print('\n'.join(partitions))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    create = commands.add_parser('create')
+    create.add_argument('--months', type=int, default=3)
+    archive = commands.add_parser('archive')
+    archive.add_argument('--before', type=date.fromisoformat, required=True)
+    archive.add_argument('--mode', choices=ARCHIVE_MODES, default='detach')
+    asyncio.run(main(parser.parse_args()))
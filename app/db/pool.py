@@ -0,0 +1,133 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from databases import Database
+
+QUERY_METHODS = frozenset((
+    'execute', 'executemany', 'fetch', 'fetchrow', 'fetchval', 'cursor', 'copy_records_to_table',
+))
+
+logger = logging.getLogger(__name__)
+
+_queries_counter: ContextVar[Optional[List[int]]] = ContextVar('queries_counter', default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[List[int]]:
+    """
+    Counter of queries made by pool connections in the context, e.g. queries
+    of request. Statements of transactions control (BEGIN, COMMIT) are not counted.
+    """
+    counter = [0]
+    token = _queries_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _queries_counter.reset(token)
+
+
+class PoolMetrics:
+    """Wait time and utilization of connections pool."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count_queries = False
+        self.max_size = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_time_sum = 0.0  # Seconds
+        self.wait_time_max = 0.0
+
+    def instrument(self, db: Database, max_size: int, count_queries: bool = False) -> bool:
+        """
+        Wraps pool of connected database, so acquiring of connections is measured.
+        Connections count queries for count_queries contexts, if it's enabled.
+
+        databases doesn't give access to the pool, so its private attributes are
+        used (the version is pinned). If they are changed, metrics are turned off
+        and False is returned.
+        """
+        try:
+            backend = db._backend
+            pool = backend._pool
+        except AttributeError:
+            logger.warning('Pool of database is not found, pool metrics are disabled')
+            return False
+        self.count_queries = count_queries
+        self.max_size = max_size
+        if not isinstance(pool, InstrumentedPool):
+            backend._pool = InstrumentedPool(pool, self)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_size': self.max_size,
+            'in_use': self.in_use,
+            'utilization': self.in_use / self.max_size if self.max_size else 0,
+            'waiting': self.waiting,
+            'acquired': self.acquired,
+            'wait_time_sum': self.wait_time_sum,
+            'wait_time_max': self.wait_time_max,
+        }
+
+
+class InstrumentedPool:
+    """Proxy of asyncpg pool which counts acquired connections and time of waiting for them."""
+
+    def __init__(self, pool, metrics: PoolMetrics):
+        self._pool = pool
+        self._metrics = metrics
+
+    async def acquire(self, *args, **kwargs):
+        metrics = self._metrics
+        metrics.waiting += 1
+        start = perf_counter()
+        try:
+            connection = await self._pool.acquire(*args, **kwargs)
+        finally:
+            metrics.waiting -= 1
+        wait_time = perf_counter() - start
+        metrics.in_use += 1
+        metrics.acquired += 1
+        metrics.wait_time_sum += wait_time
+        metrics.wait_time_max = max(metrics.wait_time_max, wait_time)
+        return CountingConnection(connection) if metrics.count_queries else connection
+
+    async def release(self, connection, *args, **kwargs):
+        self._metrics.in_use -= 1
+        if isinstance(connection, CountingConnection):
+            connection = connection._connection
+        return await self._pool.release(connection, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool, name)
+
+
+class CountingConnection:
+    """Proxy of pool connection which counts queries in count_queries contexts."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._connection, name)
+        if name not in QUERY_METHODS:
+            return attribute
+
+        @wraps(attribute)
+        def query_method(*args, **kwargs):
+            counter = _queries_counter.get()
+            if counter is not None:
+                counter[0] += 1
+            return attribute(*args, **kwargs)
+        return query_method
+
+
+pool_metrics = PoolMetrics()
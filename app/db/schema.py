@@ -1,9 +1,9 @@
 from datetime import datetime
 from enum import Enum, unique
 
-from sqlalchemy import ARRAY, Column, DateTime
+from sqlalchemy import ARRAY, BigInteger, Boolean, Column, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Float, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy import Float, ForeignKey, Index, Integer, MetaData, String, Table, false
 
 
 @unique
@@ -23,8 +23,12 @@ couriers_table = Table(
     Column('type', SQLEnum(CourierTypeEnum, name='type'), nullable=False),
     Column('regions', ARRAY(Integer), nullable=False),
     Column('working_hours', ARRAY(String), nullable=False),
+    Column('working_starts', ARRAY(Integer), nullable=False),  # Minutes from the day start
+    Column('working_ends', ARRAY(Integer), nullable=False),
 )
 
+Index('ix_couriers_regions', couriers_table.c.regions, postgresql_using='gin')
+
 orders_table = Table(
     'orders',
     metadata,
@@ -32,16 +36,64 @@ orders_table = Table(
     Column('weight', Float, nullable=False),
     Column('region', Integer, nullable=False),
     Column('delivery_hours', ARRAY(String), nullable=False),
+    Column('delivery_starts', ARRAY(Integer), nullable=False),  # Minutes from the day start
+    Column('delivery_ends', ARRAY(Integer), nullable=False),
+    Column('assigned', Boolean, server_default=false(), nullable=False),  # Marked by triggers of couriers_orders
+)
+
+Index(
+    'ix_orders_not_assigned',
+    orders_table.c.region,
+    orders_table.c.weight,
+    postgresql_where=~orders_table.c.assigned,
 )
 
 
 couriers_orders_table = Table(
-    'couriers_orders',
+    'couriers_orders',  # Partitions by months of assign time are maintained by app.db.partitions
     metadata,
-    Column('courier_id', ForeignKey(couriers_table.c.id), nullable=False),
-    Column('order_id', ForeignKey(orders_table.c.id), nullable=False),
-    Column('assign_time', DateTime, default=datetime.utcnow, nullable=False),
+    Column('courier_id', ForeignKey(couriers_table.c.id), primary_key=True),
+    Column('order_id', ForeignKey(orders_table.c.id), primary_key=True),
+    Column('assign_time', DateTime, default=datetime.utcnow, primary_key=True),
     Column('complete_time', DateTime, default=None),
     Column('duration', Integer, default=None),
     Column('coefficient', Integer, nullable=False),
+    postgresql_partition_by='RANGE (assign_time)',
+)
+
+
+Index('ix_couriers_orders_order_id', couriers_orders_table.c.order_id)
+Index(
+    'ix_couriers_orders_not_completed',
+    couriers_orders_table.c.courier_id,
+    couriers_orders_table.c.assign_time,
+    postgresql_where=couriers_orders_table.c.complete_time.is_(None),
+)
+Index(
+    'ix_couriers_orders_completed',
+    couriers_orders_table.c.courier_id,
+    postgresql_where=couriers_orders_table.c.complete_time.isnot(None),
+)
+
+
+couriers_orders_archive_table = Table(
+    'couriers_orders_archive',  # Rows of old partitions of couriers_orders
+    metadata,
+    Column('courier_id', Integer, primary_key=True),
+    Column('order_id', Integer, primary_key=True),
+    Column('assign_time', DateTime, primary_key=True),
+    Column('complete_time', DateTime),
+    Column('duration', Integer),
+    Column('coefficient', Integer, nullable=False),
+)
+
+
+courier_stats_table = Table(
+    'courier_stats',  # Statistic of completed orders by regions, it's updated on completing
+    metadata,
+    Column('courier_id', ForeignKey(couriers_table.c.id), primary_key=True),
+    Column('region', Integer, primary_key=True),
+    Column('duration_sum', BigInteger, nullable=False),
+    Column('completed_count', Integer, nullable=False),
+    Column('coefficient_sum', Integer, nullable=False),
 )
@@ -0,0 +1,40 @@
+from contextvars import ContextVar
+from functools import wraps
+from typing import Awaitable, Callable, List, Optional
+
+from app.db import database
+
+Callback = Callable[[], Awaitable]
+
+_commit_callbacks: ContextVar[Optional[List[Callback]]] = ContextVar('commit_callbacks', default=None)
+
+
+def in_transaction(endpoint):
+    """
+    Statements of endpoint run in one transaction on one connection of pool.
+
+    Transactions started inside of it are savepoints. Transaction is
+    committed before response is sent, and it's rolled back by exception.
+    """
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        callbacks = []
+        token = _commit_callbacks.set(callbacks)
+        try:
+            async with database.transaction():
+                result = await endpoint(*args, **kwargs)
+        finally:
+            _commit_callbacks.reset(token)
+        for callback in callbacks:
+            await callback()
+        return result
+    return wrapper
+
+
+async def on_commit(callback: Callback) -> None:
+    """Callback is called after commit of request transaction or at once out of it."""
+    callbacks = _commit_callbacks.get()
+    if callbacks is None:
+        await callback()
+    else:
+        callbacks.append(callback)
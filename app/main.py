@@ -3,16 +3,27 @@ from fastapi.exceptions import RequestValidationError
 from uvicorn import run
 
 from app.api.errors import validation_exception_handler
+from app.api.matching_executor import matching_executor
+from app.api.metrics import MetricsMiddleware, metrics_enabled, metrics_endpoint
+from app.api.open_orders import open_orders_index
+from app.api.responses import FastJSONResponse
 from app.api.routes import api_router
-from app.db import database
+from app.db import DATABASE_OPTIONS, database
+from app.db.pool import pool_metrics
 
 
 async def startup():
     await database.connect()
+    pool_metrics.instrument(database, DATABASE_OPTIONS['max_size'], count_queries=metrics_enabled)
+    await open_orders_index.start()
+    matching_executor.start()
 
 
 async def shutdown():
+    await matching_executor.stop()
+    await open_orders_index.stop()
     await database.disconnect()
+    pool_metrics.reset()
 
 
 def get_application() -> FastAPI:
@@ -24,6 +35,7 @@ def get_application() -> FastAPI:
             + "\nIf you see 422 in the documentation, ignore it. Keep in mind the note above"
             + "\nBody of 400 response may differ!"
         ),
+        default_response_class=FastJSONResponse,
     )
 
     application.add_event_handler("startup", startup)
@@ -32,6 +44,10 @@ def get_application() -> FastAPI:
     application.add_exception_handler(RequestValidationError, validation_exception_handler)
 
     application.include_router(api_router)
+
+    if metrics_enabled:
+        application.add_middleware(MetricsMiddleware)
+        application.add_route('/metrics', metrics_endpoint, include_in_schema=False)
     return application
 
 
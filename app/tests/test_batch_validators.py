@@ -0,0 +1,115 @@
+import random
+import re
+from itertools import product
+from time import strptime
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.models import CouriersPostRequest, OrdersPostRequest
+from app.benchmarks.data_generator import random_period
+from app.utils.batch_validators import validate_couriers_batch, validate_orders_batch
+from app.utils.constants import TIME_TEMPLATE
+from app.utils.periods import time_to_minutes
+
+INVALID_VALUES = [
+    None, True, False, 0, -1, 10 ** 20, 0.001, 0.01, 50, 50.01, 2.5, float('nan'), float('inf'),
+    '1', '2.5', '', 'foot', 'bike', 'plane', [], [1], [0], [-1], [True], ['1'], {}, (1,),
+    ['10:00-11:00'], ['10:00-11:00', '9:5-23:59'], ['24:00-24:30'], ['10:00 11:00'], ['10:00-11:00-12:00'],
+    [' 10:00-11:00'], ['10:00-11:00\n'], ['١٠:00-11:00'], [10], 'x' * 3,
+]
+
+
+def validate(model, payload):
+    """Result of validation which may be compared."""
+    try:
+        return model.validate(payload).dict()
+    except ValidationError as exc:
+        return exc.errors()
+
+
+def fast_validate(model, payload):
+    try:
+        return model.validate_fast(payload).dict()
+    except ValidationError as exc:
+        return exc.errors()
+
+
+def random_hours(rnd: random.Random) -> str:
+    """Leading zeros are dropped sometimes, both formats must be validated the same way."""
+    period = random_period(rnd, overnight_share=0.5)
+    return re.sub(r'\b0(\d)', r'\1', period) if rnd.random() < 0.5 else period
+
+
+def random_courier(rnd: random.Random, courier_id: int) -> dict:
+    return {
+        'courier_id': courier_id,
+        'courier_type': rnd.choice(['foot', 'bike', 'car']),
+        'regions': rnd.sample(range(1, 100), rnd.randrange(0, 4)),
+        'working_hours': [random_hours(rnd) for _ in range(rnd.randrange(0, 3))],
+    }
+
+
+def random_order(rnd: random.Random, order_id: int) -> dict:
+    return {
+        'order_id': order_id,
+        'weight': rnd.choice([rnd.randrange(1, 51), round(rnd.uniform(0.01, 50), 2)]),
+        'region': rnd.randrange(1, 100),
+        'delivery_hours': [random_hours(rnd) for _ in range(rnd.randrange(1, 3))],
+    }
+
+
+def mutate(rnd: random.Random, payload: dict, id_key: str, field_name: str) -> dict:
+    items = payload.get('data')
+    if not isinstance(items, list) or not items or not isinstance(items[0], dict):
+        return payload  # Data is already invalid
+    item = rnd.choice(items)
+    mutation = rnd.randrange(5)
+    if mutation == 0:
+        item[rnd.choice(list(item))] = rnd.choice(INVALID_VALUES)
+    elif mutation == 1:
+        del item[rnd.choice(list(item))]
+    elif mutation == 2:
+        item['unknown'] = 1
+    elif mutation == 3 and id_key in item:
+        item[field_name] = item.pop(id_key)  # Field name instead of alias is valid
+    else:
+        payload[rnd.choice(['data', 'unknown'])] = rnd.choice(INVALID_VALUES)
+    return payload
+
+
+def test_time_regex_is_the_same_as_strptime():
+    alphabet = '01245:9 x٣'
+    for length in range(1, 6):
+        for chars in product(alphabet, repeat=length):
+            time_str = ''.join(chars)
+            try:
+                parsed = strptime(time_str, TIME_TEMPLATE)
+                expected = parsed.tm_hour * 60 + parsed.tm_min
+            except ValueError:
+                expected = None
+            try:
+                assert time_to_minutes(time_str) == expected, time_str
+            except ValueError:
+                assert expected is None, time_str
+
+
+@pytest.mark.parametrize('model, generate, id_key, field_name', [
+    (CouriersPostRequest, random_courier, 'courier_id', 'id'),
+    (OrdersPostRequest, random_order, 'order_id', 'id'),
+])
+def test_fast_validation_is_the_same_as_models(model, generate, id_key, field_name):
+    rnd = random.Random(0)
+    for _ in range(1000):
+        payload = {'data': [generate(rnd, i) for i in range(rnd.randrange(0, 5))]}
+        assert fast_validate(model, payload) == validate(model, payload), payload
+        if payload['data'] and rnd.random() < 0.9:
+            for _ in range(rnd.randrange(1, 3)):
+                payload = mutate(rnd, payload, id_key, field_name)
+            assert fast_validate(model, payload) == validate(model, payload), payload
+
+
+def test_valid_batches_are_not_validated_by_models():
+    rnd = random.Random(0)
+    assert validate_couriers_batch([random_courier(rnd, i) for i in range(100)]) is not None
+    assert validate_orders_batch([random_order(rnd, i) for i in range(100)]) is not None
@@ -0,0 +1,22 @@
+from app.utils.buckets import RegionHourBuckets
+from app.utils.periods import periods_hours
+
+
+def test_periods_hours():
+    assert periods_hours([(600, 660), (650, 725)]) == {10, 11, 12}
+    assert periods_hours([(1380, 60)]) == set(range(1, 24))  # The same as segment 01:00-23:00
+    assert periods_hours([]) == set()
+
+
+def test_region_hour_buckets():
+    buckets = RegionHourBuckets()
+    buckets.add(1, [(600, 660)], (2.0, 1))
+    buckets.add(1, [(630, 640)], (1.0, 2))
+    buckets.add(2, [(600, 610)], (1.0, 3))
+    assert sorted(buckets.find({1, 2}, [(600, 601)])) == [[(1.0, 2), (2.0, 1)], [(1.0, 3)]]
+    assert buckets.find({1}, [(660, 700)]) == [[(2.0, 1)]]
+
+    buckets.remove(1, [(600, 660)], (2.0, 1))
+    assert buckets.find({1}, [(600, 700)]) == [[(1.0, 2)]]
+    buckets.clear()
+    assert buckets.find({1, 2}, [(0, 1439)]) == []
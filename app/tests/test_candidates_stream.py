@@ -0,0 +1,123 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.courier_context import CourierContext
+from app.api.load_selector import GreedyLoadSelector
+from app.api.open_orders import open_orders_index
+from app.api.order_batch import OrderBatch
+from app.api.order_filter import OrderFilter
+from app.api.order_selector import OrderSelector
+from app.db import database
+from app.db.managers import CouriersManager
+from app.main import app
+from app.tests.utils import run
+
+
+async def counted(rows, consumed):
+    """Counts rows which are read from stream."""
+    try:
+        async for row in rows:
+            consumed[0] += 1
+            yield row
+    finally:
+        await rows.aclose()
+
+
+class TestCandidatesStream:
+
+    def test_the_same_as_greedy_filter(self, temp_db):
+        rnd = random.Random(0)
+        with TestClient(app) as client:
+            couriers = [
+                {
+                    "courier_id": i,
+                    "courier_type": rnd.choice(["foot", "bike", "car"]),
+                    "regions": rnd.sample(range(1, 6), rnd.randrange(1, 4)),
+                    "working_hours": rnd.choice([["08:00-12:00"], ["10:00-14:00", "18:00-21:00"]]),
+                }
+                for i in range(1, 11)
+            ]
+            orders = [
+                {
+                    "order_id": i,
+                    "weight": round(rnd.uniform(0.01, 5), 2),
+                    "region": rnd.randrange(1, 6),
+                    "delivery_hours": rnd.choice([["09:00-10:00"], ["13:00-15:00"], ["20:00-22:00"]]),
+                }
+                for i in range(1, 301)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+
+            async def compare():
+                async with database.transaction():
+                    for db_courier in await CouriersManager.get([courier["courier_id"] for courier in couriers]):
+                        context = CourierContext(db_courier)
+                        context.load_selector = GreedyLoadSelector()
+                        order_selector, order_filter = OrderSelector(context), OrderFilter(context)
+                        for load, skipped_ids in ((0, set()), (3, {1, 2, 3, 4, 5})):
+                            expected = await order_selector.select_not_assigned_orders(
+                                context.regions, context.capacity, context.working_minutes,
+                            )
+                            expected = order_filter.filter_by_courier_features(
+                                expected.without_ids(skipped_ids), load,
+                            )
+                            from_database = OrderSelector.iterate_not_assigned_orders(
+                                context.regions, context.capacity - load, context.working_minutes,
+                            )
+                            assert open_orders_index.ready  # Suited orders are iterated by index
+                            for rows in (order_selector.iterate_suited_orders(load), from_database):
+                                streamed = await order_filter.stream_by_courier_features(rows, load, skipped_ids)
+                                for column in OrderBatch.__slots__:
+                                    assert getattr(streamed, column) == getattr(expected, column)
+
+            run(compare())
+
+    @pytest.mark.parametrize('index_enabled', [True, False])
+    def test_stream_is_stopped_by_capacity(self, temp_db, monkeypatch, index_enabled):
+        monkeypatch.setattr(open_orders_index, "enabled", index_enabled)
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": i, "weight": 1 + i / 100, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in range(500, 0, -1)
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+
+            async def stream():
+                consumed = [0]
+                async with database.transaction():
+                    context = CourierContext(await CouriersManager.get([1], many=False))
+                    orders = await OrderFilter(context).stream_by_courier_features(
+                        counted(OrderSelector(context).iterate_suited_orders(), consumed),
+                    )
+                    # Cursor is closed, so connection is free for the next queries
+                    assert open_orders_index.ready == index_enabled
+                    assert await database.fetch_val("SELECT count(*) FROM orders") == 500
+                return orders.ids, consumed[0]
+
+            orders_ids, consumed = run(stream())
+            assert orders_ids == list(range(1, 10))  # Power of foot courier is 10
+            assert consumed == 10  # The first one which doesn't fit stops reading
+
+    def test_assign_without_open_orders_index(self, temp_db, monkeypatch):
+        monkeypatch.setattr(open_orders_index, "enabled", False)
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1, 2], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": 1, "weight": 6, "region": 1, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 2, "weight": 3, "region": 2, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 3, "weight": 2, "region": 3, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 4, "weight": 4, "region": 1, "delivery_hours": ["20:00-21:00"]},
+                {"order_id": 5, "weight": 5, "region": 1, "delivery_hours": ["17:00-19:00"]},
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            assert not open_orders_index.ready
+
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.status_code == 200
+            assert response.json()["orders"] == [{"id": 2}, {"id": 5}]
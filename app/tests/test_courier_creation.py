@@ -87,3 +87,19 @@ class TestCreateCourier:
             )
 
             assert response.status_code == 400
+
+    def test_existing_couriers(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+                for i in (1, 2, 3)
+            ]
+            assert client.post("/couriers", json={"data": couriers[:2]}).status_code == 201
+
+            response = client.post("/couriers", json={"data": couriers[::-1]})
+            assert response.status_code == 400
+            assert response.json() == {"validation_error": {"couriers": [
+                {"id": 2, "msg": "Already exists."},
+                {"id": 1, "msg": "Already exists."},
+            ]}}
+            assert client.get("/couriers/3").status_code == 400  # Nothing is created
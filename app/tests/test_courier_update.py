@@ -0,0 +1,63 @@
+import threading
+from time import perf_counter
+
+import psycopg2
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.constants import COURIER_LOCK_CLASS
+
+
+class TestUpdateCourier:
+
+    def test_unassign_unsuited_orders(self, temp_db):
+        with TestClient(app) as client:
+            courier = {
+                "courier_id": 1,
+                "courier_type": "car",
+                "regions": [1, 2],
+                "working_hours": ["09:00-18:00"],
+            }
+            orders = [
+                {"order_id": 1, "weight": 12, "region": 1, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 2, "weight": 1, "region": 1, "delivery_hours": ["17:00-19:00"]},
+                {"order_id": 3, "weight": 1, "region": 2, "delivery_hours": ["10:00-11:00"]},
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert len(response.json()["orders"]) == 3
+
+            response = client.patch("/couriers/1", json={"working_hours": ["08:00-12:00"]})
+            assert response.status_code == 200
+            assert response.json() == {**courier, "working_hours": ["08:00-12:00"]}
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert sorted(order["id"] for order in response.json()["orders"]) == [1, 3]
+
+            response = client.patch("/couriers/1", json={"courier_type": "bike", "regions": [2, 3]})
+            assert response.status_code == 200
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.json()["orders"] == [{"id": 3}]
+
+    def test_not_existing_courier(self, temp_db):
+        with TestClient(app) as client:
+            response = client.patch("/couriers/1", json={"regions": [1]})
+            assert response.status_code == 400
+
+    def test_waits_for_assign_lock(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+
+            connection = psycopg2.connect(temp_db)  # Holds lock of courier like concurrent assign
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, 1)", (COURIER_LOCK_CLASS,))
+            release = threading.Timer(0.5, connection.commit)
+            release.start()
+            try:
+                start = perf_counter()
+                assert client.patch("/couriers/1", json={"regions": [2]}).status_code == 200
+                assert perf_counter() - start >= 0.5
+            finally:
+                release.join()
+                connection.close()
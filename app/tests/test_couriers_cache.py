@@ -0,0 +1,100 @@
+import asyncio
+from copy import deepcopy
+
+from fastapi.testclient import TestClient
+
+from app.db.cache import CacheBackend, LRUCacheBackend, RecordsCache
+from app.db.managers import CouriersManager
+from app.main import app
+from app.tests.utils import run
+
+
+class FakeSharedBackend(CacheBackend):
+    """Records are copied like they are serialized by external storage."""
+
+    def __init__(self):
+        self.records = {}
+
+    async def get_many(self, keys):
+        return {key: deepcopy(self.records[key]) for key in keys if key in self.records}
+
+    async def set_many(self, records):
+        self.records.update(deepcopy(records))
+
+    async def delete_many(self, keys):
+        for key in keys:
+            self.records.pop(key, None)
+
+    async def clear(self):
+        self.records.clear()
+
+
+class TestLRUCacheBackend:
+
+    def test_eviction(self):
+        backend = LRUCacheBackend(maxsize=2, ttl=60)
+        run(backend.set_many({1: {"id": 1}, 2: {"id": 2}}))
+        assert run(backend.get_many([1])) == {1: {"id": 1}}  # 2 is the least recently used now
+        run(backend.set_many({3: {"id": 3}}))
+        assert run(backend.get_many([1, 2, 3])) == {1: {"id": 1}, 3: {"id": 3}}
+
+    def test_expiration(self):
+        backend = LRUCacheBackend(maxsize=2, ttl=-1)
+        run(backend.set_many({1: {"id": 1}}))
+        assert run(backend.get_many([1])) == {}
+        assert len(backend) == 0
+
+
+class TestCouriersCache:
+
+    def test_invalidation_on_update(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+
+            assert client.get("/couriers/1").json()["regions"] == [1]
+            stats = CouriersManager.cache.stats()
+            assert client.get("/couriers/1").json()["regions"] == [1]
+            assert CouriersManager.cache.stats()["hits"] == stats["hits"] + 1
+            assert CouriersManager.cache.stats()["misses"] == stats["misses"]
+
+            response = client.patch("/couriers/1", json={"regions": [2, 3]})
+            assert response.json()["regions"] == [2, 3]
+            assert client.get("/couriers/1").json()["regions"] == [2, 3]
+
+    def test_invalidation_on_delete(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+                for i in (1, 2)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.get("/couriers/1").status_code == 200
+
+            assert run(CouriersManager.delete([1, 3])) == [1]
+            assert run(CouriersManager.get([1, 2])) == run(CouriersManager.get([2]))
+            assert client.get("/couriers/1").status_code == 400
+
+    def test_shared_backend(self, temp_db, monkeypatch):
+        cache = RecordsCache(FakeSharedBackend())
+        monkeypatch.setattr(CouriersManager, "cache", cache)
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "bike", "regions": [1], "working_hours": ["09:00-18:00"]}
+                for i in (1, 2)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+
+            loop = asyncio.get_event_loop()
+            db_couriers = loop.run_until_complete(CouriersManager.get([2, 1, 2]))
+            assert sorted(courier.id for courier in db_couriers) == [1, 2]
+            assert cache.stats() == {"hits": 0, "misses": 2, "hit_ratio": 0}
+            db_couriers = loop.run_until_complete(CouriersManager.get([1, 2]))
+            assert sorted(courier.id for courier in db_couriers) == [1, 2]
+            assert db_couriers[0].working_minutes == [(540, 1080)]
+            assert cache.stats() == {"hits": 2, "misses": 2, "hit_ratio": 0.5}
+
+            response = client.patch("/couriers/2", json={"courier_type": "car"})
+            assert response.status_code == 200
+            assert 2 not in cache.backend.records
+            assert client.get("/couriers/2").json()["courier_type"] == "car"
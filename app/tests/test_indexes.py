@@ -0,0 +1,62 @@
+import psycopg2
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.api.open_orders import NOT_ASSIGNED_ORDERS_QUERY
+from app.db import database
+from app.main import app
+
+
+def compile_query(query):
+    return query.compile(dialect=postgresql.psycopg2.dialect())
+
+
+def explain(db_url: str, query) -> str:
+    """Plan of query when sequential scans are avoided by planner if index may be used."""
+    compiled = compile_query(query)
+    with psycopg2.connect(db_url) as connection, connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute(f'EXPLAIN {compiled}', compiled.params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+class TestHotQueriesUseIndexes:
+
+    def test_couriers_orders_queries(self, temp_db, monkeypatch):
+        queries = []
+
+        def record(method):
+            async def wrapper(query, *args, **kwargs):
+                sql = str(compile_query(query)) if hasattr(query, 'compile') else query
+                if 'couriers_orders' in sql and not sql.startswith('INSERT'):
+                    queries.append(query)
+                return await method(query, *args, **kwargs)
+            return wrapper
+
+        for method_name in ('fetch_all', 'fetch_one', 'execute'):
+            monkeypatch.setattr(database, method_name, record(getattr(database, method_name)))
+
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": i, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in range(1, 4)
+            ]
+            client.post("/couriers", json={"data": [courier]})
+            client.post("/orders", json={"data": orders})
+            client.post("/orders/assign", json={"courier_id": 1})
+            for order_id in (1, 2):
+                response = client.post("/orders/complete", json={
+                    "courier_id": 1, "order_id": order_id, "complete_time": "2030-01-01T10:00:00.00Z",
+                })
+                assert response.status_code == 200
+            client.post("/orders/assign", json={"courier_id": 1})
+            client.get("/couriers/1")
+
+        monkeypatch.undo()
+        assert len(queries) >= 4
+        queries.append(text(NOT_ASSIGNED_ORDERS_QUERY))  # Index of open orders reads it by its own connection
+        for query in queries:
+            plan = explain(temp_db, query)
+            assert 'Seq Scan on couriers_orders' not in plan, f'{query}\n{plan}'
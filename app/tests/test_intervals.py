@@ -0,0 +1,24 @@
+import random
+
+from app.utils.intervals import IntervalIndex
+
+
+def test_interval_index_intersects():
+    index = IntervalIndex([(600, 700), (100, 200), (150, 300), (900, 900)])
+    assert index.intersects(300, 400)  # Touches end of merged interval
+    assert index.intersects(0, 100)
+    assert index.intersects(900, 1000)
+    assert not index.intersects(301, 599)
+    assert not index.intersects(901, 1439)
+    assert not IntervalIndex([])
+
+
+def test_interval_index_equals_brute_force():
+    rnd = random.Random(0)
+    for _ in range(200):
+        periods = [tuple(rnd.sample(range(1440), 2)) for _ in range(rnd.randrange(1, 5))]
+        index = IntervalIndex(periods)
+        for _ in range(20):
+            start, end = rnd.sample(range(1440), 2)  # Start may be after end
+            expected = any(end >= p_start and start <= p_end for p_start, p_end in periods)
+            assert index.intersects(start, end) == expected
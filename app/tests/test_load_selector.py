@@ -0,0 +1,68 @@
+import random
+from itertools import combinations
+
+from app.api.load_selector import (
+    ApproximateLoadSelector, ExactLoadSelector, GreedyLoadSelector, to_weight_units,
+)
+from app.api.models import Order
+
+
+def make_orders(weights):
+    return [
+        Order(id=i, weight=weight, region=1, delivery_hours=['10:00-11:00'])
+        for i, weight in enumerate(weights, start=1)
+    ]
+
+
+def select(load_selector, orders, courier_power):
+    return [orders[i] for i in load_selector.select_positions([order.weight for order in orders], courier_power)]
+
+
+def total_weight(orders):
+    return sum(to_weight_units(order.weight) for order in orders)
+
+
+def best_selection(orders, courier_power):
+    """Brute force: max amount of orders and then max weight."""
+    capacity = to_weight_units(courier_power)
+    for amount in range(len(orders), -1, -1):
+        weights = [
+            total_weight(selection) for selection in combinations(orders, amount)
+            if total_weight(selection) <= capacity
+        ]
+        if weights:
+            return amount, max(weights)
+
+
+def test_greedy_selector():
+    orders = make_orders([2.06, 1.69, 2.72, 0.56, 2.97, 0.01])
+    selected = select(GreedyLoadSelector(), orders, 10)
+    assert [order.id for order in selected] == [6, 4, 2, 1, 3]
+
+    orders = make_orders([2.06, 1.69, 2.72, 0.56, 2.97])
+    selected = select(GreedyLoadSelector(), orders, 10)
+    assert len(selected) == 5  # Float sum of these weights is 10.000000000000002
+
+    assert select(GreedyLoadSelector(), make_orders([6, 7]), 10) == make_orders([6])
+
+
+def test_exact_selector_loads_courier_better():
+    orders = make_orders([3, 3, 4.5, 6.99])
+    selected = select(ExactLoadSelector(), orders, 10)
+    assert total_weight(selected) == 999  # 3 + 6.99 instead of 3 + 3
+    assert len(selected) == 2
+
+
+def test_selectors_equal_brute_force():
+    rnd = random.Random(0)
+    for _ in range(100):
+        orders = make_orders([round(rnd.uniform(0.01, 8), 2) for _ in range(rnd.randrange(1, 9))])
+        amount, weight = best_selection(orders, 10)
+
+        exact = select(ExactLoadSelector(time_limit=1), orders, 10)
+        assert (len(exact), total_weight(exact)) == (amount, weight)
+
+        greedy = select(GreedyLoadSelector(), orders, 10)
+        approximate = select(ApproximateLoadSelector(time_limit=1), orders, 10)
+        assert len(approximate) == len(greedy) == amount
+        assert total_weight(greedy) <= total_weight(approximate) <= weight
@@ -0,0 +1,39 @@
+from app.api.models import Courier, Order
+from app.db.managers import CouriersManager, OrdersManager
+
+COURIER_RECORD = {
+    'id': 1, 'type': 'bike', 'regions': [1, 12],
+    'working_hours': ['09:00-12:00', '13:00-18:00'], 'working_starts': [540, 780], 'working_ends': [720, 1080],
+}
+ORDER_RECORD = {
+    'id': 2, 'weight': 3, 'region': 12,
+    'delivery_hours': ['10:00-11:00'], 'delivery_starts': [600], 'delivery_ends': [660],
+}
+
+
+class TestTrustedRecords:
+
+    def test_the_same_as_validated_models(self):
+        courier = CouriersManager.from_record(COURIER_RECORD)
+        validated = Courier(**{field: COURIER_RECORD[field] for field in Courier.__fields__})
+        assert courier == validated
+        assert courier.working_minutes == validated.working_minutes
+        assert type(courier.type) is type(validated.type)
+
+        order = OrdersManager.from_record(ORDER_RECORD)
+        validated = Order(**{field: ORDER_RECORD[field] for field in Order.__fields__})
+        assert order == validated
+        assert order.delivery_minutes == validated.delivery_minutes
+        assert type(order.weight) is float
+
+    def test_lists_of_records_are_not_shared(self):
+        """Records may be cached, so models must not change them."""
+        courier = CouriersManager.from_record(COURIER_RECORD)
+        courier.regions.append(3)
+        courier.working_hours.clear()
+        assert COURIER_RECORD['regions'] == [1, 12]
+        assert len(COURIER_RECORD['working_hours']) == 2
+
+        order = OrdersManager.from_record(ORDER_RECORD)
+        order.delivery_hours.clear()
+        assert ORDER_RECORD['delivery_hours'] == ['10:00-11:00']
@@ -0,0 +1,117 @@
+import asyncio
+import random
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.api.batch_assigner import distribute_positions
+from app.api.courier_context import CourierContext
+from app.api.load_selector import get_load_selector
+from app.api.matching_executor import MatchingExecutor, matching_executor
+from app.api.metrics import MATCHING_POOL_JOBS
+from app.api.models import Courier
+from app.api.order_batch import OrderBatch
+from app.api.order_filter import OrderFilter, match_positions
+from app.benchmarks.filter_by_time import generate_orders
+from app.db.schema import CourierTypeEnum
+from app.main import app
+from app.tests.utils import run
+
+
+def wait_released(released: threading.Event, timeout: float) -> bool:
+    return released.wait(timeout)
+
+
+async def run_gated_job(executor: MatchingExecutor, orders_amount: int, ticks_to_release: int, timeout: float):
+    """
+    Event loop sets event after some iterations (callbacks by call_soon), the job
+    waits for it. So the job is released only if loop runs while the job runs.
+    """
+    loop = asyncio.get_running_loop()
+    released, ticks = threading.Event(), 0
+
+    def tick():
+        nonlocal ticks
+        if released.is_set():
+            return
+        ticks += 1
+        if ticks == ticks_to_release:
+            released.set()
+        else:
+            loop.call_soon(tick)
+
+    loop.call_soon(tick)
+    job_released = await executor.run(orders_amount, wait_released, released, timeout)
+    released.set()  # Ticks are stopped
+    return job_released, ticks
+
+
+def test_match_positions_is_the_same_as_filter():
+    rnd = random.Random(0)
+    courier = Courier(
+        id=1, type=CourierTypeEnum.car, regions=list(range(1, 100, 2)), working_hours=['08:00-12:00', '15:00-18:00'],
+    )
+    context = CourierContext(courier)
+    orders = OrderBatch.from_orders(generate_orders(3000, rnd))
+    expected = OrderFilter(context).filter_by_courier_features(orders, 5)
+
+    executor = MatchingExecutor('process', workers=1, inline_max_orders=100)
+    executor.start()
+    try:
+        positions = run(executor.run(
+            len(orders), match_positions, orders.regions, orders.weights, orders.delivery_minutes,
+            context.regions, context.working_minutes, context.capacity - 5, context.load_selector,
+        ))
+    finally:
+        run(executor.stop())
+    assert orders.take(positions).ids == expected.ids
+
+
+def test_distribute_positions_in_pool_is_the_same():
+    rnd = random.Random(0)
+    orders = OrderBatch.from_orders(generate_orders(3000, rnd))
+    couriers = [
+        (frozenset(rnd.sample(range(1, 100), 10)), [(480, 720)], get_load_selector(courier_type), 50)
+        for courier_type in CourierTypeEnum
+    ]
+    args = orders.regions, orders.weights, orders.delivery_minutes, couriers
+    expected = distribute_positions(*args)
+    assert any(expected)
+
+    executor = MatchingExecutor('process', workers=1, inline_max_orders=100)
+    executor.start()
+    try:
+        assert run(executor.run(len(orders), distribute_positions, *args)) == expected
+    finally:
+        run(executor.stop())
+
+
+class TestMatchingExecutor:
+
+    def test_event_loop_runs_while_job_is_in_pool(self):
+        executor = MatchingExecutor('thread', workers=1, inline_max_orders=10)
+        executor.start()
+        try:
+            assert run(run_gated_job(executor, 11, 100, 5)) == (True, 100)
+            assert run(run_gated_job(executor, 10, 100, 0.1)) == (False, 0)  # Inline job blocks event loop
+        finally:
+            run(executor.stop())
+
+    def test_big_assign_is_matched_by_pool(self, temp_db, monkeypatch):
+        monkeypatch.setenv('LOAD_STRATEGY_CAR', 'exact')  # Greedy strategy streams orders without pool
+        rnd = random.Random(0)
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["00:00-23:59"]}
+            orders = [
+                {"order_id": i, "weight": round(rnd.uniform(0.5, 5), 2), "region": 1, "delivery_hours": ["10:00-12:00"]}
+                for i in range(1, matching_executor.inline_max_orders + 2)
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            assert matching_executor.started
+
+            pool_jobs = sum(value for _, _, value in MATCHING_POOL_JOBS.samples())
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.status_code == 200
+            assert sum(value for _, _, value in MATCHING_POOL_JOBS.samples()) == pool_jobs + 1
+            assert sum(orders[order["id"] - 1]["weight"] for order in response.json()["orders"]) <= 50
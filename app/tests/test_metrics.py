@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import metrics
+from app.api.metrics import instrument_stage
+from app.main import app
+from app.utils.metrics import Counter, Histogram, Registry
+
+
+def sample_value(text: str, sample: str) -> float:
+    for line in text.splitlines():
+        name, _, value = line.rpartition(' ')
+        if name == sample:
+            return float(value)
+    raise KeyError(sample)
+
+
+class TestMetricsFormat:
+
+    def test_render(self):
+        registry = Registry()
+        histogram = registry.register(Histogram('latency_seconds', 'Latency.', ['stage'], buckets=[0.1, 1]))
+        counter = registry.register(Counter('errors_total', 'Errors.', ['stage']))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, stage='a"b')
+        counter.inc(stage='x')
+        counter.inc(2, stage='x')
+        assert registry.render() == (
+            '# HELP latency_seconds Latency.\n'
+            '# TYPE latency_seconds histogram\n'
+            'latency_seconds_bucket{stage="a\\"b",le="0.1"} 2\n'
+            'latency_seconds_bucket{stage="a\\"b",le="1"} 3\n'
+            'latency_seconds_bucket{stage="a\\"b",le="+Inf"} 4\n'
+            'latency_seconds_sum{stage="a\\"b"} 2.65\n'
+            'latency_seconds_count{stage="a\\"b"} 4\n'
+            '# HELP errors_total Errors.\n'
+            '# TYPE errors_total counter\n'
+            'errors_total{stage="x"} 3\n'
+        )
+
+    def test_stage_is_not_wrapped_if_metrics_disabled(self, monkeypatch):
+        async def stage(self, orders):
+            return orders
+
+        monkeypatch.setattr(metrics, 'metrics_enabled', False)
+        assert instrument_stage('stage')(stage) is stage
+        monkeypatch.setattr(metrics, 'metrics_enabled', True)
+        assert instrument_stage('stage')(stage) is not stage
+
+
+class TestMetricsEndpoint:
+
+    @pytest.mark.parametrize('strategy, stages', [
+        ('greedy', ('stream_filter', 'assign')),  # Greedy selection streams the lightest orders
+        ('exact', ('select_suited_orders', 'filter_by_region', 'filter_by_time', 'filter_by_weight', 'assign')),
+    ])
+    def test_assign_metrics(self, temp_db, monkeypatch, strategy, stages):
+        monkeypatch.setenv('LOAD_STRATEGY_FOOT', strategy)
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 2, "weight": 1, "region": 2, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 3, "weight": 1, "region": 1, "delivery_hours": ["19:00-20:00"]},
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+
+            before = client.get("/metrics").text
+            assert client.post("/orders/assign", json={"courier_id": 1}).json()["orders"] == [{"id": 1}]
+            response = client.get("/metrics")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+            after = response.text
+
+        def delta(sample):
+            try:
+                previous = sample_value(before, sample)
+            except KeyError:
+                previous = 0
+            return sample_value(after, sample) - previous
+
+        for stage in stages:
+            assert delta(f'stage_duration_seconds_count{{stage="{stage}"}}') == 1
+        if strategy == 'exact':
+            # Index of open orders gives orders of courier regions and hours, the filters check them again
+            assert delta('stage_orders_sum{stage="filter_by_region",direction="in"}') == 1
+            assert delta('stage_orders_sum{stage="filter_by_weight",direction="out"}') == 1
+        else:
+            assert delta('stage_orders_sum{stage="stream_filter",direction="out"}') == 1
+        assert delta('stage_orders_sum{stage="assign",direction="out"}') == 1
+        assert delta('http_request_duration_seconds_count{endpoint="assign_orders_to_courier",method="POST",status="200"}') == 1
+        assert delta('http_request_db_queries_count{endpoint="assign_orders_to_courier"}') == 1
+        assert delta('http_request_db_queries_sum{endpoint="assign_orders_to_courier"}') >= 3
+        assert sample_value(after, 'db_pool_in_use') == 0
+        assert sample_value(after, 'open_orders_indexed') == 2
@@ -0,0 +1,112 @@
+import asyncio
+import random
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.api.courier_context import CourierContext
+from app.api.open_orders import open_orders_index
+from app.api.order_assigner import OrderAssigner
+from app.api.order_batch import OrderBatch
+from app.api.order_selector import OrderSelector
+from app.benchmarks.data_generator import random_period
+from app.db import database
+from app.db.managers import CouriersManager, OrdersManager
+from app.db.schema import couriers_orders_table, orders_table
+from app.main import app
+from app.tests.utils import run
+from app.utils.periods import periods_to_minutes
+
+OVERNIGHT_SHARE = 0.1  # Periods like '22:00-02:00' are rare
+
+
+def find_ids(regions, max_weight, working_minutes):
+    return run(open_orders_index.find(regions, max_weight, working_minutes)).ids
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    """Notifications are received while event loop runs."""
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return True
+        run(asyncio.sleep(0.05))
+    return condition()
+
+
+class TestOpenOrdersIndex:
+
+    def test_the_same_as_select(self, temp_db):
+        rnd = random.Random(0)
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "car", "regions": [i], "working_hours": ["00:00-23:59"]}
+                for i in range(1, 3)
+            ]
+            orders = [
+                {
+                    "order_id": i,
+                    "weight": round(rnd.uniform(0.01, 50), 2),
+                    "region": rnd.randrange(1, 6),
+                    "delivery_hours": [random_period(rnd, OVERNIGHT_SHARE) for _ in range(rnd.randrange(1, 3))],
+                }
+                for i in range(1, 301)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            for courier in couriers:
+                assert client.post("/orders/assign", json={"courier_id": courier["courier_id"]}).json()["orders"]
+            assert open_orders_index.ready
+
+            for _ in range(200):
+                regions = set(rnd.sample(range(0, 7), rnd.randrange(0, 4)))
+                max_weight = rnd.choice([10, 15, 50, round(rnd.uniform(0, 50), 2)])
+                working_hours = [random_period(rnd, OVERNIGHT_SHARE) for _ in range(rnd.randrange(0, 3))]
+                working_minutes = periods_to_minutes(working_hours)
+                expected = run(OrderSelector.select_not_assigned_orders(regions, max_weight, working_minutes))
+                found = run(open_orders_index.find(regions, max_weight, working_minutes))
+                for column in OrderBatch.__slots__:  # Columns are built by index, not by models
+                    assert getattr(found, column) == getattr(expected, column)
+
+    def test_changes_of_other_workers(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            params = {1}, 50, [(9 * 60, 18 * 60)]
+
+            # Changes are made by queries like other workers do, not by managers
+            order = {"id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+            run(database.execute(orders_table.insert().values(
+                **order, delivery_starts=[600], delivery_ends=[660],
+            )))
+            assert wait_for(lambda: find_ids(*params) == [1])
+
+            run(database.execute(couriers_orders_table.insert().values(
+                courier_id=1, order_id=1, assign_time=datetime.now(), coefficient=9,
+            )))
+            assert wait_for(lambda: find_ids(*params) == [])
+
+            run(database.execute(couriers_orders_table.delete()))
+            assert wait_for(lambda: find_ids(*params) == [1])
+
+    def test_rolled_back_assign(self, temp_db, monkeypatch):
+        monkeypatch.setattr(open_orders_index, "check_delay", 0.2)
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+            order = {"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": [order]}).status_code == 201
+            params = {1}, 50, [(9 * 60, 18 * 60)]
+            assert find_ids(*params) == [1]
+
+            async def assign_and_rollback():
+                transaction = await database.transaction().start()
+                db_courier = await CouriersManager.get([1], many=False)
+                orders = await OrdersManager.get([1])
+                assigned, _ = await OrderAssigner(CourierContext(db_courier)).assign(OrderBatch.from_orders(orders))
+                assert (await open_orders_index.find(*params)).ids == []  # Removed at once
+                await transaction.rollback()
+                return assigned
+
+            assert len(run(assign_and_rollback())) == 1
+            assert find_ids(*params) == []  # Transaction may be not finished yet
+            assert wait_for(lambda: find_ids(*params) == [1])
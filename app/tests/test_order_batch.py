@@ -0,0 +1,64 @@
+import random
+
+from app.api.courier_context import CourierContext
+from app.api.load_selector import GreedyLoadSelector
+from app.api.models import Courier
+from app.api.order_batch import OrderBatch, OrderRow
+from app.api.order_filter import OrderFilter
+from app.benchmarks.filter_by_time import generate_orders
+from app.db.schema import CourierTypeEnum
+from app.utils.constants import COURIER_POWER
+from app.utils.intervals import IntervalIndex
+
+
+def test_batch_from_records_is_the_same_as_from_orders_and_rows():
+    orders = generate_orders(20, random.Random(0))
+    records = [
+        {
+            'id': order.id, 'region': order.region, 'weight': order.weight,
+            'delivery_starts': [start for start, _ in order.delivery_minutes],
+            'delivery_ends': [end for _, end in order.delivery_minutes],
+        }
+        for order in orders
+    ]
+    from_records, from_orders = OrderBatch.from_records(records), OrderBatch.from_orders(orders)
+    from_rows = OrderBatch.from_rows(map(OrderRow.from_record, records))
+    for column in OrderBatch.__slots__:
+        assert getattr(from_records, column) == getattr(from_orders, column) == getattr(from_rows, column)
+    assert list(map(OrderRow.from_order, orders)) == list(map(OrderRow.from_record, records))
+
+
+def test_filter_is_the_same_as_filter_of_models():
+    rnd = random.Random(0)
+    for _ in range(50):
+        orders = generate_orders(rnd.randrange(0, 100), rnd)
+        courier = Courier(
+            id=1,
+            type=rnd.choice(list(CourierTypeEnum)),
+            regions=rnd.sample(range(1, 100), rnd.randrange(1, 60)),
+            working_hours=['08:00-12:00', '15:00-18:00'],
+        )
+        load = rnd.choice([0, 5])
+        context = CourierContext(courier)
+        context.load_selector = GreedyLoadSelector()
+
+        working_index = IntervalIndex(courier.working_minutes)
+        expected = [
+            order for order in orders
+            if order.region in courier.regions and working_index.intersects_any(order.delivery_minutes)
+        ]
+        positions = GreedyLoadSelector().select_positions(
+            [order.weight for order in expected], COURIER_POWER.get(courier.type) - load,
+        )
+        expected = [expected[i] for i in positions]
+        batch = OrderFilter(context).filter_by_courier_features(OrderBatch.from_orders(orders), load)
+        assert batch.ids == [order.id for order in expected]
+        assert batch.weights == [order.weight for order in expected]
+
+
+def test_batch_selection_by_ids():
+    batch = OrderBatch.from_orders(generate_orders(10, random.Random(0)))
+    assert batch.with_ids({2, 5, 11}).ids == [2, 5]
+    assert batch.without_ids({2, 5, 11}).ids == [1, 3, 4, 6, 7, 8, 9, 10]
+    assert len(batch.take([])) == 0
+    assert batch.take([3, 0]).regions == [batch.regions[3], batch.regions[0]]
@@ -0,0 +1,174 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.api.courier_context import CourierContext
+from app.api.mediator import OrderAssignMediator
+from app.db import database
+from app.db.managers import CouriersManager
+from app.db.schema import couriers_orders_table
+from app.main import app
+from app.tests.utils import run
+from app.utils.constants import COURIER_LOCK_CLASS
+
+
+class TestAssignOrders:
+
+    def test_suited_orders(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {
+                    "courier_id": 1,
+                    "courier_type": "foot",
+                    "regions": [1, 2],
+                    "working_hours": ["09:00-12:00", "18:00-20:00"],
+                },
+                {
+                    "courier_id": 2,
+                    "courier_type": "car",
+                    "regions": [1, 2, 3],
+                    "working_hours": ["00:00-23:59"],
+                },
+            ]
+            orders = [
+                {"order_id": 1, "weight": 3, "region": 1, "delivery_hours": ["11:00-13:00"]},
+                {"order_id": 2, "weight": 2, "region": 2, "delivery_hours": ["7:00-8:00", "20:00-21:00"]},
+                {"order_id": 3, "weight": 1, "region": 3, "delivery_hours": ["10:00-11:00"]},  # Other region
+                {"order_id": 4, "weight": 11, "region": 1, "delivery_hours": ["10:00-11:00"]},  # Too heavy
+                {"order_id": 5, "weight": 1, "region": 1, "delivery_hours": ["13:00-17:59"]},  # Other time
+                {"order_id": 6, "weight": 6, "region": 2, "delivery_hours": ["09:30-10:00"]},
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.status_code == 200
+            response_data = response.json()
+            assert response_data["orders"] == [{"id": 2}, {"id": 1}]  # Order 6 exceeds courier power
+            assert response_data["assign_time"] is not None
+
+            # Repeated call returns the same not completed orders
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert sorted(order["id"] for order in response.json()["orders"]) == [1, 2]
+            assert response.json()["assign_time"] == response_data["assign_time"]
+
+            # Orders of the first courier must not be available for the second one
+            response = client.post("/orders/assign", json={"courier_id": 2})
+            assert response.status_code == 200
+            assert sorted(order["id"] for order in response.json()["orders"]) == [3, 4, 5, 6]
+
+    def test_without_suited_orders(self, temp_db):
+        with TestClient(app) as client:
+            courier = {
+                "courier_id": 1,
+                "courier_type": "bike",
+                "regions": [5],
+                "working_hours": ["09:00-12:00"],
+            }
+            order = {"order_id": 1, "weight": 1, "region": 5, "delivery_hours": ["12:01-13:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": [order]}).status_code == 201
+
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.status_code == 200
+            assert response.json() == {"orders": [], "assign_time": None}
+
+
+class TestAssignOrdersBatch:
+
+    def test_assign_batch(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-12:00"]},
+                {"courier_id": 2, "courier_type": "bike", "regions": [1, 2], "working_hours": ["10:00-20:00"]},
+                {"courier_id": 3, "courier_type": "car", "regions": [3], "working_hours": ["09:00-12:00"]},
+            ]
+            orders = [
+                {"order_id": 1, "weight": 4, "region": 1, "delivery_hours": ["11:00-13:00"]},
+                {"order_id": 2, "weight": 5, "region": 1, "delivery_hours": ["08:00-09:00"]},
+                {"order_id": 3, "weight": 2, "region": 2, "delivery_hours": ["19:00-21:00"]},
+                {"order_id": 4, "weight": 3, "region": 1, "delivery_hours": ["13:00-14:00"]},
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            response = client.post("/orders/assign", json={"courier_id": 2})
+            assert response.json()["orders"] == [{"id": 3}, {"id": 4}, {"id": 1}]
+
+            client.post("/orders", json={"data": [
+                {"order_id": 5, "weight": 1, "region": 1, "delivery_hours": ["11:00-13:00"]},
+            ]})
+            response = client.post("/orders/assign/batch", json={"couriers_ids": [1, 2, 3]})
+            assert response.status_code == 200
+            response_data = response.json()["couriers"]
+            assert [courier["courier_id"] for courier in response_data] == [1, 2, 3]
+            assert response_data[0]["orders"] == [{"id": 5}, {"id": 2}]
+            assert response_data[0]["assign_time"] is not None
+            assert sorted(order["id"] for order in response_data[1]["orders"]) == [1, 3, 4]  # Not completed
+            assert response_data[2] == {"courier_id": 3, "orders": [], "assign_time": None}
+
+            # Courier gets the same orders by the single assign
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert sorted(order["id"] for order in response.json()["orders"]) == [2, 5]
+            assert response.json()["assign_time"] == response_data[0]["assign_time"]
+
+    def test_not_existing_couriers(self, temp_db):
+        with TestClient(app) as client:
+            response = client.post("/orders/assign/batch", json={"couriers_ids": [2, 1]})
+            assert response.status_code == 400
+            assert response.json() == {"validation_error": {"couriers": [
+                {"id": 1, "msg": "Courier does not exists."},
+                {"id": 2, "msg": "Courier does not exists."},
+            ]}}
+
+
+class TestConcurrentAssign:
+
+    def test_order_is_assigned_once(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "car", "regions": [1], "working_hours": ["00:00-23:59"]}
+                for i in range(1, 21)
+            ]
+            orders = [
+                {"order_id": i, "weight": 5, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in range(1, 251)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+
+            async def assign(courier_id):
+                return await OrderAssignMediator(await CourierContext.load(courier_id)).assign()
+
+            async def assign_concurrently():
+                return await asyncio.gather(*[
+                    assign(courier["courier_id"])
+                    for courier in couriers + couriers  # The same courier is assigned concurrently too
+                ])
+
+            loop = asyncio.get_event_loop()
+            results = loop.run_until_complete(assign_concurrently())
+            db_assignments = loop.run_until_complete(database.fetch_all(couriers_orders_table.select()))
+
+            db_orders = {}
+            for assignment in db_assignments:
+                db_orders.setdefault(assignment["courier_id"], set()).add(assignment["order_id"])
+            assert len(db_assignments) == len({assignment["order_id"] for assignment in db_assignments})
+            assert all(len(orders_ids) <= 10 for orders_ids in db_orders.values())  # Power of car is 50
+            for courier, (orders_ids, assign_time) in zip(couriers + couriers, results):
+                if orders_ids:  # Courier may get orders by the second request only
+                    assert set(orders_ids) == db_orders[courier["courier_id"]]
+                    assert assign_time is not None
+            assert len(db_orders) > 10
+
+    def test_couriers_locks_have_own_namespace(self, temp_db):
+        with TestClient(app):
+            async def locked_keys():
+                async with database.transaction():
+                    await CouriersManager.lock([3, 1, 3])
+                    return await database.fetch_all(
+                        "SELECT classid, objid, objsubid FROM pg_locks "
+                        "WHERE locktype = 'advisory' AND pid = pg_backend_pid() ORDER BY objid",
+                    )
+
+            keys = [tuple(record.values()) for record in run(locked_keys())]
+            assert keys == [(COURIER_LOCK_CLASS, 1, 2), (COURIER_LOCK_CLASS, 3, 2)]  # objsubid 2 is two-key form
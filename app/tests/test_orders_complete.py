@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.constants import RFC_TIME_FORMAT
+
+
+def shift_time(time: str, seconds: int) -> str:
+    return (datetime.strptime(time, RFC_TIME_FORMAT) + timedelta(seconds=seconds)).strftime(RFC_TIME_FORMAT)
+
+
+class TestCompleteOrders:
+
+    def test_courier_statistic(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1, 2], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 2, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]},
+                {"order_id": 3, "weight": 1, "region": 2, "delivery_hours": ["10:00-11:00"]},
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            assign_time = client.post("/orders/assign", json={"courier_id": 1}).json()["assign_time"]
+
+            # Durations: order 1 - 300 seconds, order 3 - 1200 seconds, order 2 - 300 seconds
+            for order_id, seconds in ((1, 300), (3, 1500), (2, 1800)):
+                response = client.post("/orders/complete", json={
+                    "courier_id": 1, "order_id": order_id, "complete_time": shift_time(assign_time, seconds),
+                })
+                assert response.status_code == 200
+                assert response.json() == {"id": 1}
+
+            response = client.get("/couriers/1")
+            assert response.status_code == 200
+            response_data = response.json()
+            assert response_data["rating"] == 4.58  # Min average duration is 300 seconds in the first region
+            assert response_data["earnings"] == 3000  # 500 * 2 (foot) * 3 orders
+
+    def test_invalid_completion(self, temp_db):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": 1, "courier_type": "bike", "regions": [1], "working_hours": ["09:00-18:00"]},
+                {"courier_id": 2, "courier_type": "bike", "regions": [2], "working_hours": ["09:00-18:00"]},
+            ]
+            order = {"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": [order]}).status_code == 201
+            assign_time = client.post("/orders/assign", json={"courier_id": 1}).json()["assign_time"]
+
+            response = client.post("/orders/complete", json={
+                "courier_id": 3, "order_id": 1, "complete_time": shift_time(assign_time, 60),
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Courier does not exists."}
+
+            response = client.post("/orders/complete", json={
+                "courier_id": 1, "order_id": 2, "complete_time": shift_time(assign_time, 60),
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Order does not exists."}
+
+            response = client.post("/orders/complete", json={
+                "courier_id": 2, "order_id": 1, "complete_time": shift_time(assign_time, 60),
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Courier does not have such order."}
+
+            response = client.post("/orders/complete", json={
+                "courier_id": 1, "order_id": 1, "complete_time": shift_time(assign_time, -60),
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Invalid complete time."}
+
+            complete_request = {"courier_id": 1, "order_id": 1, "complete_time": shift_time(assign_time, 60)}
+            assert client.post("/orders/complete", json=complete_request).status_code == 200
+            response = client.post("/orders/complete", json=complete_request)
+            assert response.status_code == 400
+            assert response.json() == {"msg": "The order has already been completed"}
+
+            response = client.get("/couriers/1")
+            assert response.json()["rating"] == 4.92
+            assert response.json()["earnings"] == 2500
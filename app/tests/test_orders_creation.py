@@ -0,0 +1,109 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.models import Order
+from app.api.orders_stream import iterate_lines
+from app.db import database
+from app.db.managers import OrdersManager
+from app.main import app
+from app.tests.utils import run
+
+
+class TestCreateOrders:
+
+    def test_existing_orders(self, temp_db):
+        with TestClient(app) as client:
+            orders = [
+                {"order_id": i, "weight": 1.5, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in (1, 2)
+            ]
+            assert client.post("/orders", json={"data": orders[:1]}).status_code == 201
+
+            response = client.post("/orders", json={"data": orders})
+            assert response.status_code == 400
+            assert response.json() == {"validation_error": {"orders": [{"id": 1, "msg": "Already exists."}]}}
+            assert client.post("/orders", json={"data": orders[1:]}).status_code == 201
+
+    def test_many_batches_in_one_transaction(self, temp_db):
+        orders = [Order(id=i, weight=1.5, region=1, delivery_hours=["10:00-11:00"]) for i in (1, 2)]
+        with TestClient(app):
+            async def create_batches():
+                async with database.transaction():
+                    return [
+                        await OrdersManager.create_if_not_exist(orders[:1]),
+                        await OrdersManager.create_if_not_exist(orders),
+                        await OrdersManager.create_if_not_exist(orders[1:]),
+                    ]
+
+            assert run(create_batches()) == [[], [1], []]
+            assert [order.id for order in run(OrdersManager.get([1, 2]))] == [1, 2]
+
+
+class TestCreateOrdersFromStream:
+
+    def test_stream(self, temp_db, monkeypatch):
+        monkeypatch.setenv("ORDERS_STREAM_CHUNK_SIZE", "2")
+        with TestClient(app) as client:
+            existing = {"order_id": 4, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+            assert client.post("/orders", json={"data": [existing]}).status_code == 201
+
+            lines = [
+                json.dumps({"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}),
+                json.dumps({"order_id": 2, "weight": 100, "region": 1, "delivery_hours": ["10:00-11:00"]}),
+                "",
+                "{not json",
+                json.dumps({"order_id": 1, "weight": 2, "region": 1, "delivery_hours": ["10:00-11:00"]}),
+                json.dumps({"order_id": 3, "weight": 2, "region": 2, "delivery_hours": ["12:00-13:00"]}),
+                json.dumps({"order_id": 4, "weight": 2, "region": 2, "delivery_hours": ["12:00-13:00"]}),
+                json.dumps({"order_id": 5, "weight": 2, "region": 2, "delivery_hours": ["12:00-13:00"]}),
+            ]
+            response = client.post("/orders/stream", data="\n".join(lines))
+            assert response.status_code == 201
+            response_data = response.json()
+            assert response_data["chunks"] == [
+                {"first_line": 1, "last_line": 6, "orders": [{"id": 1}, {"id": 3}], "existing_orders": []},
+                {"first_line": 7, "last_line": 8, "orders": [], "existing_orders": [{"id": 4}]},
+            ]
+            assert [error["line"] for error in response_data["validation_error"]] == [2, 4, 5]
+            assert response_data["validation_error"][0]["errors"] == [
+                {"loc": ["weight"], "msg": "Weight must be positive!", "type": "value_error"},
+            ]
+            assert response_data["validation_error"][2]["errors"][0]["loc"] == ["order_id"]
+
+            response = client.post("/orders", json={"data": [
+                {"order_id": i, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]} for i in (1, 3, 5)
+            ]})
+            assert response.json() == {"validation_error": {"orders": [
+                {"id": 1, "msg": "Already exists."}, {"id": 3, "msg": "Already exists."},
+            ]}}
+
+    def test_long_line(self, temp_db, monkeypatch):
+        monkeypatch.setenv("ORDERS_STREAM_MAX_LINE_LENGTH", "100")
+        with TestClient(app) as client:
+            lines = [
+                json.dumps({"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"] * 10}),
+                json.dumps({"order_id": 2, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}),
+            ]
+            response = client.post("/orders/stream", data="\n".join(lines))
+            assert response.status_code == 201
+            assert response.json() == {
+                "chunks": [{"first_line": 2, "last_line": 2, "orders": [{"id": 2}], "existing_orders": []}],
+                "validation_error": [{"line": 1, "errors": [
+                    {"loc": ["__root__"], "msg": "Line is longer than 100 bytes!", "type": "value_error"},
+                ]}],
+            }
+
+
+async def iterate_chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_iterate_lines():
+    async def lines(chunks):
+        return [line async for line in iterate_lines(iterate_chunks(chunks), 5)]
+
+    assert run(lines([b'ab', b'c\n\nd', b'e\nabcdef', b'gh\nxy'])) == [(1, b'abc'), (3, b'de'), (4, None), (5, b'xy')]
+    assert run(lines([b'abc', b'def\n', b'  \n', b'ab'])) == [(1, None), (3, b'ab')]
+    assert run(lines([b'abcdef'])) == [(1, None)]
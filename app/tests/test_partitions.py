@@ -0,0 +1,121 @@
+from datetime import date, datetime
+
+import pytest
+from asyncpg.exceptions import UniqueViolationError
+from fastapi.testclient import TestClient
+
+from app.db import database
+from app.db.partitions import archive_partitions, create_partitions, get_partitions
+from app.db.schema import couriers_orders_table
+from app.main import app
+from app.tests.utils import run
+
+
+def assign(order_id: int, assign_time: datetime):
+    run(database.execute(couriers_orders_table.insert().values(
+        courier_id=1, order_id=order_id, assign_time=assign_time, coefficient=2,
+    )))
+
+
+class TestPartitions:
+
+    def test_create_partitions(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            order = {"order_id": 1, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": [order]}).status_code == 201
+            assign(1, datetime(2030, 5, 10, 10))  # Partition doesn't exist yet
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders_default")) == 1
+
+            partitions = run(create_partitions(2, datetime(2030, 4, 20)))
+            assert partitions == ["couriers_orders_2030_04", "couriers_orders_2030_05", "couriers_orders_2030_06"]
+            assert run(create_partitions(1, datetime(2030, 4, 20)))[0] == "couriers_orders_2030_04"  # Existing one
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders_default")) == 0
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders_2030_05")) == 1
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders")) == 1
+
+    def test_order_is_assigned_once(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            orders = [
+                {"order_id": i, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in (1, 2)
+            ]
+            assert client.post("/couriers", json={"data": [courier]}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            assign(1, datetime(2030, 5, 10, 10))
+            with pytest.raises(UniqueViolationError):
+                assign(1, datetime(2030, 6, 10, 10))  # Key of other partition
+            with pytest.raises(UniqueViolationError):
+                run(database.execute(couriers_orders_table.insert().values([
+                    {"courier_id": 1, "order_id": 2, "assign_time": datetime(2030, 5, 10, 10), "coefficient": 2},
+                    {"courier_id": 1, "order_id": 2, "assign_time": datetime(2030, 6, 10, 10), "coefficient": 2},
+                ])))
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders")) == 1
+
+            run(database.execute(couriers_orders_table.delete().where(couriers_orders_table.c.order_id == 1)))
+            assign(1, datetime(2030, 6, 10, 10))  # Unassigned order is assigned again
+            assert run(database.fetch_val("SELECT count(*) FROM couriers_orders")) == 1
+
+    @pytest.mark.parametrize('mode, archive_table', [
+        ('detach', 'couriers_orders_detached_2020_01'),
+        ('move', 'couriers_orders_archive'),
+    ])
+    def test_archive_keeps_statistic(self, temp_db, mode, archive_table):
+        with TestClient(app) as client:
+            couriers = [
+                {"courier_id": i, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+                for i in (1, 2)
+            ]
+            orders = [
+                {"order_id": i, "weight": 1, "region": 1, "delivery_hours": ["10:00-11:00"]}
+                for i in range(1, 4)
+            ]
+            assert client.post("/couriers", json={"data": couriers}).status_code == 201
+            assert client.post("/orders", json={"data": orders}).status_code == 201
+            run(database.fetch_val("SELECT create_couriers_orders_partition('2020-01-01')"))
+            run(database.fetch_val("SELECT create_couriers_orders_partition('2020-02-01')"))
+            assign(1, datetime(2020, 1, 10, 10))
+            assign(2, datetime(2020, 2, 10, 10))  # It isn't completed
+            response = client.post("/orders/complete", json={
+                "courier_id": 1, "order_id": 1, "complete_time": "2020-01-10T10:05:00.00Z",
+            })
+            assert response.status_code == 200
+            statistic = client.get("/couriers/1").json()
+            assert statistic["earnings"] == 1000
+
+            assert run(archive_partitions(date(2020, 3, 1), mode)) == ["couriers_orders_2020_01"]
+            partitions = run(get_partitions())
+            assert "couriers_orders_2020_01" not in partitions
+            assert "couriers_orders_2020_02" in partitions
+            assert run(database.fetch_val(f"SELECT count(*) FROM {archive_table}")) == 1
+            tables = run(database.fetch_all("SELECT tablename FROM pg_tables WHERE tablename LIKE '%detached%'"))
+            assert [record[0] for record in tables] == ([archive_table] if mode == 'detach' else [])
+
+            assert client.get("/couriers/1").json() == statistic
+            response = client.post("/orders/complete", json={  # Only completed orders are archived
+                "courier_id": 1, "order_id": 1, "complete_time": "2020-01-10T10:10:00.00Z",
+            })
+            assert response.status_code == 400
+            if mode == 'move':
+                assert response.json() == {"msg": "The order has already been completed"}
+            else:  # Detached tables are not looked up
+                assert response.json() == {"msg": "Courier does not have such order."}
+            response = client.post("/orders/complete", json={  # Archived order of other courier
+                "courier_id": 2, "order_id": 1, "complete_time": "2020-01-10T10:10:00.00Z",
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Courier does not have such order."}
+            response = client.post("/orders/complete", json={
+                "courier_id": 1, "order_id": 3, "complete_time": "2020-01-10T10:10:00.00Z",
+            })
+            assert response.status_code == 400
+            assert response.json() == {"msg": "Courier does not have such order."}
+            response = client.post("/orders/complete", json={  # Partition with it isn't archived
+                "courier_id": 1, "order_id": 2, "complete_time": "2020-02-10T10:05:00.00Z",
+            })
+            assert response.status_code == 200
+            response = client.post("/orders/assign", json={"courier_id": 1})
+            assert response.status_code == 200
+            assert response.json()["orders"] == [{"id": 3}]  # Archived order isn't assigned again
@@ -0,0 +1,29 @@
+import random
+
+from app.api.courier_context import CourierContext
+from app.api.models import Courier
+from app.api.order_batch import OrderBatch
+from app.benchmarks.filter_by_time import generate_orders
+from app.db.managers import CouriersManager
+
+
+def test_in_regions_is_the_same_as_comprehension():
+    rnd = random.Random(0)
+    for _ in range(200):
+        orders = OrderBatch.from_orders(generate_orders(rnd.randrange(0, 50), rnd))
+        regions = frozenset(rnd.sample(range(1, 100), rnd.randrange(0, 60)))
+        expected = [order_id for order_id, region in zip(orders.ids, orders.regions) if region in regions]
+        assert orders.in_regions(regions).ids == expected
+
+
+def test_regions_set_is_built_once():
+    record = {
+        'id': 1, 'type': 'foot', 'regions': [3, 1, 3],
+        'working_hours': ['09:00-18:00'], 'working_starts': [540], 'working_ends': [1080],
+    }
+    courier = CouriersManager.from_record(record)
+    assert courier.regions_set == {1, 3}
+    assert CourierContext(courier).regions is courier.regions_set
+
+    courier = Courier(courier_id=1, courier_type='foot', regions=[2], working_hours=[])
+    assert courier.regions_set is courier.regions_set == {2}
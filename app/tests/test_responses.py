@@ -0,0 +1,49 @@
+from starlette.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.api import responses
+from app.api.models import CourierGetResponse, OrdersStreamPostResponse
+from app.api.responses import FastJSONResponse
+from app.main import app
+
+
+def starlette_render(content) -> bytes:
+    """Output of routes which return models with response_model."""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+class TestFastJSONResponse:
+    contents = [
+        {"msg": "Курьер не существует \" \\ \n \x01"},
+        CourierGetResponse.construct(
+            id=1, type="bike", regions=[1, 2], working_hours=["09:00-18:00"], rating=4.58, earnings=5000,
+        ),
+        CourierGetResponse(
+            courier_id=1, courier_type="car", regions=[], working_hours=[], rating=None, earnings=0,
+        ),
+        OrdersStreamPostResponse(validation_error=[{"line": 1, "errors": [{"loc": ("weight",), "msg": "0.1"}]}]),
+        [1.0, 0.01, 1e-3, 50.0, 4.99, 123456789.125, True, None],
+    ]
+
+    def test_the_same_output(self):
+        for content in self.contents:
+            assert FastJSONResponse(content).body == starlette_render(content)
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(responses, "orjson", None)
+        for content in self.contents:
+            assert FastJSONResponse(content).body == starlette_render(content)
+
+    def test_routes(self, temp_db):
+        with TestClient(app) as client:
+            courier = {"courier_id": 1, "courier_type": "foot", "regions": [1], "working_hours": ["09:00-18:00"]}
+            responses_ = [
+                client.post("/couriers", json={"data": [courier]}),
+                client.post("/couriers", json={"data": [courier]}),
+                client.post("/couriers", json={"data": [{**courier, "courier_type": "самокат"}]}),
+                client.patch("/couriers/1", json={"regions": [2]}),
+                client.get("/couriers/1"),
+            ]
+            for response in responses_:
+                assert response.content == starlette_render(response.json())
@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.mediator import OrderAssignMediator
+from app.db import DB_POOL_MAX_SIZE
+from app.db.pool import PoolMetrics, pool_metrics
+from app.main import app
+
+COURIER = {"courier_id": 1, "courier_type": "car", "regions": [1], "working_hours": ["09:00-18:00"]}
+
+
+class TestRequestTransaction:
+
+    def test_update_is_rolled_back_by_failed_unassign(self, temp_db, monkeypatch):
+        async def fail(self):
+            raise RuntimeError('Unassign failed')
+
+        with TestClient(app) as client:
+            assert client.post("/couriers", json={"data": [COURIER]}).status_code == 201
+            monkeypatch.setattr(OrderAssignMediator, "unassign", fail)
+            with pytest.raises(RuntimeError):
+                client.patch("/couriers/1", json={"regions": [2]})
+            monkeypatch.undo()
+            assert client.get("/couriers/1").json()["regions"] == [1]
+
+    def test_request_uses_one_connection(self, temp_db):
+        with TestClient(app) as client:
+            assert client.post("/couriers", json={"data": [COURIER]}).status_code == 201
+            acquired = pool_metrics.acquired
+            assert client.get("/couriers/1").status_code == 200  # Courier, rating and earnings
+            assert pool_metrics.acquired - acquired == 1
+
+            stats = pool_metrics.stats()
+            assert stats["max_size"] == DB_POOL_MAX_SIZE
+            assert stats["in_use"] == stats["waiting"] == stats["utilization"] == 0
+            assert stats["wait_time_max"] >= 0
+
+
+    def test_pool_metrics_are_disabled_without_pool(self):
+        class Backend:  # Private attributes of databases are changed
+            pass
+
+        class Database:
+            _backend = Backend()
+
+        metrics = PoolMetrics()
+        assert not metrics.instrument(Database(), 10, count_queries=True)
+        assert metrics.stats()["max_size"] == 0
+        assert not metrics.count_queries
@@ -1,5 +1,6 @@
 import pytest
 
+from app.utils.periods import period_to_minutes
 from app.utils.validators import validate_hours_periods
 
 
@@ -20,3 +21,11 @@ def test_validate_hours_periods():
     ]
     for period in valid_periods:
         validate_hours_periods(period)
+
+
+def test_period_to_minutes():
+    assert period_to_minutes('00:00-23:59') == (0, 23 * 60 + 59)
+    assert period_to_minutes('8:05-9:5') == (8 * 60 + 5, 9 * 60 + 5)
+    for period in ['12:30 14:00', '24:00-24:30', '12:60-13:00']:
+        with pytest.raises(ValueError):
+            period_to_minutes(period)
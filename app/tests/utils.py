@@ -0,0 +1,6 @@
+import asyncio
+
+
+def run(coroutine):
+    """Result of coroutine in event loop of tests (the same loop as TestClient application uses)."""
+    return asyncio.get_event_loop().run_until_complete(coroutine)
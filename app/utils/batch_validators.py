@@ -0,0 +1,85 @@
+"""
+Fast validation of couriers and orders batches.
+
+Checks are done by columns of batch and accept only values which pydantic
+models accept without conversion, so result is None for anything else and
+batch must be validated by models (they also give errors).
+"""
+from math import isnan
+from typing import Any, Iterable, List, Optional
+
+from app.db.schema import CourierTypeEnum
+from app.utils.constants import MAX_WEIGHT, MIN_WEIGHT
+from app.utils.periods import PERIOD_REGEX
+
+COURIER_KEYS = frozenset(('courier_id', 'courier_type', 'regions', 'working_hours'))
+ORDER_KEYS = frozenset(('order_id', 'weight', 'region', 'delivery_hours'))
+COURIER_TYPES = {courier_type.value: courier_type for courier_type in CourierTypeEnum}
+
+
+def has_types(values: Iterable[Any], *types: type) -> bool:
+    """Exact types, so bool is not int."""
+    return set(map(type, values)) <= set(types)
+
+
+def is_valid_periods_lists(periods_lists: List[Any]) -> bool:
+    if not has_types(periods_lists, list):
+        return False
+    periods = [period for periods in periods_lists for period in periods]
+    return has_types(periods, str) and all(map(PERIOD_REGEX.fullmatch, periods))
+
+
+def is_valid_items(data: Any, keys: frozenset) -> bool:
+    return type(data) is list and all(type(item) is dict and item.keys() == keys for item in data)
+
+
+def validate_couriers_batch(data: Any) -> Optional[List[dict]]:
+    """Fields values of couriers, if all of them are surely valid."""
+    if not is_valid_items(data, COURIER_KEYS):
+        return None
+    if not data:
+        return []
+    ids = [item['courier_id'] for item in data]
+    types = [item['courier_type'] for item in data]
+    regions_lists = [item['regions'] for item in data]
+    periods_lists = [item['working_hours'] for item in data]
+
+    if not has_types(ids, int) or not has_types(types, str) or not has_types(regions_lists, list):
+        return None
+    if not set(types) <= COURIER_TYPES.keys():
+        return None
+    regions = [region for regions in regions_lists for region in regions]
+    if regions and (not has_types(regions, int) or min(regions) <= 0):
+        return None
+    if not is_valid_periods_lists(periods_lists):
+        return None
+    return [
+        {'id': courier_id, 'type': COURIER_TYPES[courier_type], 'regions': regions, 'working_hours': periods}
+        for courier_id, courier_type, regions, periods in zip(ids, types, regions_lists, periods_lists)
+    ]
+
+
+def validate_orders_batch(data: Any) -> Optional[List[dict]]:
+    """Fields values of orders, if all of them are surely valid."""
+    if not is_valid_items(data, ORDER_KEYS):
+        return None
+    if not data:
+        return []
+    ids = [item['order_id'] for item in data]
+    weights = [item['weight'] for item in data]
+    regions = [item['region'] for item in data]
+    periods_lists = [item['delivery_hours'] for item in data]
+
+    if not has_types(ids, int) or not has_types(regions, int) or not has_types(weights, int, float):
+        return None
+    if min(regions) <= 0:
+        return None
+    # NaN may be missed by min and max, but the sum is NaN then
+    if min(weights) < MIN_WEIGHT or max(weights) > MAX_WEIGHT or isnan(sum(weights)):
+        return None
+    if not is_valid_periods_lists(periods_lists):
+        return None
+    return [
+        {'id': order_id, 'weight': float(weight), 'region': region, 'delivery_hours': periods}
+        for order_id, weight, region, periods in zip(ids, weights, regions, periods_lists)
+    ]
@@ -0,0 +1,49 @@
+from bisect import bisect_right, insort
+from collections import defaultdict
+from typing import AbstractSet, Dict, Generic, Iterable, List, TypeVar
+
+from app.utils.periods import MinutesPeriod, periods_hours
+
+T = TypeVar('T')
+
+
+class RegionHourBuckets(Generic[T]):
+    """
+    Sorted buckets of items grouped by region and hour of periods.
+
+    Item of a few hours is kept in a few buckets, so buckets of courier
+    regions and working hours contain all items which may intersect working
+    periods (and some which don't, they must be checked by IntervalIndex).
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, Dict[int, List[T]]] = defaultdict(lambda: defaultdict(list))
+
+    def add(self, region: int, periods: Iterable[MinutesPeriod], item: T) -> None:
+        for hour in periods_hours(periods):
+            insort(self._buckets[region][hour], item)
+
+    def remove(self, region: int, periods: Iterable[MinutesPeriod], item: T) -> None:
+        region_buckets = self._buckets[region]
+        for hour in periods_hours(periods):
+            bucket = region_buckets[hour]
+            del bucket[bisect_right(bucket, item) - 1]
+            if not bucket:
+                del region_buckets[hour]
+
+    def find(self, regions: AbstractSet[int], periods: Iterable[MinutesPeriod]) -> List[List[T]]:
+        """Not empty buckets of regions and hours of periods, they are not copied."""
+        hours = periods_hours(periods)
+        buckets = []
+        for region in regions:
+            region_buckets = self._buckets.get(region)
+            if not region_buckets:
+                continue
+            for hour in hours:
+                bucket = region_buckets.get(hour)
+                if bucket:
+                    buckets.append(bucket)
+        return buckets
+
+    def clear(self) -> None:
+        self._buckets.clear()
@@ -4,6 +4,7 @@ TIME_TEMPLATE = '%H:%M'  # 'HH:MM'
 
 MAX_WEIGHT = 50  # max weight for order
 MIN_WEIGHT = 0.01  # min weight for order
+WEIGHT_PRECISION = 100  # weight of order is set with accuracy of 0.01
 
 COURIER_POWER = {
     CourierTypeEnum.foot: 10,  # Power in kilograms
@@ -17,6 +18,34 @@ COURIER_COEFFICIENT = {
     CourierTypeEnum.car: 9,
 }
 
+COURIER_LOAD_STRATEGY = {
+    CourierTypeEnum.foot: 'greedy',  # Strategy of choosing orders (greedy, exact, approximate)
+    CourierTypeEnum.bike: 'greedy',
+    CourierTypeEnum.car: 'greedy',
+}
+
+LOAD_SELECTION_TIME_LIMIT = 0.05  # Seconds for exact and approximate load strategies
+
+ASSIGN_ATTEMPTS = 10  # Suited orders are searched again, if concurrent requests have assigned them
+COURIER_LOCK_CLASS = 1  # The first key of courier advisory locks, the second one is courier id
+
+COURIERS_CACHE_SIZE = 10000  # Couriers records in cache of every worker, 0 disables cache
+COURIERS_CACHE_TTL = 60  # Seconds, couriers updated by other workers may be stale till expiration
+
+OPEN_ORDERS_INDEX = 1  # Index of open orders in every worker, 0 disables it and candidates are read from database
+OPEN_ORDERS_CHANNEL = 'open_orders'  # Notifications of created, assigned and unassigned orders
+OPEN_ORDERS_RELOAD_INTERVAL = 300  # Seconds, index of open orders is reloaded in case of lost notifications
+OPEN_ORDERS_CHECK_DELAY = 5  # Seconds, orders changed by worker are checked when transaction is finished
+
+MATCHING_EXECUTOR = 'process'  # Pool for big matching jobs (process, thread), 'inline' runs them in event loop
+MATCHING_WORKERS = 0  # Workers of matching pool, 0 is amount of CPUs. Every uvicorn worker has own pool
+MATCHING_INLINE_MAX_ORDERS = 2000  # Matching of fewer orders is run in event loop, it's faster than transfer to pool
+
+METRICS_ENABLED = 1  # Metrics of requests and assign stages are served by /metrics, 0 disables them
+
+ORDERS_STREAM_CHUNK_SIZE = 1000  # Orders from NDJSON stream are written by chunks of this size
+ORDERS_STREAM_MAX_LINE_LENGTH = 65536  # Bytes, longer lines of NDJSON stream are skipped as invalid
+
 NOT_EXISTS_MSG = '{entity} does not exists.'
 
 RFC_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
@@ -0,0 +1,51 @@
+from bisect import bisect_left
+from typing import Iterable, List
+
+from app.utils.periods import MinutesPeriod
+
+
+class IntervalIndex:
+    """
+    Index of closed intervals for intersection checks.
+
+    Intervals are merged to sorted disjoint ones, so an intersection check
+    of one period is a binary search: O(log n) instead of scan of intervals.
+    Periods like '22:00-02:00' (start > end) are checked as segments are
+    compared everywhere: end >= other start and start <= other end.
+    """
+
+    def __init__(self, periods: Iterable[MinutesPeriod]):
+        self._periods = list(periods)
+        self._inverted = [(start, end) for start, end in self._periods if start > end]
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(period for period in self._periods if period[0] <= period[1]):
+            if self._ends and start <= self._ends[-1]:  # Intersects previous interval
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __bool__(self) -> bool:
+        return bool(self._periods)
+
+    @property
+    def intervals(self) -> List[MinutesPeriod]:
+        """Merged intervals, they intersect every period which original ones intersect."""
+        return list(zip(self._starts, self._ends)) + self._inverted
+
+    def intersects(self, start: int, end: int) -> bool:
+        """Check that period [start, end] intersects one of intervals."""
+        if start > end:  # Merged intervals may intersect it when original ones do not
+            return self._intersects_linear(self._periods, start, end)
+        i = bisect_left(self._ends, start)  # First interval which does not end before period
+        if i < len(self._starts) and self._starts[i] <= end:
+            return True
+        return self._intersects_linear(self._inverted, start, end)
+
+    def intersects_any(self, periods: Iterable[MinutesPeriod]) -> bool:
+        return any(self.intersects(start, end) for start, end in periods)
+
+    @staticmethod
+    def _intersects_linear(periods: List[MinutesPeriod], start: int, end: int) -> bool:
+        return any(end >= p_start and start <= p_end for p_start, p_end in periods)
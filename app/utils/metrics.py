@@ -0,0 +1,136 @@
+"""
+Metrics in Prometheus text format.
+
+It's a small subset of prometheus_client (counters, histograms and gauges
+which are collected at scrape), so metrics don't need one more dependency.
+"""
+from bisect import bisect_left
+from math import inf
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelsValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # Name suffix, labels and value
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+AMOUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_value(value: float) -> str:
+    if value == inf:
+        return '+Inf'
+    if value == -inf:
+        return '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels_values(self, labels: Dict[str, object]) -> LabelsValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f'Metric {self.name} has labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, labels_values: LabelsValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labels_values))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, labels, value in self.samples():
+            labels_str = ','.join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items())
+            labels_str = f'{{{labels_str}}}' if labels_str else ''
+            lines.append(f'{self.name}{suffix}{labels_str} {format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelsValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._labels_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in sorted(self._values.items()):
+            yield '', self._labels(key), value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelsValues, Tuple[List[int], List[float]]] = {}  # Counts by buckets and sum
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._labels_values(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [0] * (len(self.buckets) + 1), [0]
+        counts, total = entry
+        counts[bisect_left(self.buckets, value)] += 1  # Bucket is value <= le
+        total[0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total) in sorted(self._values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for le, count in zip((*self.buckets, inf), counts):
+                cumulative += count
+                yield '_bucket', {**labels, 'le': format_value(le)}, cumulative
+            yield '_sum', labels, total[0]
+            yield '_count', labels, cumulative
+
+
+class Gauge(Metric):
+    """Value is collected at scrape by callback."""
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], float], type_: str = 'gauge'):
+        super().__init__(name, documentation)
+        self.collect = collect
+        self.type = type_  # Collected counters are gauges with counter type
+
+    def samples(self) -> Iterable[Sample]:
+        yield '', {}, self.collect()
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
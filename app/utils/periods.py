@@ -0,0 +1,61 @@
+import re
+from typing import Iterable, List, Set, Tuple
+
+MinutesPeriod = Tuple[int, int]  # (start, end) in minutes from the day start
+
+# The same as strptime with TIME_TEMPLATE ('%H:%M') accepts, but it's much faster
+TIME_PATTERN = r'(2[0-3]|[0-1]\d|\d):([0-5]\d|\d)'
+TIME_REGEX = re.compile(TIME_PATTERN)
+PERIOD_REGEX = re.compile(f'{TIME_PATTERN}-{TIME_PATTERN}')
+
+
+def time_to_minutes(time_str: str) -> int:
+    """Convert 'HH:MM' to minutes from the day start. It raise ValueError."""
+    match = TIME_REGEX.fullmatch(time_str)
+    if match is None:
+        raise ValueError(f'Time {time_str} does not match format {TIME_PATTERN}')
+    hours, minutes = match.groups()
+    return int(hours) * 60 + int(minutes)
+
+
+def period_to_minutes(period: str) -> MinutesPeriod:
+    """Convert 'HH:MM-HH:MM' to (start, end) minutes. It raise ValueError."""
+    match = PERIOD_REGEX.fullmatch(period)
+    if match is None:
+        if len(period.split('-')) != 2:
+            raise ValueError(
+                f'Period {period} must contains 2 time points!',
+            )
+        raise ValueError(f'Period {period} is invalid!')
+    start_hours, start_minutes, end_hours, end_minutes = match.groups()
+    return int(start_hours) * 60 + int(start_minutes), int(end_hours) * 60 + int(end_minutes)
+
+
+def period_hours(start: int, end: int) -> range:
+    """Hours which period touches, for start > end it's hours between end and start."""
+    return range(min(start, end) // 60, max(start, end) // 60 + 1)
+
+
+def periods_hours(periods: Iterable[MinutesPeriod]) -> Set[int]:
+    """Hours which any of periods touches."""
+    hours = set()
+    for start, end in periods:
+        hours.update(period_hours(start, end))
+    return hours
+
+
+def periods_to_minutes(periods: Iterable[str]) -> List[MinutesPeriod]:
+    return [period_to_minutes(period) for period in periods]
+
+
+def split_periods(periods: Iterable[MinutesPeriod]) -> Tuple[List[int], List[int]]:
+    """Split periods to lists of starts and ends (how they are stored in DB)."""
+    starts, ends = [], []
+    for start, end in periods:
+        starts.append(start)
+        ends.append(end)
+    return starts, ends
+
+
+def join_periods(starts: Iterable[int], ends: Iterable[int]) -> List[MinutesPeriod]:
+    return list(zip(starts, ends))
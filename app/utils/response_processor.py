@@ -1,10 +1,19 @@
-from fastapi.encoders import jsonable_encoder
+from app.utils.constants import NOT_EXISTS_MSG
 
 
 def already_exists_response_content(db_objects: list, entities_name: str) -> dict:
     msg = 'Already exists.'
-    return jsonable_encoder({
+    return {
         'validation_error': {
             entities_name: [{'id': db_object.id, 'msg': msg} for db_object in db_objects]
         },
-    })
+    }
+
+
+def not_exists_response_content(objects_ids: list, entities_name: str, entity: str) -> dict:
+    msg = NOT_EXISTS_MSG.format(entity=entity)
+    return {
+        'validation_error': {
+            entities_name: [{'id': object_id, 'msg': msg} for object_id in objects_ids]
+        },
+    }
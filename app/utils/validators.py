@@ -1,7 +1,6 @@
-from time import strptime
 from typing import List
 
-from app.utils.constants import TIME_TEMPLATE
+from app.utils.periods import period_to_minutes
 
 
 def validate_hours_periods(periods: List[str]) -> None:
@@ -12,16 +11,7 @@ def validate_hours_periods(periods: List[str]) -> None:
 
 def validate_period(period: str) -> None:
     """If period is invalid, it raise ValueError."""
-    period_times = period.split('-')
-    if len(period_times) != 2:
-        raise ValueError(
-            f'Period {period} must contains 2 time points!',
-        )
-    try:
-        for period_time in period_times:
-            strptime(period_time, TIME_TEMPLATE)
-    except ValueError:
-        raise ValueError(f'Period {period} is invalid!')
+    period_to_minutes(period)
 
 
 def validate_regions(regions: List[int]) -> None: